@@ -446,28 +446,77 @@
 from flask import Flask, redirect
 from config import Config
 from database.models import init_db
+from database import audit, backup, connection, write_behind
+from database.cli import db_cli
+from utils import assets, compression, fragment_cache, passwords, sessions, template_cache
 from routes.auth import auth_bp
 from routes.teacher import teacher_bp
 from routes.student import student_bp
 from routes.community import community_bp
 from routes.admin import admin_bp
+from routes.articles import articles_bp
+from routes.search import search_bp
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
     app.config.from_object(Config)
     app.secret_key = 'your-secret-key-here'
 
+    # 额外的配置覆盖（基准测试、压测时指定其他数据库等）
+    if config:
+        app.config.update(config)
+
+    # 数据库连接池（每个请求一个连接，请求结束自动归还）
+    connection.init_app(app)
+
+    # last_login 等高频更新的延迟批量写入
+    write_behind.init_app(app)
+
+    # 安全审计事件的异步批量写入
+    audit.init_app(app)
+
+    # 在线备份和按 backup_interval 的定时备份
+    backup.init_app(app)
+
+    # 密码哈希专用线程池（登录时的 bcrypt 不占用请求线程）
+    passwords.init_app(app)
+
+    # 服务端会话：cookie 里只有会话 ID，内容存在 sessions 表
+    sessions.init_app(app)
+
+    # 渲染好的文章列表等片段按数据版本号缓存
+    fragment_cache.init_app(app)
+
+    # HTML / JSON 响应按 Accept-Encoding 压缩
+    compression.init_app(app)
+
+    # 静态文件：url_for 输出带内容哈希的地址，长期缓存并发送预压缩版本（先运行 flask assets build）
+    assets.init_app(app)
+
     # 注册蓝图
     app.register_blueprint(auth_bp)
     app.register_blueprint(teacher_bp)
     app.register_blueprint(student_bp)
     app.register_blueprint(community_bp)
     app.register_blueprint(admin_bp)
+    app.register_blueprint(articles_bp)
+    app.register_blueprint(search_bp)
+
+    # Jinja 字节码缓存，启动时预编译所有模板
+    template_cache.init_app(app)
 
     # 初始化数据库
     with app.app_context():
         init_db()
 
+    # 打印实际生效的 SQLite 配置（WAL、synchronous、缓存等）
+    connection.report_pragmas(app)
+
+    # 数据库维护命令: flask --app app db ...
+    app.cli.add_command(db_cli)
+    # 静态资源构建命令: flask --app app assets build
+    app.cli.add_command(assets.assets_cli)
+
     # 根路由重定向到登录
     @app.route('/')
     def index():
@@ -0,0 +1,331 @@
+# benchmarks/route_bench.py
+"""路由级基准测试
+
+用 Flask 测试客户端在不同规模的生成数据库上压测五个蓝图的热点路由，
+记录每个路由的 p50/p95/p99 延迟和 SQL 语句数，结果追加到 JSON 历史文件。
+与同规模上一次（没有退化的）结果相比，p95 变慢超过阈值或语句数增加时返回非零退出码。
+
+用法（在项目根目录下）:
+    python benchmarks/route_bench.py --scale tiny --scale small
+    python benchmarks/route_bench.py --scale small --iterations 50 --threshold 0.1
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app import create_app  # noqa: E402
+from config import Config  # noqa: E402
+from database.connection import open_connection, resolve_pragmas  # noqa: E402
+from database.generate_data import DEFAULT_PASSWORD, SCALES, generate_database  # noqa: E402
+
+DATA_DIR = os.path.join(ROOT, 'benchmarks', '.data')
+# 历史结果和生成的数据库一样放在不纳入版本库的 .data 目录里，本地跑完不会弄脏工作区
+HISTORY_FILE = os.path.join(DATA_DIR, 'history.json')
+
+# 每个角色要压测的页面 (路由名, URL)
+ROLE_ROUTES = {
+    'teacher': [
+        ('teacher.dashboard', '/teacher/dashboard'),
+        ('teacher.analytics', '/teacher/analytics'),
+    ],
+    'student': [
+        ('student.dashboard', '/student/dashboard'),
+        ('student.courses', '/student/courses'),
+    ],
+    'community_org': [
+        ('community.dashboard', '/community/dashboard'),
+        ('community.members', '/community/members'),
+        ('community.events', '/community/events'),
+    ],
+    'platform_admin': [
+        ('admin.dashboard', '/admin/dashboard'),
+    ],
+}
+
+# 会修改数据、返回大文件或整表内容的接口不参与压测（按 endpoint 名）
+SKIP_ADMIN_API = {
+    # 导出：整表生成 CSV/JSON 下载，耗时随数据量线性增长，不是页面热点
+    'admin.api_export_security_logs',
+    'admin.api_export_analytics_table',
+    # 备份：状态/触发共用一个接口，下载是整个数据库文件
+    'admin.api_system_backup',
+    'admin.api_download_backup',
+    # 数据库浏览：一次返回整张表
+    'admin.api_database_table_data',
+    # SQL 控制台：执行任意语句
+    'admin.api_database_execute',
+}
+
+
+class QueryCounter:
+    """通过 trace callback 统计连接上执行的 SQL 语句数"""
+
+    def __init__(self):
+        self.count = 0
+
+    def attach(self, conn):
+        conn.set_trace_callback(self._trace)
+
+    def _trace(self, statement):
+        # 触发器内部的语句以注释形式回调，不单独计数
+        if not statement.lstrip().startswith('--'):
+            self.count += 1
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def prepare_database(scale, seed, workdir):
+    """生成（或复用缓存的）基准数据库，并复制一份供本次运行修改"""
+    cached = os.path.join(DATA_DIR, f'{scale}-{seed}.db')
+    if not os.path.exists(cached):
+        print(f'[{scale}] generating benchmark database ...')
+        generate_database(cached, scale, seed, pragmas=resolve_pragmas(vars(Config)),
+                          echo=lambda line: print(f'    {line}'))
+    target = os.path.join(workdir, f'{scale}.db')
+    shutil.copyfile(cached, target)
+    return target
+
+
+def pick_users(db_path):
+    """每个角色挑选数据最多的用户，让页面走最重的路径"""
+    conn = open_connection(db_path)
+    try:
+        queries = {
+            'teacher': '''
+                SELECT u.username FROM users u
+                JOIN courses c ON c.teacher_id = u.id
+                JOIN course_enrollments ce ON ce.course_id = c.id
+                WHERE u.role = 'teacher'
+                GROUP BY u.id ORDER BY COUNT(*) DESC LIMIT 1
+            ''',
+            'student': '''
+                SELECT u.username FROM users u
+                JOIN course_enrollments ce ON ce.student_id = u.id
+                WHERE u.role = 'student'
+                GROUP BY u.id ORDER BY COUNT(*) DESC LIMIT 1
+            ''',
+            'community_org': '''
+                SELECT u.username FROM users u
+                JOIN members m ON m.org_id = u.id
+                WHERE u.role = 'community_org'
+                GROUP BY u.id ORDER BY COUNT(*) DESC LIMIT 1
+            ''',
+            'platform_admin': "SELECT username FROM users WHERE role = 'platform_admin' ORDER BY id LIMIT 1",
+        }
+        users = {}
+        for role, sql in queries.items():
+            row = conn.execute(sql).fetchone()
+            if row is None:
+                row = conn.execute('SELECT username FROM users WHERE role = ? LIMIT 1', (role,)).fetchone()
+            if row is not None:
+                users[role] = row[0]
+        article = conn.execute('SELECT id FROM articles ORDER BY id LIMIT 1').fetchone()
+        return users, (article[0] if article else 1)
+    finally:
+        conn.close()
+
+
+def admin_api_routes(app, article_id):
+    """枚举 /admin/api/ 下所有 GET 接口，路径参数用样例值填充"""
+    samples = {'article_id': article_id, 'user_id': 1, 'table_name': 'users'}
+    routes = []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda r: r.rule):
+        if not rule.rule.startswith('/admin/api/') or 'GET' not in rule.methods:
+            continue
+        if rule.endpoint in SKIP_ADMIN_API or any(arg not in samples for arg in rule.arguments):
+            continue
+        url = rule.rule
+        for arg in rule.arguments:
+            url = url.replace(f'<{arg}>', str(samples[arg])).replace(f'<int:{arg}>', str(samples[arg]))
+        routes.append((url, url))
+    return routes
+
+
+def _login(client, username):
+    return client.post('/login', data={'username': username, 'password': DEFAULT_PASSWORD})
+
+
+def _measure(counter, func, warmup, iterations):
+    """执行 func 多次，返回耗时（毫秒）列表、每次的语句数和最后一次的状态码"""
+    for _ in range(warmup):
+        func()
+    timings, queries, status = [], [], None
+    for _ in range(iterations):
+        counter.count = 0
+        started = time.perf_counter()
+        response = func()
+        timings.append((time.perf_counter() - started) * 1000)
+        queries.append(counter.count)
+        status = response.status_code
+    return timings, queries, status
+
+
+def _summary(timings, queries, status):
+    if len(timings) > 1:
+        cuts = statistics.quantiles(timings, n=100, method='inclusive')
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = timings[0]
+    return {
+        'p50_ms': round(p50, 3),
+        'p95_ms': round(p95, 3),
+        'p99_ms': round(p99, 3),
+        'queries': max(queries),
+        'status': status,
+        'samples': len(timings),
+    }
+
+
+def run_scale(scale, seed, warmup, iterations, login_iterations, workdir):
+    """在一个规模上跑完所有路由，返回 {路由: 统计}"""
+    db_path = prepare_database(scale, seed, workdir)
+    users, article_id = pick_users(db_path)
+
+    counter = QueryCounter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        # 定时备份会在压测中途复制整个数据库，关掉
+        app = create_app({'DATABASE': db_path, 'BACKUP_SCHEDULE_ENABLED': False})
+    app.extensions['db_pool'].connect_hooks.append(counter.attach)
+
+    results = {}
+
+    def record(name, func, count):
+        with contextlib.redirect_stdout(io.StringIO()):
+            results[name] = _summary(*_measure(counter, func, min(warmup, count), count))
+        item = results[name]
+        print(f"  {name:<55} p50 {item['p50_ms']:8.2f}  p95 {item['p95_ms']:8.2f}  "
+              f"p99 {item['p99_ms']:8.2f} ms  {item['queries']:4d} queries  [{item['status']}]")
+
+    print(f'[{scale}] {os.path.getsize(db_path) / 1024 / 1024:.1f} MB, users: '
+          + ', '.join(f'{role}={name}' for role, name in users.items()))
+
+    if 'student' in users:
+        record('auth.login', lambda: _login(app.test_client(), users['student']), login_iterations)
+
+    for role, routes in ROLE_ROUTES.items():
+        if role not in users:
+            continue
+        client = app.test_client()
+        with contextlib.redirect_stdout(io.StringIO()):
+            _login(client, users[role])
+        if role == 'platform_admin':
+            routes = routes + admin_api_routes(app, article_id)
+        for name, url in routes:
+            record(name, lambda url=url: client.get(url), iterations)
+
+    for name in ('write_behind', 'audit_writer'):
+        if name in app.extensions:
+            app.extensions[name].close()
+    app.extensions['db_pool'].close_all()
+    return results
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def find_baseline(history, scale):
+    """同规模最近一次没有退化的结果"""
+    for run in reversed(history):
+        if run['scale'] == scale and not run.get('regressions'):
+            return run
+    return None
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """找出 p95 变慢超过阈值（且绝对差值超过噪声下限）或语句数增加的路由"""
+    regressions = []
+    for name, item in results.items():
+        old = baseline['results'].get(name)
+        if old is None:
+            continue
+        delta = item['p95_ms'] - old['p95_ms']
+        if delta > min_delta_ms and item['p95_ms'] > old['p95_ms'] * (1 + threshold):
+            regressions.append(f"{name}: p95 {old['p95_ms']:.2f} -> {item['p95_ms']:.2f} ms "
+                               f"(+{delta / old['p95_ms'] * 100 if old['p95_ms'] else 0:.0f}%)")
+        if item['queries'] > old['queries']:
+            regressions.append(f"{name}: queries {old['queries']} -> {item['queries']}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Route-level benchmarks for all blueprints')
+    parser.add_argument('--scale', action='append', choices=sorted(SCALES),
+                        help='数据规模，可重复指定（默认 tiny 和 small）')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--login-iterations', type=int, default=10,
+                        help='登录要做 bcrypt 校验，单独指定次数')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='p95 允许变慢的比例，默认 0.2 即 20%%')
+    parser.add_argument('--min-delta-ms', type=float, default=1.0,
+                        help='绝对差值低于此值的变化视为噪声')
+    parser.add_argument('--history', default=HISTORY_FILE)
+    parser.add_argument('--no-save', action='store_true', help='只比较，不写入历史文件')
+    args = parser.parse_args(argv)
+
+    history = load_history(args.history)
+    failed = False
+    runs = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for scale in args.scale or ['tiny', 'small']:
+            results = run_scale(scale, args.seed, args.warmup, args.iterations,
+                                args.login_iterations, workdir)
+            baseline = find_baseline(history, scale)
+            regressions = compare(results, baseline, args.threshold, args.min_delta_ms) if baseline else []
+            if baseline is None:
+                print(f'[{scale}] no baseline yet')
+            elif regressions:
+                failed = True
+                print(f"[{scale}] REGRESSIONS vs {baseline['revision']} ({baseline['timestamp']}):")
+                for line in regressions:
+                    print(f'    {line}')
+            else:
+                print(f"[{scale}] OK vs {baseline['revision']} ({baseline['timestamp']})")
+            runs.append({
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'revision': _git_revision(),
+                'scale': scale,
+                'seed': args.seed,
+                'iterations': args.iterations,
+                'profile': Config.SQLITE_PROFILE,
+                'results': results,
+                'regressions': regressions,
+            })
+
+    if not args.no_save:
+        history.extend(runs)
+        os.makedirs(os.path.dirname(os.path.abspath(args.history)), exist_ok=True)
+        with open(args.history, 'w', encoding='utf-8') as f:
+            json.dump(history, f, ensure_ascii=False, indent=2)
+        print(f'results appended to {args.history}')
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,6 +6,108 @@ class Config:
     DATABASE = 'database/komodo_hub.db'
     DEBUG = True
 
+    # 数据库连接池 - 每个进程最多保持的连接数，以及池满时的等待秒数
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+
+    # SQLite 性能配置 - 每个连接打开时执行的 PRAGMA 预设方案
+    # durable: 每次提交都落盘，断电也不丢数据；throughput: WAL + NORMAL，读写并发更好
+    SQLITE_PRAGMA_PRESETS = {
+        'durable': {
+            'busy_timeout': 5000,
+            'journal_mode': 'WAL',
+            'synchronous': 'FULL',
+            'cache_size': -16000,  # 负数表示 KiB，即 16MB
+            'mmap_size': 0,
+            'temp_store': 'DEFAULT',
+        },
+        'throughput': {
+            'busy_timeout': 5000,
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'cache_size': -64000,
+            'mmap_size': 256 * 1024 * 1024,
+            'temp_store': 'MEMORY',
+        },
+    }
+    SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'throughput')
+    # 在预设基础上单独覆盖的 PRAGMA，例如 {'cache_size': -32000}
+    SQLITE_PRAGMAS = {}
+
+    # SQL 计时统计；超过 SLOW_QUERY_MS 毫秒的语句连同参数和执行计划记入慢查询日志
+    SQL_INSTRUMENTATION = os.environ.get('SQL_INSTRUMENTATION', 'true').lower() == 'true'
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 100))
+    SLOW_QUERY_LOG_SIZE = 50
+
+    # 全文搜索每类最多对最新的多少条命中文档计算 BM25；0 表示全部打分（常见词在大库上会慢）
+    SEARCH_RANK_WINDOW = int(os.environ.get('SEARCH_RANK_WINDOW', 5000))
+
+    # 密码哈希线程池：同时计算的线程数、最多排队数、最长等待秒数；超出时登录返回 503
+    # 线程数默认取 CPU 核数的一半，给页面渲染留出 CPU
+    PASSWORD_WORKERS = int(os.environ.get('PASSWORD_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+    PASSWORD_QUEUE_SIZE = int(os.environ.get('PASSWORD_QUEUE_SIZE', 32))
+    PASSWORD_TIMEOUT = float(os.environ.get('PASSWORD_TIMEOUT', 5))
+
+    # 新密码和登录时升级使用的 bcrypt cost；用 flask db calibrate-password-cost 按本机速度选取
+    BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+
+    # last_login 等"触碰"类更新先记在内存里，每隔 WRITE_BEHIND_INTERVAL 秒
+    # 或积压超过 WRITE_BEHIND_MAX_PENDING 条时批量写入；关闭后每次立即写入
+    WRITE_BEHIND_ENABLED = os.environ.get('WRITE_BEHIND_ENABLED', 'true').lower() == 'true'
+    WRITE_BEHIND_INTERVAL = float(os.environ.get('WRITE_BEHIND_INTERVAL', 5))
+    WRITE_BEHIND_MAX_PENDING = int(os.environ.get('WRITE_BEHIND_MAX_PENDING', 500))
+
+    # 审计事件（登录、文章和用户管理、SQL 控制台等）先放进内存队列，
+    # 每隔 AUDIT_FLUSH_INTERVAL 秒或积压到 AUDIT_BATCH_SIZE 条时批量写入 security_logs；
+    # 队列超过 AUDIT_MAX_QUEUE 条时丢弃新事件并计数；关闭后每次立即写入
+    AUDIT_ASYNC = os.environ.get('AUDIT_ASYNC', 'true').lower() == 'true'
+    AUDIT_FLUSH_INTERVAL = float(os.environ.get('AUDIT_FLUSH_INTERVAL', 2))
+    AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', 200))
+    AUDIT_MAX_QUEUE = int(os.environ.get('AUDIT_MAX_QUEUE', 10000))
+
+    # 会话存储：sqlite 为服务端会话（cookie 只有会话 ID），cookie 为 Flask 默认的签名 cookie
+    # 服务端会话在每个进程内有 LRU 缓存，其他进程的修改最多 SESSION_CACHE_TTL 秒后可见
+    SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'sqlite')
+    SESSION_CACHE_SIZE = int(os.environ.get('SESSION_CACHE_SIZE', 1024))
+    SESSION_CACHE_TTL = float(os.environ.get('SESSION_CACHE_TTL', 30))
+
+    # 渲染好的页面片段（仪表板的文章列表）在每个进程内最多缓存多少份，0 表示不缓存
+    FRAGMENT_CACHE_SIZE = int(os.environ.get('FRAGMENT_CACHE_SIZE', 256))
+
+    # Jinja 模板字节码缓存目录（相对路径按应用目录解析），多个 worker 共用；留空表示不缓存
+    JINJA_CACHE_DIR = os.environ.get('JINJA_CACHE_DIR', '.jinja_cache')
+    # 启动时预先编译全部模板，首个请求不再承担编译开销
+    TEMPLATE_PRECOMPILE = os.environ.get('TEMPLATE_PRECOMPILE', 'true').lower() == 'true'
+
+    # 响应压缩：按 Accept-Encoding 协商，br / zstd 需要安装 brotli / zstandard，gzip 总是可用
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_ALGORITHMS = ('br', 'zstd', 'gzip')  # 客户端都支持时的优先顺序
+    COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL', 6))
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 500))  # 字节
+    COMPRESSION_MIMETYPES = (
+        'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+        'application/javascript', 'application/json', 'application/x-ndjson', 'image/svg+xml',
+    )
+
+    # 使用 flask assets build 生成的清单，静态文件地址带内容哈希并长期缓存
+    STATIC_FINGERPRINT = os.environ.get('STATIC_FINGERPRINT', 'true').lower() == 'true'
+
+    # 在线备份：目录（相对路径按应用目录解析）、每步复制的页数和步间休眠秒数、是否压缩、保留份数
+    BACKUP_DIR = os.environ.get('BACKUP_DIR', 'backups')
+    BACKUP_PAGES_PER_STEP = int(os.environ.get('BACKUP_PAGES_PER_STEP', 256))
+    BACKUP_STEP_SLEEP = float(os.environ.get('BACKUP_STEP_SLEEP', 0.01))
+    BACKUP_COMPRESS = os.environ.get('BACKUP_COMPRESS', 'false').lower() == 'true'
+    BACKUP_KEEP = int(os.environ.get('BACKUP_KEEP', 7))
+    # 按系统设置 backup_interval（天）自动备份，每隔 BACKUP_CHECK_INTERVAL 秒检查一次是否到期
+    BACKUP_SCHEDULE_ENABLED = os.environ.get('BACKUP_SCHEDULE_ENABLED', 'true').lower() == 'true'
+    BACKUP_CHECK_INTERVAL = float(os.environ.get('BACKUP_CHECK_INTERVAL', 600))
+
+    # 管理后台统计快照的缓存秒数；相关表有写入时会立即失效，0 表示不缓存
+    ANALYTICS_CACHE_TTL = float(os.environ.get('ANALYTICS_CACHE_TTL', 60))
+
+    # 启动时是否自动执行待执行的数据库迁移；多进程部署可关闭，改为先运行 flask db migrate
+    AUTO_MIGRATE = os.environ.get('AUTO_MIGRATE', 'true').lower() == 'true'
+
     # 添加语言配置 - 将默认语言设置为英文
     BABEL_DEFAULT_LOCALE = 'en'
     BABEL_SUPPORTED_LOCALES = ['en', 'zh']
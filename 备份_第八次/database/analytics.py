@@ -0,0 +1,119 @@
+# database/analytics.py
+"""平台统计快照
+
+一条语句算出全站计数器：users、articles、events 各扫描一次，courses 只数索引。
+结果按相关表的版本号（见 table_versions）加 TTL 缓存在进程内：
+有写入时版本号变化，下次请求立即重算；没有写入时最多 TTL 秒重算一次，
+让"最近 N 天"这类随时间变化的数字也能更新。
+"""
+import threading
+import time
+
+from database.table_versions import get_versions
+
+SNAPSHOT_TABLES = ('users', 'articles', 'events', 'courses')
+RECENT_DAYS = 7
+DEFAULT_TTL = 60
+
+# LENGTH(content) 要读出整篇正文，是整条语句的主要开销；
+# 先在子查询里每行只算一次长度，再按长度分段计数。子查询被展开进外层的话，
+# 每个引用 length 的地方都会重新调用一次 LENGTH。AS MATERIALIZED 要 SQLite 3.35 以上，
+# 这里用 LIMIT -1（不限行数）阻止展开：外层是聚合查询时带 LIMIT 的子查询不会被展开，各版本都适用
+SNAPSHOT_SQL = '''
+    WITH article_rows AS (
+        SELECT LENGTH(content) AS length, created_at >= :since AS recent FROM articles LIMIT -1
+    )
+    SELECT u.*, a.*, e.*, c.*
+    FROM (
+        SELECT COALESCE(SUM(role = 'student'), 0) AS students,
+               COALESCE(SUM(role = 'teacher'), 0) AS teachers,
+               COALESCE(SUM(role = 'community_org'), 0) AS organizers,
+               COALESCE(SUM(last_login IS NOT NULL), 0) AS active
+        FROM users
+    ) u, (
+        SELECT COUNT(*) AS articles,
+               COALESCE(SUM(recent), 0) AS recent_articles,
+               COALESCE(SUM(length < 100), 0) AS short_articles,
+               COALESCE(SUM(length >= 100 AND length < 500), 0) AS medium_articles,
+               COALESCE(SUM(length >= 500), 0) AS long_articles
+        FROM article_rows
+    ) a, (
+        SELECT COUNT(*) AS events,
+               COALESCE(SUM(created_at >= :since), 0) AS recent_events
+        FROM events
+    ) e, (
+        SELECT COUNT(*) AS courses FROM courses
+    ) c
+'''
+
+# 文章长度分类，顺序与原来的 GROUP BY 输出一致
+ARTICLE_CATEGORIES = (
+    ('Long story', 'long_articles'),
+    ('Medium-length story', 'medium_articles'),
+    ('Short story', 'short_articles'),
+)
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def compute_snapshot(conn, recent_days=RECENT_DAYS):
+    """直接查询数据库计算统计快照"""
+    row = conn.execute(SNAPSHOT_SQL, {
+        'since': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(time.time() - recent_days * 86400)),
+    }).fetchone()
+
+    return {
+        'user_stats': {
+            'students': row['students'],
+            'teachers': row['teachers'],
+            'organizers': row['organizers'],
+            'total': row['students'] + row['teachers'] + row['organizers'],
+            'active': row['active'],
+        },
+        'content_stats': {
+            'articles': row['articles'],
+            'events': row['events'],
+            'courses': row['courses'],
+            'recent_articles': row['recent_articles'],
+            'recent_events': row['recent_events'],
+        },
+        'active_users': [
+            {'role': 'student', 'count': row['students']},
+            {'role': 'teacher', 'count': row['teachers']},
+            {'role': 'community_org', 'count': row['organizers']},
+        ],
+        'article_categories': [
+            {'category': category, 'count': row[column]}
+            for category, column in ARTICLE_CATEGORIES if row[column]
+        ],
+    }
+
+
+def get_snapshot(conn, ttl=DEFAULT_TTL):
+    """带缓存的统计快照：相关表版本号不变且未超过 ttl 秒时直接返回上次的结果
+
+    同一时间只有一个线程重算，其他线程等它算完后直接用新结果。
+    """
+    versions = get_versions(conn, SNAPSHOT_TABLES)
+    entry = _cache.get('snapshot')
+    if entry and entry['versions'] == versions and entry['expires'] > time.monotonic():
+        return entry['data']
+
+    with _lock:
+        entry = _cache.get('snapshot')
+        if entry and entry['versions'] == versions and entry['expires'] > time.monotonic():
+            return entry['data']
+
+        data = compute_snapshot(conn)
+        _cache['snapshot'] = {
+            'versions': versions,
+            'expires': time.monotonic() + ttl,
+            'data': data,
+        }
+        return data
+
+
+def clear_snapshot_cache():
+    """清空进程内缓存"""
+    _cache.clear()
@@ -0,0 +1,151 @@
+# database/audit.py
+"""安全审计事件的异步批量写入
+
+登录、退出、文章增删改、用户管理、SQL 控制台这些操作都应该留下审计记录，
+但如果每次都在请求里 INSERT 一行再提交，每个请求都要多抢一次写锁、刷一次 WAL。
+这里 log_event 只把事件放进内存队列就返回，后台线程每隔 interval 秒
+（或积压到 batch_size 条时提前）在一个事务里把整批事件写进 security_logs，
+进程退出时再写一次。线程的启动、fork 后的重建和写入流程在 database.background。
+
+队列有上限：写入跟不上、队列满了时新事件直接丢弃并计数，请求永远不会因为审计而等待。
+"""
+import atexit
+from collections import deque
+from datetime import datetime, timezone
+
+from flask import current_app, has_request_context, request, session
+
+from database.background import BackgroundFlusher
+
+INSERT_SQL = '''
+    INSERT INTO security_logs (user_id, action, description, ip_address, user_agent, created_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+# user_agent 和 description 截断长度，防止异常请求写入超长内容
+MAX_FIELD_LENGTH = 500
+
+
+def _now():
+    # 与列默认值 CURRENT_TIMESTAMP 的格式一致（UTC）
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def build_event(action, description='', user_id=None):
+    """组装一条审计事件；在请求里调用时自动带上当前用户、IP 和 User-Agent"""
+    ip_address = user_agent = None
+    if has_request_context():
+        if user_id is None:
+            user_id = session.get('user_id')
+        ip_address = request.remote_addr
+        user_agent = (request.user_agent.string or '')[:MAX_FIELD_LENGTH] or None
+    return (user_id, action, (description or '')[:MAX_FIELD_LENGTH], ip_address, user_agent, _now())
+
+
+class AuditWriter(BackgroundFlusher):
+    """有界的审计事件队列 + 定时批量写入的后台线程（线程安全）"""
+
+    thread_name = 'audit-writer'
+    failure_message = '审计日志写入失败'
+
+    def __init__(self, database, pragmas=None, interval=2.0, batch_size=200, max_queue=10000):
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        super().__init__(database, pragmas, interval)
+
+    def _clear(self):
+        self._queue = deque()
+        self.enqueued = 0
+        self.dropped = 0
+        self.peak_queue = 0
+
+    def enqueue(self, event):
+        """放入队列，不等待；队列已满时丢弃并返回 False"""
+        self._start()
+        with self._lock:
+            if len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                return False
+            self._queue.append(event)
+            self.enqueued += 1
+            pending = len(self._queue)
+            self.peak_queue = max(self.peak_queue, pending)
+        if pending >= self.batch_size:
+            self._wake()
+        return True
+
+    def _take(self):
+        # 事件按顺序整批取出
+        events = list(self._queue)
+        self._queue.clear()
+        return events
+
+    def _write(self, conn, events):
+        conn.executemany(INSERT_SQL, events)
+        return len(events)
+
+    def _requeue(self, events):
+        # 写入失败的事件放回队首，保持顺序；放不下的部分计入丢弃数
+        room = max(0, self.max_queue - len(self._queue))
+        keep = events[len(events) - room:] if room < len(events) else events
+        self.dropped += len(events) - len(keep)
+        self._queue.extendleft(reversed(keep))
+
+    def _stats(self):
+        return {
+            'queued': len(self._queue),
+            'max_queue': self.max_queue,
+            'peak_queue': self.peak_queue,
+            'batch_size': self.batch_size,
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'dropped': self.dropped,
+        }
+
+def _writer():
+    return current_app.extensions.get('audit_writer')
+
+
+def log_event(action, description='', user_id=None):
+    """记录一条审计事件；没有启用异步写入时立即写入当前请求的连接"""
+    event = build_event(action, description, user_id)
+    writer = _writer()
+    if writer is not None:
+        writer.enqueue(event)
+        return
+
+    from database.connection import get_connection
+    try:
+        conn = get_connection()
+        conn.execute(INSERT_SQL, event)
+        conn.commit()
+    except Exception as e:
+        print(f"Error writing security log: {e}")
+
+
+def flush_audit_events():
+    """立即写入积压的审计事件（查看或导出安全日志前调用）"""
+    writer = _writer()
+    return writer.flush() if writer is not None else 0
+
+
+def get_audit_stats():
+    writer = _writer()
+    return writer.stats() if writer is not None else {}
+
+
+def init_app(app):
+    """启用异步审计写入时创建队列（后台线程在第一次记录时启动），进程退出时写入剩余的事件"""
+    if not app.config.get('AUDIT_ASYNC', True):
+        return None
+
+    from database.connection import resolve_pragmas
+    writer = AuditWriter(
+        app.config['DATABASE'],
+        pragmas=resolve_pragmas(app.config),
+        interval=app.config.get('AUDIT_FLUSH_INTERVAL', 2.0),
+        batch_size=app.config.get('AUDIT_BATCH_SIZE', 200),
+        max_queue=app.config.get('AUDIT_MAX_QUEUE', 10000),
+    )
+    app.extensions['audit_writer'] = writer
+    atexit.register(writer.close)
+    return writer
@@ -0,0 +1,176 @@
+# database/background.py
+"""后台线程的公共部分：按进程启动、fork 后重建，以及定时批量写入
+
+预加载应用再 fork 的服务器里，create_app 时启动的线程只存在于父进程，
+锁也可能在被持有的状态下复制给子进程。这里和 ConnectionPool 一样记下 pid：
+发现 pid 变了就调用 _reset() 重建本进程的锁和状态，后台线程在第一次用到时才启动。
+
+BackgroundFlusher 在此基础上实现"内存积压 + 定时在一个事务里写入"的后台线程，
+子类只负责记录数据和写入一批数据（延迟写入缓冲、审计日志队列）。
+"""
+import os
+import threading
+import time
+
+
+class ForkAware:
+    """记录所属进程的对象；fork 出的子进程第一次使用时重建状态（线程安全）"""
+
+    def __init__(self):
+        self._start_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # 子类在这里重建锁和进程内状态，继承自父进程的数据丢弃，由父进程自己处理
+        self._pid = os.getpid()
+        self._stopped = threading.Event()
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            with self._start_lock:
+                if self._pid != os.getpid():
+                    self._reset()
+
+    def _ensure_thread(self, attr, target, name):
+        """当前进程还没有 attr 指向的后台线程时启动一个"""
+        if self._pid == os.getpid() and getattr(self, attr) is not None:
+            return
+        self._check_fork()
+        with self._start_lock:
+            if getattr(self, attr) is None and not self._stopped.is_set():
+                thread = threading.Thread(target=target, name=name, daemon=True)
+                setattr(self, attr, thread)
+                thread.start()
+
+    def _owned(self):
+        """是否由当前进程创建或重建（退出时只处理自己的数据）"""
+        return self._pid == os.getpid()
+
+
+class BackgroundFlusher(ForkAware):
+    """内存积压 + 定时批量写入的后台线程
+
+    子类实现：
+    - _clear()：清空积压（加锁后调用，fork 后也会调用）
+    - _take()：取出当前积压的一批并清空（持有 self._lock）
+    - _write(conn, batch)：在已开始的事务里写入一批，返回写入的条数
+    - _requeue(batch)：写入失败时放回（持有 self._lock）
+    - _stats()：自己的统计项（持有 self._lock）
+    """
+
+    thread_name = 'flusher'
+    # 写入失败时的日志前缀
+    failure_message = '后台写入失败'
+
+    def __init__(self, database, pragmas=None, interval=5.0):
+        self.database = database
+        self.pragmas = pragmas
+        self.interval = interval
+        super().__init__()
+
+    def _reset(self):
+        super()._reset()
+        self._thread = None
+        self._lock = threading.Lock()
+        # 同一时间只有一个线程在写，保证按顺序写入
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self.flushes = 0
+        self.written = 0
+        self.errors = 0
+        self.last_flush_ms = 0.0
+        self.last_flush_at = None
+        self._clear()
+
+    def _start(self):
+        """记录数据前调用：当前进程还没有后台线程时启动"""
+        self._ensure_thread('_thread', self._run, self.thread_name)
+
+    def _wake(self):
+        """积压过多时让后台线程提前写入"""
+        self._wakeup.set()
+
+    def flush(self):
+        """把积压的数据在一个事务里写入数据库，返回写入的条数"""
+        from database.connection import open_connection
+
+        self._check_fork()
+        with self._flush_lock:
+            with self._lock:
+                batch = self._take()
+            if not batch:
+                return 0
+
+            started = time.perf_counter()
+            conn = None
+            try:
+                conn = open_connection(self.database, self.pragmas)
+                conn.execute('BEGIN IMMEDIATE')
+                count = self._write(conn, batch)
+                conn.commit()
+            except Exception as e:
+                print(f"{self.failure_message}，下次重试: {e}")
+                if conn is not None:
+                    conn.rollback()
+                with self._lock:
+                    self.errors += 1
+                    self._requeue(batch)
+                return 0
+            finally:
+                if conn is not None:
+                    conn.close()
+
+            with self._lock:
+                self.flushes += 1
+                self.written += count
+                self.last_flush_ms = (time.perf_counter() - started) * 1000
+                self.last_flush_at = time.time()
+            return count
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def close(self):
+        """停止后台线程并写入剩余的数据（进程退出时自动调用）"""
+        if not self._owned() or self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+        self.flush()
+
+    def stats(self):
+        self._check_fork()
+        with self._lock:
+            stats = self._stats()
+            stats.update({
+                'thread_alive': self._thread is not None and self._thread.is_alive(),
+                'interval_seconds': self.interval,
+                'flushes': self.flushes,
+                'errors': self.errors,
+                'last_flush_ms': round(self.last_flush_ms, 2),
+                'last_flush_at': (time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.last_flush_at))
+                                  if self.last_flush_at else None),
+            })
+            return stats
+
+    # ---- 子类实现 ----
+
+    def _clear(self):
+        raise NotImplementedError
+
+    def _take(self):
+        raise NotImplementedError
+
+    def _write(self, conn, batch):
+        raise NotImplementedError
+
+    def _requeue(self, batch):
+        raise NotImplementedError
+
+    def _stats(self):
+        return {}
@@ -0,0 +1,352 @@
+# database/backup.py
+"""在线备份
+
+用 sqlite3 的备份 API 把数据库逐批复制到 BACKUP_DIR，不需要停机：
+每一步只复制 pages_per_step 页，步与步之间休眠 step_sleep 秒，把 CPU 和磁盘让给正常请求。
+源连接全程保持一个读事务，WAL 模式下读的是开始时的快照，期间的写入既不被阻塞，
+也不会让备份从头重来。完成后可选压缩成 .gz，并只保留最近 keep 份。
+
+调度线程定期检查：距离最近一次备份超过系统设置 backup_interval（天）就自动备份一次。
+调度线程在进程处理第一个请求时才启动，fork 出的 worker 各自启动自己的调度线程。
+多个 worker 通过备份目录里的锁文件保证同一时间只有一个备份在跑；
+任务状态和进度写在同一目录的 .backup_job.json 里，轮询落到哪个 worker 都能看到。
+"""
+import atexit
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+
+from database.background import ForkAware
+
+BACKUP_PREFIX = 'komodo_hub_'
+BACKUP_SUFFIXES = ('.db', '.db.gz')
+LOCK_NAME = '.backup.lock'
+JOB_NAME = '.backup_job.json'
+# 进度最多每隔这么多秒写一次状态文件
+PROGRESS_WRITE_INTERVAL = 0.5
+# 超过这么久的锁文件认为是进程崩溃遗留的
+STALE_LOCK_SECONDS = 6 * 3600
+DEFAULT_INTERVAL_DAYS = 7
+
+
+class BackupBusyError(RuntimeError):
+    """已有备份在进行中"""
+
+
+def is_backup_name(name):
+    """只认本模块生成的备份文件名（下载接口也靠它防止路径穿越）"""
+    return (name.startswith(BACKUP_PREFIX) and name.endswith(BACKUP_SUFFIXES)
+            and os.path.basename(name) == name)
+
+
+def _pid_alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # 没有权限发信号也说明进程存在
+        return True
+    return True
+
+
+class BackupManager(ForkAware):
+    """备份任务、保留策略和定时调度（线程安全）"""
+
+    def __init__(self, database, directory, pages_per_step=256, step_sleep=0.01,
+                 compress=False, keep=7, check_interval=600):
+        self.database = database
+        self.directory = directory
+        self.pages_per_step = pages_per_step
+        self.step_sleep = step_sleep
+        self.compress = compress
+        self.keep = keep
+        self.check_interval = check_interval
+        super().__init__()
+        os.makedirs(directory, exist_ok=True)
+
+    def _reset(self):
+        # 任务状态以状态文件为准，进程内只保留本进程发起的任务
+        super()._reset()
+        self._lock = threading.Lock()
+        self._job = None
+        self._job_written_at = 0.0
+        self._thread = None
+        self._scheduler = None
+
+    # ---- 备份文件 ----
+
+    def list_backups(self):
+        """备份文件列表，最新的在前"""
+        backups = []
+        for name in os.listdir(self.directory):
+            if not is_backup_name(name):
+                continue
+            stat = os.stat(os.path.join(self.directory, name))
+            backups.append({
+                'name': name,
+                'size': stat.st_size,
+                'created_at': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
+                'mtime': stat.st_mtime,
+            })
+        backups.sort(key=lambda item: item['mtime'], reverse=True)
+        return backups
+
+    def latest_backup_time(self):
+        backups = self.list_backups()
+        return backups[0]['mtime'] if backups else None
+
+    def path_of(self, name):
+        """备份文件的完整路径；名字不合法或文件不存在时返回 None"""
+        if not is_backup_name(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+    def _apply_retention(self):
+        for item in self.list_backups()[self.keep:]:
+            try:
+                os.remove(os.path.join(self.directory, item['name']))
+            except OSError as e:
+                print(f"Error removing old backup {item['name']}: {e}")
+
+    # ---- 跨进程锁 ----
+
+    def _acquire_file_lock(self):
+        path = os.path.join(self.directory, LOCK_NAME)
+        try:
+            if time.time() - os.path.getmtime(path) > STALE_LOCK_SECONDS:
+                os.remove(path)
+        except OSError:
+            pass
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        return True
+
+    def _release_file_lock(self):
+        try:
+            os.remove(os.path.join(self.directory, LOCK_NAME))
+        except OSError:
+            pass
+
+    # ---- 备份任务 ----
+
+    def start(self, trigger='manual'):
+        """在后台线程开始一次备份，返回任务信息；已有备份在进行时抛出 BackupBusyError"""
+        self._check_fork()
+        with self._lock:
+            if not self._acquire_file_lock():
+                raise BackupBusyError('A backup is already running')
+            started = datetime.now()
+            self._job = {
+                'id': started.strftime('%Y%m%d%H%M%S%f'),
+                'trigger': trigger,
+                'status': 'running',
+                'started_at': started.strftime('%Y-%m-%d %H:%M:%S'),
+                'finished_at': None,
+                'pages_total': 0,
+                'pages_done': 0,
+                'percent': 0.0,
+                'file': None,
+                'size': None,
+                'elapsed_ms': None,
+                'error': None,
+                'pid': os.getpid(),
+            }
+            job = dict(self._job)
+            self._write_job()
+            self._thread = threading.Thread(target=self._run, name='backup', daemon=True)
+            self._thread.start()
+        return job
+
+    def run(self, trigger='manual'):
+        """同步执行一次备份（命令行使用），返回最终的任务信息"""
+        self.start(trigger)
+        self._thread.join()
+        return self.status()
+
+    def _write_job(self):
+        # 先写临时文件再替换，读的一方不会读到写了一半的内容；调用方持有 self._lock
+        path = os.path.join(self.directory, JOB_NAME)
+        try:
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(self._job, f)
+            os.replace(path + '.tmp', path)
+            self._job_written_at = time.monotonic()
+        except OSError as e:
+            print(f"Error writing backup status: {e}")
+
+    def _update(self, progress_only=False, **changes):
+        with self._lock:
+            self._job.update(changes)
+            # 进度变化很频繁，限制写文件的频率；状态变化总是立即写
+            if not progress_only or time.monotonic() - self._job_written_at >= PROGRESS_WRITE_INTERVAL:
+                self._write_job()
+
+    def _progress(self, status, remaining, total):
+        done = total - remaining
+        self._update(progress_only=True, pages_total=total, pages_done=done,
+                     percent=round(done * 100 / total, 1) if total else 100.0)
+        # 每一步之后让出 CPU 和磁盘
+        if self.step_sleep:
+            time.sleep(self.step_sleep)
+
+    def _run(self):
+        started = time.perf_counter()
+        name = f"{BACKUP_PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
+        final_path = os.path.join(self.directory, name)
+        part_path = final_path + '.part'
+        src = dst = None
+        try:
+            src = sqlite3.connect(self.database, isolation_level=None, check_same_thread=False)
+            src.execute('PRAGMA busy_timeout = 5000')
+            # 读事务贯穿整个备份：快照固定，期间其他连接的写入不会让备份重来
+            src.execute('BEGIN')
+            src.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+            dst = sqlite3.connect(part_path)
+            src.backup(dst, pages=self.pages_per_step, progress=self._progress)
+            dst.close()
+            dst = None
+            src.execute('COMMIT')
+
+            if self.compress:
+                self._update(status='compressing')
+                with open(part_path, 'rb') as f_in, gzip.open(final_path + '.gz.part', 'wb', compresslevel=6) as f_out:
+                    shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+                os.remove(part_path)
+                name += '.gz'
+                final_path += '.gz'
+                part_path = final_path + '.part'
+            os.replace(part_path, final_path)
+
+            self._update(status='completed', file=name, size=os.path.getsize(final_path), percent=100.0)
+            self._apply_retention()
+        except Exception as e:
+            print(f"Database backup failed: {e}")
+            self._update(status='failed', error=str(e))
+            for path in (part_path, final_path + '.gz.part'):
+                if os.path.exists(path):
+                    os.remove(path)
+        finally:
+            if dst is not None:
+                dst.close()
+            if src is not None:
+                src.close()
+            self._update(finished_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                         elapsed_ms=round((time.perf_counter() - started) * 1000, 1))
+            self._release_file_lock()
+
+    def status(self):
+        """最近一次备份任务的状态（任何 worker 发起的都能读到），没有时返回 None"""
+        try:
+            with open(os.path.join(self.directory, JOB_NAME), encoding='utf-8') as f:
+                job = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Error reading backup status: {e}")
+            return None
+        if job.get('status') in ('running', 'compressing') and (
+                not os.path.exists(os.path.join(self.directory, LOCK_NAME)) or not _pid_alive(job.get('pid'))):
+            # 锁已释放或进程已不在，状态却没有写完：发起备份的进程中途退出了
+            job.update(status='failed', error='Backup was interrupted')
+        return job
+
+    # ---- 定时调度 ----
+
+    def interval_days(self):
+        """系统设置 backup_interval（天），读取失败时用默认值"""
+        conn = None
+        try:
+            conn = sqlite3.connect(self.database)
+            row = conn.execute(
+                "SELECT setting_value FROM system_settings WHERE setting_key = 'backup_interval'"
+            ).fetchone()
+            return max(1, int(row[0])) if row else DEFAULT_INTERVAL_DAYS
+        except Exception as e:
+            print(f"Error reading backup_interval: {e}")
+            return DEFAULT_INTERVAL_DAYS
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def backup_due(self, now=None):
+        latest = self.latest_backup_time()
+        now = now or time.time()
+        return latest is None or now - latest >= self.interval_days() * 86400
+
+    def _schedule_loop(self):
+        while not self._stopped.wait(self.check_interval):
+            try:
+                if self.backup_due():
+                    self.start('scheduled')
+            except BackupBusyError:
+                pass
+            except Exception as e:
+                print(f"Backup scheduler error: {e}")
+
+    def ensure_scheduler(self):
+        """当前进程还没有调度线程时启动一个"""
+        self._ensure_thread('_scheduler', self._schedule_loop, 'backup-scheduler')
+
+    def stop(self):
+        """停止调度；正在进行的备份等它完成（进程退出时自动调用）"""
+        if not self._owned():
+            return
+        self._stopped.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join()
+
+
+def get_backup_manager():
+    return current_app.extensions.get('backup')
+
+
+def get_backup_summary():
+    """系统状态里的备份信息：最近一次备份时间和当前任务"""
+    manager = get_backup_manager()
+    if manager is None:
+        return 'Never', None
+    latest = manager.latest_backup_time()
+    last_backup = datetime.fromtimestamp(latest).strftime('%Y-%m-%d %H:%M:%S') if latest else 'Never'
+    return last_backup, manager.status()
+
+
+def init_app(app):
+    """创建备份管理器；BACKUP_SCHEDULE_ENABLED 为真时在处理第一个请求前启动定时备份线程"""
+    directory = os.path.join(app.root_path, app.config.get('BACKUP_DIR', 'backups'))
+    database = app.config['DATABASE']
+    if not os.path.isabs(database):
+        database = os.path.abspath(database)
+    manager = BackupManager(
+        database,
+        directory,
+        pages_per_step=app.config.get('BACKUP_PAGES_PER_STEP', 256),
+        step_sleep=app.config.get('BACKUP_STEP_SLEEP', 0.01),
+        compress=app.config.get('BACKUP_COMPRESS', False),
+        keep=app.config.get('BACKUP_KEEP', 7),
+        check_interval=app.config.get('BACKUP_CHECK_INTERVAL', 600),
+    )
+    app.extensions['backup'] = manager
+    if app.config.get('BACKUP_SCHEDULE_ENABLED', True):
+        # 不在 create_app 里启动：预加载应用再 fork 的服务器里线程只存在于父进程，
+        # 命令行（flask db ...）也用不到调度
+        @app.before_request
+        def _ensure_backup_scheduler():
+            manager.ensure_scheduler()
+    atexit.register(manager.stop)
+    return manager
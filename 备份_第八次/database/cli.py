@@ -0,0 +1,223 @@
+# database/cli.py
+import json
+
+import click
+from flask.cli import AppGroup
+
+from database.models import get_db_connection
+
+db_cli = AppGroup('db', help='数据库维护命令')
+
+
+@db_cli.command('ensure-indexes')
+def ensure_indexes_command():
+    """创建或补齐热点表的索引"""
+    from database.indexes import INDEXES, ensure_indexes
+
+    conn = get_db_connection()
+    try:
+        ensure_indexes(conn)
+        conn.commit()
+        conn.execute('PRAGMA optimize')
+    finally:
+        conn.close()
+    click.echo(f"已确认 {len(INDEXES)} 个索引")
+
+
+@db_cli.command('index-report')
+@click.option('--json', 'as_json', is_flag=True, help='以 JSON 格式输出')
+def index_report_command(as_json):
+    """对比建索引前后路由查询的执行计划（SCAN / SEARCH）"""
+    from database.indexes import explain_report, format_report
+
+    conn = get_db_connection()
+    try:
+        report = explain_report(conn)
+    finally:
+        conn.close()
+
+    if as_json:
+        click.echo(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        click.echo(format_report(report))
+
+
+@db_cli.command('migrate')
+@click.option('--target', type=int, default=None, help='只迁移到指定版本')
+def migrate_command(target):
+    """执行所有待执行的数据库迁移"""
+    from database.migrations import apply_migrations, current_version
+
+    conn = get_db_connection()
+    try:
+        applied = apply_migrations(conn, target=target)
+        version = current_version(conn)
+    finally:
+        conn.close()
+
+    if applied:
+        click.echo(f"已执行 {len(applied)} 个迁移，当前版本 {version}")
+    else:
+        click.echo(f"数据库已是最新版本 {version}")
+
+
+@db_cli.command('status')
+def status_command():
+    """查看数据库迁移版本和待执行的迁移"""
+    from database.migrations import current_version, latest_version, pending_migrations
+
+    conn = get_db_connection()
+    try:
+        version = current_version(conn)
+        pending = pending_migrations(conn)
+    finally:
+        conn.close()
+
+    click.echo(f"当前版本: {version} / 最新版本: {latest_version()}")
+    for number, name, _ in pending:
+        click.echo(f"  待执行 {number}: {name}")
+
+
+@db_cli.command('rebuild-search')
+def rebuild_search_command():
+    """重建文章、活动、课程的全文搜索索引"""
+    from database.search import rebuild_search_index
+
+    conn = get_db_connection()
+    try:
+        counts = rebuild_search_index(conn)
+        conn.commit()
+    finally:
+        conn.close()
+    click.echo('已重建搜索索引: ' + ', '.join(f"{kind} {count}" for kind, count in counts.items()))
+
+
+@db_cli.command('rebuild-wordcloud')
+def rebuild_wordcloud_command():
+    """重新统计词云的词频表"""
+    from database.wordcloud import rebuild_term_frequencies
+
+    conn = get_db_connection()
+    try:
+        terms = rebuild_term_frequencies(conn)
+        conn.commit()
+    finally:
+        conn.close()
+    click.echo(f"已重建词频表: {terms} 个词")
+
+
+@db_cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """从原表的时间列回填按小时 / 按天的活动汇总"""
+    from database.rollups import rebuild_rollups
+
+    conn = get_db_connection()
+    try:
+        totals = rebuild_rollups(conn)
+        conn.commit()
+    finally:
+        conn.close()
+    for metric, count in totals.items():
+        click.echo(f"  {metric}: {count}")
+    click.echo("已重建活动汇总")
+
+
+@db_cli.command('verify-course-stats')
+@click.option('--fix', is_flag=True, help='发现偏差时从 course_enrollments 重建')
+def verify_course_stats_command(fix):
+    """从头重新计算课程统计，与 course_stats 表对比"""
+    from database.course_stats import rebuild_course_stats, verify_course_stats
+
+    conn = get_db_connection()
+    try:
+        drift = verify_course_stats(conn)
+        for item in drift:
+            details = ', '.join(f"{column} {values['stored']} != {values['expected']}"
+                                for column, values in item['columns'].items())
+            click.echo(f"  课程 {item['course_id']}: {details}")
+        if drift and fix:
+            courses = rebuild_course_stats(conn)
+            conn.commit()
+            click.echo(f"已重建 {courses} 门课程的统计")
+    finally:
+        conn.close()
+
+    if not drift:
+        click.echo("课程统计与选课记录一致")
+    elif not fix:
+        raise click.ClickException(f"{len(drift)} 门课程的统计有偏差，使用 --fix 重建")
+
+
+@db_cli.command('password-report')
+def password_report_command():
+    """统计各密码格式（bcrypt 各 cost / PBKDF2 / 明文）的账号数"""
+    from flask import current_app
+    from utils.passwords import password_format_report
+
+    rounds = current_app.config.get('BCRYPT_ROUNDS', 12)
+    conn = get_db_connection()
+    try:
+        formats, outdated = password_format_report(conn, rounds)
+    finally:
+        conn.close()
+    for label, count in sorted(formats.items()):
+        click.echo(f"  {label}: {count}")
+    click.echo(f"目标 bcrypt cost {rounds}，{outdated} 个账号将在下次登录时升级")
+
+
+@db_cli.command('calibrate-password-cost')
+@click.option('--budget-ms', type=float, default=250, show_default=True, help='单次哈希允许的耗时（毫秒）')
+def calibrate_password_cost_command(budget_ms):
+    """测量本机各 bcrypt cost 的耗时，给出不超过预算的最大 cost"""
+    from utils.passwords import calibrate_rounds
+
+    timings, recommended = calibrate_rounds(budget_ms)
+    for rounds, elapsed in timings:
+        click.echo(f"  cost {rounds}: {elapsed:.1f} ms")
+    click.echo(f"建议设置 BCRYPT_ROUNDS={recommended}（单次哈希不超过 {budget_ms:g} ms）")
+
+
+@db_cli.command('backup')
+def backup_command():
+    """立即在线备份数据库到 BACKUP_DIR（与网页上的备份相同）"""
+    from database.backup import BackupBusyError, get_backup_manager
+
+    try:
+        job = get_backup_manager().run('cli')
+    except BackupBusyError as e:
+        raise click.ClickException(str(e))
+    if job['status'] != 'completed':
+        raise click.ClickException(f"备份失败: {job['error']}")
+    click.echo(f"已备份到 {job['file']}（{job['size']} 字节，{job['pages_total']} 页，{job['elapsed_ms']} ms）")
+
+
+@db_cli.command('generate')
+@click.argument('output')
+@click.option('--scale', type=click.Choice(['tiny', 'small', 'medium', 'large']), default='small',
+              show_default=True, help='数据规模预设')
+@click.option('--seed', type=int, default=42, show_default=True, help='随机种子')
+@click.option('--users', type=int, help='覆盖用户数')
+@click.option('--courses', type=int, help='覆盖课程数')
+@click.option('--enrollments', type=int, help='覆盖选课记录数')
+@click.option('--events', type=int, help='覆盖活动数')
+@click.option('--participants', 'event_participants', type=int, help='覆盖活动报名数')
+@click.option('--articles', type=int, help='覆盖文章数')
+@click.option('--members', type=int, help='覆盖成员数')
+@click.option('--logs', 'security_logs', type=int, help='覆盖安全日志数')
+@click.option('--force', is_flag=True, help='输出文件已存在时覆盖')
+def generate_command(output, scale, seed, force, **overrides):
+    """生成压测/基准测试用的数据库 OUTPUT"""
+    import os
+    from flask import current_app
+    from database.connection import resolve_pragmas
+    from database.generate_data import generate_database
+
+    if os.path.exists(output):
+        if not force:
+            raise click.ClickException(f"{output} 已存在，使用 --force 覆盖")
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(output + suffix):
+                os.remove(output + suffix)
+
+    generate_database(output, scale=scale, seed=seed, overrides=overrides,
+                      pragmas=resolve_pragmas(current_app.config), echo=click.echo)
@@ -0,0 +1,259 @@
+# database/connection.py
+import os
+import queue
+import sqlite3
+import threading
+
+from flask import current_app, g, has_request_context
+
+from database.instrumentation import InstrumentedCursor
+
+# 按顺序执行：busy_timeout 要先设置，切换 journal_mode 时才会等待锁
+PRAGMA_ORDER = ('busy_timeout', 'journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store')
+
+
+def resolve_pragmas(config):
+    """根据配置中的预设方案和覆盖项得到最终的 PRAGMA 设置"""
+    profile = config.get('SQLITE_PROFILE', 'throughput')
+    presets = config.get('SQLITE_PRAGMA_PRESETS', {})
+    if profile not in presets:
+        raise ValueError(f"未知的 SQLite 配置方案: {profile}（可选: {', '.join(presets)}）")
+
+    pragmas = dict(presets[profile])
+    pragmas.update(config.get('SQLITE_PRAGMAS') or {})
+    return pragmas
+
+
+def apply_pragmas(conn, pragmas):
+    """在连接上执行 PRAGMA 设置"""
+    for name in PRAGMA_ORDER:
+        if name not in pragmas:
+            continue
+        value = pragmas[name]
+        if not str(value).lstrip('-').isalnum():
+            raise ValueError(f"非法的 PRAGMA 值: {name}={value}")
+        conn.execute(f"PRAGMA {name} = {value}").fetchall()
+
+
+def read_pragmas(conn):
+    """读取连接上实际生效的 PRAGMA 值"""
+    return {name: conn.execute(f"PRAGMA {name}").fetchone()[0] for name in PRAGMA_ORDER}
+
+
+class PooledConnection(sqlite3.Connection):
+    """连接池中的连接 - 请求内调用 close() 不会真正关闭
+
+    设置了 query_stats 时，所有语句都经过 InstrumentedCursor 计时。
+    """
+
+    pooled = False
+    query_stats = None
+
+    def cursor(self, factory=None):
+        if factory is None:
+            factory = InstrumentedCursor if self.query_stats is not None else sqlite3.Cursor
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        # 基类的 execute 在 C 层直接执行，绕过游标的 execute，这里改为走游标
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def close(self):
+        # 池化连接在请求结束时由 teardown 统一归还，路由里的 close() 直接忽略
+        if not self.pooled:
+            super().close()
+
+    def really_close(self):
+        """真正关闭底层连接"""
+        sqlite3.Connection.close(self)
+
+
+class ConnectionPool:
+    """每个进程一个的有界 SQLite 连接池"""
+
+    def __init__(self, database, max_size=5, timeout=10.0, pragmas=None, query_stats=None):
+        self.database = database
+        self.pragmas = pragmas or {}
+        self.query_stats = query_stats
+        self.max_size = max_size
+        self.timeout = timeout
+        # 新连接建立后依次调用的钩子，例如统计 SQL 语句数
+        self.connect_hooks = []
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # fork 之后子进程不能复用父进程的连接，重新建立空池
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._size = 0
+        self._in_use = 0
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'leaks': 0,
+            'created': 0,
+        }
+
+    def _connect(self):
+        conn = sqlite3.connect(self.database, factory=PooledConnection, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        apply_pragmas(conn, self.pragmas)
+        conn.query_stats = self.query_stats
+        for hook in self.connect_hooks:
+            hook(conn)
+        conn.pooled = True
+        return conn
+
+    def acquire(self):
+        """从池中取出一个连接，池满时最多等待 timeout 秒"""
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            self._stats['checkouts'] += 1
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = None
+                if self._size < self.max_size:
+                    self._size += 1
+                    self._stats['created'] += 1
+                    create = True
+                else:
+                    self._stats['waits'] += 1
+                    create = False
+            if conn is not None:
+                self._in_use += 1
+                return conn
+
+        if create:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._lock:
+                    self._size -= 1
+                raise
+        else:
+            try:
+                conn = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                with self._lock:
+                    self._stats['timeouts'] += 1
+                raise sqlite3.OperationalError('数据库连接池已耗尽，请稍后重试')
+
+        with self._lock:
+            self._in_use += 1
+        return conn
+
+    def release(self, conn):
+        """归还连接，未提交的事务会被回滚并记为泄漏"""
+        if conn.in_transaction:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                pass
+            with self._lock:
+                self._stats['leaks'] += 1
+
+        with self._lock:
+            if self._pid != os.getpid():
+                # 父进程的连接，直接丢弃
+                return
+            self._in_use -= 1
+        self._idle.put(conn)
+
+    def close_all(self):
+        """关闭所有空闲连接"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.really_close()
+            with self._lock:
+                self._size -= 1
+
+    def stats(self):
+        """连接池统计信息"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                'max_size': self.max_size,
+                'size': self._size,
+                'in_use': self._in_use,
+                'idle': self._idle.qsize(),
+            })
+        return stats
+
+
+def open_connection(database, pragmas=None, query_stats=None):
+    """打开一个不经过连接池的连接（脚本、迁移、初始化使用），调用方负责关闭"""
+    conn = sqlite3.connect(database, factory=PooledConnection)
+    conn.row_factory = sqlite3.Row
+    apply_pragmas(conn, pragmas or {})
+    conn.query_stats = query_stats
+    return conn
+
+
+def get_connection():
+    """获取数据库连接 - 请求内复用同一个池化连接"""
+    pool = current_app.extensions.get('db_pool')
+    if pool is None or not has_request_context():
+        # 脚本、初始化等请求外场景使用普通连接，调用方负责关闭
+        return open_connection(current_app.config['DATABASE'], resolve_pragmas(current_app.config),
+                               current_app.extensions.get('query_stats'))
+
+    if 'db_conn' not in g:
+        g.db_conn = pool.acquire()
+    return g.db_conn
+
+
+def close_db_connection(exception=None):
+    """把当前请求的连接归还连接池（teardown 时一定会调用，也可以提前调用）"""
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        current_app.extensions['db_pool'].release(conn)
+
+
+def get_pool_stats():
+    """获取当前进程连接池的统计信息"""
+    pool = current_app.extensions.get('db_pool')
+    if pool is None:
+        return {}
+    return pool.stats()
+
+
+def init_app(app):
+    """为应用创建连接池并注册 teardown"""
+    query_stats = None
+    if app.config.get('SQL_INSTRUMENTATION', True):
+        from database.instrumentation import init_app as init_instrumentation
+        query_stats = init_instrumentation(app)
+
+    app.extensions['db_pool'] = ConnectionPool(
+        app.config['DATABASE'],
+        max_size=app.config.get('DB_POOL_SIZE', 5),
+        timeout=app.config.get('DB_POOL_TIMEOUT', 10.0),
+        pragmas=resolve_pragmas(app.config),
+        query_stats=query_stats,
+    )
+    app.teardown_appcontext(close_db_connection)
+
+
+def report_pragmas(app):
+    """启动时打印实际生效的 SQLite 配置"""
+    conn = open_connection(app.config['DATABASE'], resolve_pragmas(app.config))
+    try:
+        active = read_pragmas(conn)
+    finally:
+        conn.close()
+    settings = ', '.join(f"{name}={value}" for name, value in active.items())
+    print(f"SQLite profile '{app.config.get('SQLITE_PROFILE')}': {settings}")
+    return active
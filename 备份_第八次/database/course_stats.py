@@ -0,0 +1,123 @@
+# database/course_stats.py
+"""按课程物化的选课统计
+
+course_stats 每门课一行，由 course_enrollments 上的触发器按增量维护：
+选课人数、完成人数、成绩总和与有成绩人数（平均分 = score_sum / score_count），
+以及优秀(>=90) / 良好(60-90) / 不及格(<60) 三个分数段的人数。
+"""
+
+# 统计列，顺序与 AGGREGATE_SQL 的输出一致
+COLUMNS = (
+    'total_students', 'completed_students', 'score_sum', 'score_count',
+    'excellent_students', 'good_students', 'failing_students',
+)
+
+# 从 course_enrollments 重新计算，用于重建和校验
+AGGREGATE_SQL = '''
+    SELECT course_id,
+           COUNT(student_id),
+           COUNT(CASE WHEN status = 'completed' THEN 1 END),
+           COALESCE(SUM(score), 0),
+           COUNT(score),
+           COUNT(CASE WHEN score >= 90 THEN 1 END),
+           COUNT(CASE WHEN score >= 60 AND score < 90 THEN 1 END),
+           COUNT(CASE WHEN score < 60 THEN 1 END)
+    FROM course_enrollments
+    GROUP BY course_id
+'''
+
+# 成绩总和是浮点数，校验时允许的误差
+SCORE_TOLERANCE = 1e-6
+
+
+def _deltas(row):
+    """一行选课记录对各统计列的贡献（row 为 new 或 old）"""
+    return (
+        f'{row}.student_id IS NOT NULL',
+        f"COALESCE({row}.status = 'completed', 0)",
+        f'COALESCE({row}.score, 0)',
+        f'{row}.score IS NOT NULL',
+        f'COALESCE({row}.score >= 90, 0)',
+        f'COALESCE({row}.score >= 60 AND {row}.score < 90, 0)',
+        f'COALESCE({row}.score < 60, 0)',
+    )
+
+
+def _add(row):
+    values = ', '.join(_deltas(row))
+    updates = ', '.join(f'{column} = {column} + excluded.{column}' for column in COLUMNS)
+    return f'''
+        INSERT INTO course_stats (course_id, {', '.join(COLUMNS)})
+        VALUES ({row}.course_id, {values})
+        ON CONFLICT (course_id) DO UPDATE SET {updates};'''
+
+
+def _subtract(row):
+    updates = ', '.join(f'{column} = {column} - ({delta})' for column, delta in zip(COLUMNS, _deltas(row)))
+    return f'''
+        UPDATE course_stats SET {updates} WHERE course_id = {row}.course_id;'''
+
+
+TRIGGERS = {
+    'course_enrollments_stats_insert':
+        f'AFTER INSERT ON course_enrollments BEGIN {_add("new")} END',
+    'course_enrollments_stats_delete':
+        f'AFTER DELETE ON course_enrollments BEGIN {_subtract("old")} END',
+    'course_enrollments_stats_update':
+        f'AFTER UPDATE OF course_id, student_id, score, status ON course_enrollments '
+        f'BEGIN {_subtract("old")} {_add("new")} END',
+    'courses_stats_delete':
+        'AFTER DELETE ON courses BEGIN DELETE FROM course_stats WHERE course_id = old.id; END',
+}
+
+
+def ensure_course_stats(conn):
+    """创建统计表和触发器（幂等），由调用方提交事务"""
+    conn.execute(f'''
+    CREATE TABLE IF NOT EXISTS course_stats (
+        course_id INTEGER PRIMARY KEY,
+        {', '.join(f"{column} {'REAL' if column == 'score_sum' else 'INTEGER'} NOT NULL DEFAULT 0"
+                   for column in COLUMNS)}
+    )
+    ''')
+    for name, body in TRIGGERS.items():
+        conn.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {body}')
+
+
+def drop_course_stats_triggers(conn):
+    """删除统计触发器（批量导入前使用，导入后再 rebuild）"""
+    for name in TRIGGERS:
+        conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+
+def rebuild_course_stats(conn):
+    """从 course_enrollments 重新计算全部统计，返回课程数；由调用方提交事务"""
+    ensure_course_stats(conn)
+    conn.execute('DELETE FROM course_stats')
+    cursor = conn.execute(f'''
+        INSERT INTO course_stats (course_id, {', '.join(COLUMNS)})
+        {AGGREGATE_SQL}
+    ''')
+    return cursor.rowcount
+
+
+def verify_course_stats(conn):
+    """重新计算并与 course_stats 对比，返回有偏差的课程列表"""
+    expected = {row[0]: tuple(row[1:]) for row in conn.execute(AGGREGATE_SQL)}
+    stored = {
+        row[0]: tuple(row[1:])
+        for row in conn.execute(f"SELECT course_id, {', '.join(COLUMNS)} FROM course_stats")
+    }
+
+    zero = (0,) * len(COLUMNS)
+    drift = []
+    for course_id in sorted(set(expected) | set(stored)):
+        want = expected.get(course_id, zero)
+        have = stored.get(course_id, zero)
+        differences = {}
+        for column, a, b in zip(COLUMNS, want, have):
+            if abs(a - b) > (SCORE_TOLERANCE if column == 'score_sum' else 0):
+                differences[column] = {'expected': a, 'stored': b}
+        if differences:
+            drift.append({'course_id': course_id, 'columns': differences})
+    return drift
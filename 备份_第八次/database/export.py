@@ -0,0 +1,212 @@
+# database/export.py
+"""安全日志和管理后台统计表格的流式导出（CSV / NDJSON）
+
+表格接口只返回最近 100 行，而且先把整页结果放进列表再序列化。
+导出按时间列的索引顺序读取，每次 fetchmany 一批，边读边生成 CSV 或 NDJSON 交给响应，
+内存占用和总行数无关，导出一百万行日志也不会撑爆 worker。
+
+导出使用单独打开的连接（不占连接池），WAL 模式下读的是开始时的一致快照，不阻塞写入。
+"""
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+# 每次从游标取的行数
+CHUNK_ROWS = 1000
+
+# 数据集 -> FROM 子句、时间列（过滤和排序，都有索引）、可导出的列（输出名 -> SQL 表达式）
+EXPORTS = {
+    'security_logs': {
+        'from': 'security_logs sl LEFT JOIN users u ON sl.user_id = u.id',
+        'time': 'sl.created_at',
+        'columns': {
+            'id': 'sl.id',
+            'created_at': 'sl.created_at',
+            'user_id': 'sl.user_id',
+            'username': 'u.username',
+            'action': 'sl.action',
+            'description': 'sl.description',
+            'ip_address': 'sl.ip_address',
+            'user_agent': 'sl.user_agent',
+        },
+    },
+    'users': {
+        'from': 'users',
+        'time': 'created_at',
+        'columns': {
+            'id': 'id',
+            'username': 'username',
+            'role': 'role',
+            'full_name': 'full_name',
+            'org_name': 'org_name',
+            'created_at': 'created_at',
+            'last_login': 'last_login',
+        },
+    },
+    'articles': {
+        'from': 'articles a LEFT JOIN users u ON a.author_id = u.id',
+        'time': 'a.created_at',
+        'columns': {
+            'id': 'a.id',
+            'title': 'a.title',
+            'author': 'COALESCE(u.full_name, u.username)',
+            'content_length': 'LENGTH(a.content)',
+            'created_at': 'a.created_at',
+            'updated_at': 'a.updated_at',
+        },
+    },
+    'events': {
+        'from': 'events e LEFT JOIN users u ON e.organizer_id = u.id',
+        'time': 'e.event_date',
+        'columns': {
+            'id': 'e.id',
+            'event_name': 'e.title',
+            'organizer': 'COALESCE(u.full_name, u.username)',
+            'event_date': 'e.event_date',
+            'event_time': 'e.event_time',
+            'location': 'e.location',
+            'max_participants': 'e.max_participants',
+            # 逐行计数走 (event_id, user_id) 唯一索引，不用先把整张报名表分组
+            'registered': '(SELECT COUNT(*) FROM event_participants ep WHERE ep.event_id = e.id)',
+            'status': 'e.status',
+        },
+    },
+    'courses': {
+        'from': ('courses c LEFT JOIN users u ON c.teacher_id = u.id '
+                 'LEFT JOIN course_stats cs ON c.id = cs.course_id'),
+        'time': 'c.created_at',
+        'columns': {
+            'id': 'c.id',
+            'course_name': 'c.title',
+            'teacher': 'COALESCE(u.full_name, u.username)',
+            'student_count': 'COALESCE(cs.total_students, 0)',
+            'completed_count': 'COALESCE(cs.completed_students, 0)',
+            'rating': 'ROUND(cs.score_sum / NULLIF(cs.score_count, 0), 1)',
+            'created_at': 'c.created_at',
+        },
+    },
+}
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+
+def _parse_time(value, name, end=False):
+    """解析 since / until：日期或 ISO 时间；只给日期的 until 包含当天"""
+    if not value:
+        return None
+    try:
+        if len(value) == 10:
+            day = datetime.strptime(value, '%Y-%m-%d')
+            return (day + timedelta(days=1) if end else day).strftime('%Y-%m-%d')
+        return datetime.fromisoformat(value).strftime('%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        raise ValueError(f'Invalid {name}: {value}')
+
+
+def parse_export_args(dataset, args):
+    """校验导出参数（format / columns / since / until / limit），不合法时抛出 ValueError"""
+    spec = EXPORTS[dataset]
+    fmt = args.get('format', 'csv')
+    if fmt not in FORMATS:
+        raise ValueError(f'Invalid format: {fmt}')
+
+    columns = [c for c in (args.get('columns') or '').split(',') if c] or list(spec['columns'])
+    unknown = [c for c in columns if c not in spec['columns']]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+
+    limit = args.get('limit')
+    if limit is not None:
+        if not str(limit).isdigit() or int(limit) < 1:
+            raise ValueError(f'Invalid limit: {limit}')
+        limit = int(limit)
+
+    return {
+        'format': fmt,
+        'columns': columns,
+        'since': _parse_time(args.get('since'), 'since'),
+        'until': _parse_time(args.get('until'), 'until', end=True),
+        'limit': limit,
+    }
+
+
+def build_export_query(dataset, columns, since=None, until=None, limit=None):
+    """拼出导出 SQL：since 含、until 不含，按时间列倒序（走索引，不需要排序）"""
+    spec = EXPORTS[dataset]
+    select = ', '.join(f"{spec['columns'][c]} AS {c}" for c in columns)
+    where, params = [], []
+    if since:
+        where.append(f"{spec['time']} >= ?")
+        params.append(since)
+    if until:
+        where.append(f"{spec['time']} < ?")
+        params.append(until)
+    sql = f"SELECT {select} FROM {spec['from']}"
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += f" ORDER BY {spec['time']} DESC"
+    if limit:
+        sql += f' LIMIT {int(limit)}'
+    return sql, params
+
+
+def iter_rows(conn, sql, params, chunk_rows=CHUNK_ROWS):
+    """按批从游标读取，每次产出一批行"""
+    cursor = conn.execute(sql, params)
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        if not rows:
+            break
+        yield rows
+
+
+# 以这些字符开头的单元格会被电子表格当作公式执行（User-Agent、用户名等都由外部控制）
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_cell(value):
+    # 前面加单引号让电子表格按文本显示；数字不受影响
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_csv(columns, batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in batches:
+        writer.writerows([_csv_cell(value) for value in row] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+# json.dumps 带参数时每次都新建编码器，逐行调用时复用同一个
+_encode_json = json.JSONEncoder(ensure_ascii=False, default=str).encode
+
+
+def iter_ndjson(columns, batches):
+    for rows in batches:
+        yield ''.join(_encode_json(dict(zip(columns, row))) + '\n' for row in rows)
+
+
+def stream_export(database, pragmas, dataset, options, chunk_rows=CHUNK_ROWS):
+    """在独立连接上执行导出查询，逐批产出 CSV / NDJSON 文本；结束或客户端断开时关闭连接"""
+    from database.connection import open_connection
+
+    sql, params = build_export_query(dataset, options['columns'], options['since'],
+                                      options['until'], options['limit'])
+    conn = open_connection(database, pragmas)
+    try:
+        batches = iter_rows(conn, sql, params, chunk_rows)
+        encode = iter_csv if options['format'] == 'csv' else iter_ndjson
+        yield from encode(options['columns'], batches)
+    finally:
+        conn.close()
@@ -0,0 +1,323 @@
+# database/generate_data.py
+"""生成用于压测和基准测试的大规模数据库
+
+所有数据由固定的随机种子生成，同样的参数总是得到同样的数据库。
+热门课程、活跃组织等按幂律分布倾斜，更接近真实的访问模式。
+"""
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+import bcrypt
+
+# 各规模下每张表的行数
+SCALES = {
+    'tiny': {
+        'users': 500, 'courses': 25, 'enrollments': 5_000, 'events': 100,
+        'event_participants': 2_000, 'articles': 200, 'members': 1_000, 'security_logs': 5_000,
+    },
+    'small': {
+        'users': 5_000, 'courses': 250, 'enrollments': 100_000, 'events': 1_000,
+        'event_participants': 25_000, 'articles': 2_000, 'members': 10_000, 'security_logs': 50_000,
+    },
+    'medium': {
+        'users': 20_000, 'courses': 1_000, 'enrollments': 400_000, 'events': 5_000,
+        'event_participants': 100_000, 'articles': 10_000, 'members': 40_000, 'security_logs': 200_000,
+    },
+    'large': {
+        'users': 100_000, 'courses': 5_000, 'enrollments': 2_000_000, 'events': 20_000,
+        'event_participants': 500_000, 'articles': 50_000, 'members': 200_000, 'security_logs': 1_000_000,
+    },
+}
+
+# 用户角色占比（其余为学生）
+ROLE_SHARES = {'teacher': 0.02, 'community_org': 0.01, 'platform_admin': 0.001}
+
+BATCH_SIZE = 20_000
+DEFAULT_PASSWORD = '123123'
+
+WORDS = (
+    'komodo dragon wildlife conservation habitat species island reptile education community '
+    'volunteer research ecology protection forest marine biodiversity climate survey monitoring '
+    'students teachers project field observation endangered population nesting breeding ranger '
+    'awareness workshop photography exhibition sustainable tourism indonesia national park '
+    'predator prey venom lizard eggs juvenile adult territory patrol report data analysis'
+).split()
+
+SECURITY_ACTIONS = ['用户登录', '用户退出', '文章创建', '文章编辑', '用户注册', '设置修改', 'SQL查询']
+
+
+def _skewed_weights(count, exponent=1.1):
+    """幂律分布的累积权重：排名越靠前被选中的概率越高"""
+    cumulative = []
+    total = 0.0
+    for rank in range(1, count + 1):
+        total += 1.0 / (rank ** exponent)
+        cumulative.append(total)
+    return cumulative
+
+
+def _timestamp(moment):
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _text(rng, min_words, max_words):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words)))
+
+
+def _batched(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert(conn, sql, rows):
+    """分批 executemany，整张表在一个事务里提交"""
+    count = 0
+    cursor = conn.cursor()
+    conn.execute('BEGIN')
+    for batch in _batched(rows):
+        cursor.executemany(sql, batch)
+        count += len(batch)
+    conn.commit()
+    return count
+
+
+def _users(rng, count, password_hash, now):
+    for i in range(1, count + 1):
+        draw = rng.random()
+        # 第一个用户固定为管理员，小规模数据库里也至少有一个
+        if i == 1 or draw < ROLE_SHARES['platform_admin']:
+            role, prefix = 'platform_admin', 'admin'
+        elif draw < ROLE_SHARES['platform_admin'] + ROLE_SHARES['community_org']:
+            role, prefix = 'community_org', 'org'
+        elif draw < ROLE_SHARES['platform_admin'] + ROLE_SHARES['community_org'] + ROLE_SHARES['teacher']:
+            role, prefix = 'teacher', 'teacher'
+        else:
+            role, prefix = 'student', 'student'
+
+        username = f'{prefix}{i}@bench.komodohub.edu'
+        created_at = now - timedelta(days=rng.uniform(0, 730))
+        last_login = None
+        if rng.random() < 0.7:
+            last_login = _timestamp(created_at + (now - created_at) * rng.random())
+        yield (
+            username, password_hash, role, f'{prefix.title()} {i}', _timestamp(created_at), last_login,
+            f'T{i}' if role == 'teacher' else None,
+            f'S{i}' if role == 'student' else None,
+            f'Grade {rng.randint(1, 6)}' if role == 'student' else None,
+            f'Organization {i}' if role == 'community_org' else None,
+            username,
+        )
+
+
+def generate_database(db_path, scale='small', seed=42, overrides=None, pragmas=None, echo=print):
+    """生成一个新的基准测试数据库，返回每张表写入的行数"""
+    from database.connection import open_connection
+    from database.course_stats import drop_course_stats_triggers, rebuild_course_stats
+    from database.indexes import INDEXES, ensure_indexes
+    from database.migrations import apply_migrations
+    from database.rollups import drop_rollup_triggers, rebuild_rollups
+    from database.search import drop_search_triggers, rebuild_search_index
+    from database.table_versions import bump_versions, drop_version_triggers, ensure_table_versions
+    from database.wordcloud import drop_term_triggers, rebuild_term_frequencies
+
+    counts = dict(SCALES[scale])
+    counts.update({key: value for key, value in (overrides or {}).items() if value is not None})
+
+    if os.path.exists(db_path):
+        raise FileExistsError(f'数据库文件已存在: {db_path}')
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+
+    rng = random.Random(seed)
+    now = datetime(2025, 1, 1)
+    started = time.perf_counter()
+    written = {}
+
+    conn = open_connection(db_path, pragmas)
+    conn.row_factory = None
+    try:
+        apply_migrations(conn)
+
+        # 导入期间不需要崩溃保护；索引在数据写完后一次性建立，比逐行维护快得多
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+        for name, _ in INDEXES:
+            conn.execute(f'DROP INDEX IF EXISTS {name}')
+        # 全文索引同理：先去掉同步触发器，导入完成后整体重建
+        drop_search_triggers(conn)
+        drop_term_triggers(conn)
+        drop_course_stats_triggers(conn)
+        drop_version_triggers(conn)
+        drop_rollup_triggers(conn)
+
+        def step(table, sql, rows):
+            t0 = time.perf_counter()
+            written[table] = _insert(conn, sql, rows)
+            echo(f'{table}: {written[table]:,} rows in {time.perf_counter() - t0:.1f}s')
+
+        # 密码只哈希一次，所有用户共用同一个哈希
+        password_hash = bcrypt.hashpw(DEFAULT_PASSWORD.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+        step('users', '''
+            INSERT INTO users (username, password, role, full_name, created_at, last_login,
+                               teacher_id, student_id, grade, org_name, email)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', _users(rng, counts['users'], password_hash, now))
+
+        ids_by_role = {}
+        for user_id, role in conn.execute('SELECT id, role FROM users'):
+            ids_by_role.setdefault(role, []).append(user_id)
+        teachers = ids_by_role.get('teacher') or [1]
+        students = ids_by_role.get('student') or [1]
+        orgs = ids_by_role.get('community_org') or [1]
+        all_users = [user_id for ids in ids_by_role.values() for user_id in ids]
+
+        teacher_weights = _skewed_weights(len(teachers), 0.8)
+        step('courses', 'INSERT INTO courses (teacher_id, title, description, created_at) VALUES (?, ?, ?, ?)', (
+            (rng.choices(teachers, cum_weights=teacher_weights)[0],
+             f'Course {i}: {_text(rng, 2, 5).title()}', _text(rng, 10, 40),
+             _timestamp(now - timedelta(days=rng.uniform(0, 730))))
+            for i in range(1, counts['courses'] + 1)
+        ))
+
+        course_ids = [row[0] for row in conn.execute('SELECT id FROM courses')]
+        rng.shuffle(course_ids)
+        course_weights = _skewed_weights(len(course_ids))
+
+        def enrollments():
+            per_student = max(1, counts['enrollments'] // len(students))
+            remaining = counts['enrollments']
+            for student_id in students:
+                if remaining <= 0:
+                    break
+                wanted = min(remaining, len(course_ids), max(1, int(rng.expovariate(1 / per_student))))
+                chosen = set()
+                while len(chosen) < wanted:
+                    chosen.update(rng.choices(course_ids, cum_weights=course_weights, k=wanted - len(chosen)))
+                remaining -= len(chosen)
+                for course_id in chosen:
+                    enrolled_at = now - timedelta(days=rng.uniform(0, 365))
+                    if rng.random() < 0.4:
+                        yield (course_id, student_id, _timestamp(enrolled_at), round(rng.uniform(40, 100), 2),
+                               'completed', _timestamp(enrolled_at + timedelta(days=rng.uniform(1, 60))))
+                    else:
+                        score = round(rng.uniform(40, 100), 2) if rng.random() < 0.3 else None
+                        yield (course_id, student_id, _timestamp(enrolled_at), score, 'enrolled', None)
+
+        step('course_enrollments', '''
+            INSERT OR IGNORE INTO course_enrollments
+                (course_id, student_id, enrollment_date, score, status, completed_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', enrollments())
+
+        org_weights = _skewed_weights(len(orgs))
+
+        def events():
+            for i in range(1, counts['events'] + 1):
+                event_date = now + timedelta(days=rng.uniform(-180, 180))
+                yield (f'Event {i}: {_text(rng, 2, 5).title()}', _text(rng, 10, 60),
+                       rng.choices(orgs, cum_weights=org_weights)[0], event_date.strftime('%Y-%m-%d'),
+                       f'{rng.randint(8, 20):02d}:00', f'Location {rng.randint(1, 500)}', rng.choice([20, 50, 100, 200]),
+                       _timestamp(event_date - timedelta(days=rng.uniform(7, 60))),
+                       'upcoming' if event_date > now else 'completed')
+
+        step('events', '''
+            INSERT INTO events (title, description, organizer_id, event_date, event_time, location,
+                                max_participants, created_at, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', events())
+
+        event_ids = [row[0] for row in conn.execute('SELECT id FROM events')]
+        rng.shuffle(event_ids)
+        event_weights = _skewed_weights(len(event_ids))
+
+        def participants():
+            seen = set()
+            target = min(counts['event_participants'], len(event_ids) * len(all_users))
+            while len(seen) < target:
+                pair = (rng.choices(event_ids, cum_weights=event_weights)[0], rng.choice(all_users))
+                if pair in seen:
+                    continue
+                seen.add(pair)
+                yield pair + (_timestamp(now - timedelta(days=rng.uniform(0, 180))),)
+
+        step('event_participants',
+             'INSERT INTO event_participants (event_id, user_id, participation_date) VALUES (?, ?, ?)',
+             participants())
+
+        authors = teachers + orgs
+        step('articles', 'INSERT INTO articles (title, author_id, content, created_at) VALUES (?, ?, ?, ?)', (
+            (_text(rng, 3, 8).title(), rng.choice(authors), _text(rng, 20, 400),
+             _timestamp(now - timedelta(days=rng.uniform(0, 730))))
+            for _ in range(counts['articles'])
+        ))
+
+        step('members', '''
+            INSERT INTO members (org_id, name, email, role, join_date, status, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            (rng.choices(orgs, cum_weights=org_weights)[0], f'Member {i}', f'member{i}@example.com',
+             rng.choices(['member', 'moderator', 'admin'], weights=[90, 8, 2])[0],
+             (now - timedelta(days=rng.uniform(0, 730))).strftime('%Y-%m-%d'),
+             rng.choices(['active', 'inactive', 'pending'], weights=[80, 15, 5])[0],
+             _timestamp(now - timedelta(days=rng.uniform(0, 730))))
+            for i in range(1, counts['members'] + 1)
+        ))
+
+        step('security_logs', '''
+            INSERT INTO security_logs (user_id, action, description, ip_address, user_agent, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (
+            (rng.choice(all_users), rng.choice(SECURITY_ACTIONS), 'benchmark event',
+             f'10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}', 'Mozilla/5.0 (bench)',
+             _timestamp(now - timedelta(seconds=rng.uniform(0, 90 * 86400))))
+            for _ in range(counts['security_logs'])
+        ))
+
+        t0 = time.perf_counter()
+        ensure_indexes(conn)
+        conn.commit()
+        conn.execute('ANALYZE')
+        conn.commit()
+        echo(f'indexes: {time.perf_counter() - t0:.1f}s')
+
+        t0 = time.perf_counter()
+        rebuild_search_index(conn)
+        conn.commit()
+        echo(f'search index: {time.perf_counter() - t0:.1f}s')
+
+        t0 = time.perf_counter()
+        rebuild_term_frequencies(conn)
+        conn.commit()
+        echo(f'term frequencies: {time.perf_counter() - t0:.1f}s')
+
+        t0 = time.perf_counter()
+        rebuild_course_stats(conn)
+        conn.commit()
+        echo(f'course stats: {time.perf_counter() - t0:.1f}s')
+
+        t0 = time.perf_counter()
+        rebuild_rollups(conn)
+        conn.commit()
+        echo(f'activity rollups: {time.perf_counter() - t0:.1f}s')
+
+        ensure_table_versions(conn)
+        bump_versions(conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+    # 恢复正常的日志模式（WAL 等）
+    conn = open_connection(db_path, pragmas)
+    conn.close()
+
+    size_mb = os.path.getsize(db_path) / 1024 / 1024
+    echo(f'done: {db_path} ({size_mb:.1f} MB) in {time.perf_counter() - started:.1f}s')
+    return written
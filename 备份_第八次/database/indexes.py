@@ -0,0 +1,181 @@
+# database/indexes.py
+"""热点表的二级索引，以及路由查询的执行计划报告"""
+
+# (索引名, 建索引语句) - 全部使用 IF NOT EXISTS，已有数据库上重复执行也没问题
+INDEXES = [
+    # 学生仪表板：按学生查已选课程并按选课时间排序（覆盖索引，不需要回表）
+    ('idx_course_enrollments_student',
+     'CREATE INDEX IF NOT EXISTS idx_course_enrollments_student '
+     'ON course_enrollments (student_id, enrollment_date, course_id, status, score)'),
+    # 课程统计：按课程聚合人数、完成数和平均分（覆盖索引）
+    ('idx_course_enrollments_course_stats',
+     'CREATE INDEX IF NOT EXISTS idx_course_enrollments_course_stats '
+     'ON course_enrollments (course_id, status, score, student_id)'),
+    # 教师的课程列表
+    ('idx_courses_teacher',
+     'CREATE INDEX IF NOT EXISTS idx_courses_teacher ON courses (teacher_id, created_at)'),
+    ('idx_courses_created',
+     'CREATE INDEX IF NOT EXISTS idx_courses_created ON courses (created_at)'),
+    ('idx_course_contents_course',
+     'CREATE INDEX IF NOT EXISTS idx_course_contents_course ON course_contents (course_id, order_index)'),
+    # 社区组织自己的活动、全部活动按日期排序
+    ('idx_events_organizer',
+     'CREATE INDEX IF NOT EXISTS idx_events_organizer ON events (organizer_id, event_date, event_time)'),
+    ('idx_events_date',
+     'CREATE INDEX IF NOT EXISTS idx_events_date ON events (event_date, event_time)'),
+    # 部分索引：只收录即将举行的活动
+    ('idx_events_upcoming',
+     "CREATE INDEX IF NOT EXISTS idx_events_upcoming ON events (event_date, event_time) "
+     "WHERE status = 'upcoming'"),
+    # 成员管理：按组织列出成员、按状态计数
+    ('idx_members_org_created',
+     'CREATE INDEX IF NOT EXISTS idx_members_org_created ON members (org_id, created_at)'),
+    ('idx_members_org_status',
+     'CREATE INDEX IF NOT EXISTS idx_members_org_status ON members (org_id, status, role)'),
+    # 部分索引：只收录活跃成员
+    ('idx_members_active',
+     "CREATE INDEX IF NOT EXISTS idx_members_active ON members (org_id) WHERE status = 'active'"),
+    ('idx_member_groups_org',
+     'CREATE INDEX IF NOT EXISTS idx_member_groups_org ON member_groups (org_id, name)'),
+    # 文章按发布时间倒序
+    ('idx_articles_created',
+     'CREATE INDEX IF NOT EXISTS idx_articles_created ON articles (created_at, id)'),
+    ('idx_articles_author',
+     'CREATE INDEX IF NOT EXISTS idx_articles_author ON articles (author_id)'),
+    # 安全日志按时间倒序
+    ('idx_security_logs_created',
+     'CREATE INDEX IF NOT EXISTS idx_security_logs_created ON security_logs (created_at)'),
+    # 用户按角色统计、按注册时间排序
+    ('idx_users_role',
+     'CREATE INDEX IF NOT EXISTS idx_users_role ON users (role)'),
+    ('idx_users_created',
+     'CREATE INDEX IF NOT EXISTS idx_users_created ON users (created_at)'),
+]
+
+# event_participants 的 UNIQUE(event_id, user_id) 自带以 event_id 开头的自动索引，不需要再建
+
+# 路由中的热点查询，用于生成执行计划报告 (路由, SQL, 参数)
+ROUTE_QUERIES = [
+    ('student.dashboard - enrolled courses', '''
+        SELECT c.id, c.title, c.description, ce.score, ce.status, ce.enrollment_date, u.full_name
+        FROM courses c
+        JOIN course_enrollments ce ON c.id = ce.course_id
+        JOIN users u ON c.teacher_id = u.id
+        WHERE ce.student_id = ?
+        ORDER BY ce.enrollment_date DESC
+    ''', (1,)),
+    ('teacher.dashboard - course stats', '''
+        SELECT c.id, c.title, cs.total_students, cs.completed_students,
+               cs.score_sum / NULLIF(cs.score_count, 0)
+        FROM courses c
+        LEFT JOIN course_stats cs ON c.id = cs.course_id
+        WHERE c.teacher_id = ?
+        ORDER BY c.created_at DESC
+    ''', (1,)),
+    ('teacher.dashboard - course count', 'SELECT COUNT(*) FROM courses WHERE teacher_id = ?', (1,)),
+    ('community.dashboard - events', '''
+        SELECT e.*, COUNT(ep.id) as participant_count
+        FROM events e
+        LEFT JOIN event_participants ep ON e.id = ep.event_id
+        WHERE e.organizer_id = ?
+        GROUP BY e.id
+        ORDER BY e.event_date, e.event_time
+    ''', (1,)),
+    ('community.dashboard - event count', 'SELECT COUNT(*) FROM events WHERE organizer_id = ?', (1,)),
+    ('community.dashboard - member count', 'SELECT COUNT(*) FROM members WHERE org_id = ?', (1,)),
+    ('community.manage_members - members', '''
+        SELECT m.* FROM members m WHERE m.org_id = ? ORDER BY m.created_at DESC
+    ''', (1,)),
+    ('community.manage_members - active count',
+     "SELECT COUNT(*) FROM members WHERE org_id = ? AND status = 'active'", (1,)),
+    ('community.manage_members - groups',
+     'SELECT * FROM member_groups WHERE org_id = ? ORDER BY name', (1,)),
+    ('get_articles_page', '''
+        SELECT a.id, a.title, substr(a.content, 1, 101), a.created_at, u.full_name
+        FROM articles a
+        LEFT JOIN users u ON a.author_id = u.id
+        WHERE (a.created_at, a.id) < (?, ?)
+        ORDER BY a.created_at DESC, a.id DESC
+        LIMIT ?
+    ''', ('9999-12-31', 0, 11)),
+    ('admin.security_logs', '''
+        SELECT sl.*, u.username
+        FROM security_logs sl
+        LEFT JOIN users u ON sl.user_id = u.id
+        ORDER BY sl.created_at DESC
+        LIMIT 100
+    ''', ()),
+    ('admin.users_table', 'SELECT * FROM users ORDER BY created_at DESC LIMIT 100', ()),
+    ('admin.analytics - role count', "SELECT COUNT(*) FROM users WHERE role = 'student'", ()),
+    ('admin.events_table - participants', '''
+        SELECT event_id, COUNT(*) FROM event_participants GROUP BY event_id
+    ''', ()),
+]
+
+
+def ensure_indexes(conn):
+    """创建所有索引（幂等），由调用方提交事务"""
+    cursor = conn.cursor()
+    for name, ddl in INDEXES:
+        cursor.execute(ddl)
+
+
+def _query_plan(conn, sql, params):
+    rows = conn.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()
+    return [row[3] for row in rows]
+
+
+def _plan_kind(plan):
+    """把执行计划归类：SCAN 全表扫描 / INDEX SCAN 按索引顺序扫描 / SEARCH 索引查找"""
+    kind = 'SEARCH'
+    for step in plan:
+        if not step.startswith('SCAN ') or step.startswith(('SCAN CONSTANT', 'SCAN (')):
+            continue
+        if 'INDEX' not in step:
+            return 'SCAN'
+        kind = 'INDEX SCAN'
+    return kind
+
+
+def explain_report(conn):
+    """对比建索引前后每个路由查询的执行计划
+
+    在一个事务里临时删除索引取得“之前”的计划，然后回滚，不会改动数据库。
+    """
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    managed = [name for name, _ in INDEXES if name in existing]
+
+    conn.commit()
+    conn.execute('BEGIN')
+    try:
+        for name in managed:
+            conn.execute(f'DROP INDEX {name}')
+        before = {label: _query_plan(conn, sql, params) for label, sql, params in ROUTE_QUERIES}
+    finally:
+        conn.rollback()
+
+    after = {label: _query_plan(conn, sql, params) for label, sql, params in ROUTE_QUERIES}
+
+    report = []
+    for label, _, _ in ROUTE_QUERIES:
+        report.append({
+            'route': label,
+            'before': _plan_kind(before[label]),
+            'after': _plan_kind(after[label]),
+            'before_plan': before[label],
+            'after_plan': after[label],
+        })
+    return report
+
+
+def format_report(report):
+    """把执行计划报告格式化成文本"""
+    lines = []
+    for item in report:
+        marker = '->' if item['before'] != item['after'] else '=='
+        lines.append(f"{item['route']}: {item['before']} {marker} {item['after']}")
+        for step in item['after_plan']:
+            lines.append(f"    {step}")
+    switched = sum(1 for item in report if item['before'] == 'SCAN' and item['after'] != 'SCAN')
+    lines.append(f"{switched}/{len(report)} queries no longer do a full table scan")
+    return '\n'.join(lines)
@@ -1,213 +1,24 @@
 # database/init_database.py
-import sqlite3
 import os
+import sys
 import bcrypt
 import random
 from datetime import datetime, timedelta
 
 
-def init_database():
+def init_database(db_path='database/komodo_hub.db', pragmas=None):
+    from database.connection import open_connection
+
     # Ensure database directory exists
-    os.makedirs('database', exist_ok=True)
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
 
-    # Connect to unified database
-    conn = sqlite3.connect('database/komodo_hub.db')
+    # Connect to unified database and apply the configured SQLite profile
+    conn = open_connection(db_path, pragmas)
     cursor = conn.cursor()
 
-    # Create unified users table - 添加 last_login 列
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT NOT NULL UNIQUE,
-        password TEXT NOT NULL,
-        role TEXT NOT NULL,
-        full_name TEXT NOT NULL,
-        avatar TEXT DEFAULT 'https://res.cloudinary.com/dgbl5ql1v/image/upload/v1761285688/u_2689977510_2663943077_fm_253_fmt_auto_app_120_f_JPEG_o2yr5a.webp',
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        last_login TIMESTAMP,  -- 添加 last_login 列
-        -- Teacher specific fields
-        teacher_id TEXT UNIQUE,
-        department TEXT,
-        -- Student specific fields
-        student_id TEXT UNIQUE,
-        grade TEXT,
-        -- Community organization specific fields
-        org_name TEXT,
-        contact_person TEXT,
-        email TEXT,
-        phone TEXT,
-        address TEXT,
-        description TEXT,
-        CHECK (role IN ('teacher', 'student', 'platform_admin', 'community_org'))
-    )
-    ''')
-
-    # 检查并添加 last_login 列（如果表已存在但缺少该列）
-    try:
-        cursor.execute("SELECT last_login FROM users LIMIT 1")
-    except sqlite3.OperationalError:
-        # 如果 last_login 列不存在，则添加它
-        cursor.execute("ALTER TABLE users ADD COLUMN last_login TIMESTAMP")
-        print("已添加 last_login 列到 users 表")
-
-    # Create articles table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS articles (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        title TEXT NOT NULL,
-        author_id INTEGER NOT NULL,
-        content TEXT NOT NULL,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (author_id) REFERENCES users (id)
-    )
-    ''')
-
-    # Create courses table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS courses (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        teacher_id INTEGER NOT NULL,
-        title TEXT NOT NULL,
-        description TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (teacher_id) REFERENCES users (id)
-    )
-    ''')
-
-    # Drop existing course_students table if exists
-    cursor.execute("DROP TABLE IF EXISTS course_students")
-
-    # Drop existing course_statistics table if exists
-    cursor.execute("DROP TABLE IF EXISTS course_statistics")
-
-    # Create new course-student association table with scores and status
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS course_enrollments (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        course_id INTEGER NOT NULL,
-        student_id INTEGER NOT NULL,
-        enrollment_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        score DECIMAL(5,2),  -- Student score in this course
-        status TEXT DEFAULT 'enrolled',  -- enrolled, completed, dropped
-        completed_at TIMESTAMP,
-        FOREIGN KEY (course_id) REFERENCES courses (id),
-        FOREIGN KEY (student_id) REFERENCES users (id),
-        UNIQUE(course_id, student_id)
-    )
-    ''')
-
-    # Create course contents table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS course_contents (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        course_id INTEGER NOT NULL,
-        title TEXT NOT NULL,
-        content TEXT,
-        content_type TEXT DEFAULT 'lesson',  -- lesson, assignment, quiz, etc.
-        order_index INTEGER DEFAULT 0,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (course_id) REFERENCES courses (id)
-    )
-    ''')
-
-    # Create assignments/quiz submissions table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS submissions (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        course_content_id INTEGER NOT NULL,
-        student_id INTEGER NOT NULL,
-        submission_text TEXT,
-        submission_file TEXT,  -- Store file path
-        score DECIMAL(5,2),
-        submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        graded_at TIMESTAMP,
-        FOREIGN KEY (course_content_id) REFERENCES course_contents (id),
-        FOREIGN KEY (student_id) REFERENCES users (id)
-    )
-    ''')
-
-    # Create events table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS events (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        title TEXT NOT NULL,
-        description TEXT NOT NULL,
-        organizer_id INTEGER NOT NULL,
-        event_date DATE NOT NULL,
-        event_time TIME,
-        location TEXT,
-        max_participants INTEGER,
-        current_participants INTEGER DEFAULT 0,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        status TEXT DEFAULT 'upcoming',  -- upcoming, ongoing, completed, cancelled
-        FOREIGN KEY (organizer_id) REFERENCES users (id)
-    )
-    ''')
-
-    # Create event participants table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS event_participants (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        event_id INTEGER NOT NULL,
-        user_id INTEGER NOT NULL,
-        participation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        status TEXT DEFAULT 'registered',  -- registered, attended, cancelled
-        FOREIGN KEY (event_id) REFERENCES events (id),
-        FOREIGN KEY (user_id) REFERENCES users (id),
-        UNIQUE(event_id, user_id)
-    )
-    ''')
-
-    # Create members table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS members (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        org_id INTEGER NOT NULL,
-        name VARCHAR(100) NOT NULL,
-        email VARCHAR(100),
-        phone VARCHAR(20),
-        role VARCHAR(50) DEFAULT 'member', -- member, admin, moderator etc.
-        join_date DATE,
-        status VARCHAR(20) DEFAULT 'active', -- active, inactive, pending
-        permissions TEXT, -- JSON formatted permission settings
-        notes TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (org_id) REFERENCES users(id)
-    )
-    ''')
-
-    # Create member groups table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS member_groups (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        org_id INTEGER NOT NULL,
-        name VARCHAR(100) NOT NULL,
-        description TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (org_id) REFERENCES users(id)
-    )
-    ''')
-
-    # Create member-group relations table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS member_group_relations (
-        member_id INTEGER,
-        group_id INTEGER,
-        PRIMARY KEY (member_id, group_id),
-        FOREIGN KEY (member_id) REFERENCES members(id),
-        FOREIGN KEY (group_id) REFERENCES member_groups(id)
-    )
-    ''')
-
-    # 创建系统设置表和安全日志表
-    create_system_settings_table(conn)
-    create_security_logs_table(conn)
+    # 执行尚未执行的数据库迁移（建表、索引等）
+    from database.migrations import apply_migrations
+    apply_migrations(conn)
 
     # Check if users table is empty, only insert test data if empty
     cursor.execute("SELECT COUNT(*) as count FROM users")
@@ -434,71 +245,10 @@ def init_database():
     conn.close()
 
 
-def create_system_settings_table(conn):
-    """创建系统设置表"""
-    cursor = conn.cursor()
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS system_settings (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        setting_key TEXT UNIQUE NOT NULL,
-        setting_value TEXT,
-        description TEXT,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    ''')
-
-    # 插入默认设置
-    default_settings = [
-        ('system_theme', 'default', '系统主题'),
-        ('background_color', '#ffffff', '背景颜色'),
-        ('layout_style', 'standard', '布局样式'),
-        ('max_articles_per_page', '10', '每页文章数'),
-        ('allow_registration', 'true', '允许用户注册'),
-        ('maintenance_mode', 'false', '维护模式'),
-        ('session_timeout', '60', '会话超时时间（分钟）'),
-        ('backup_interval', '7', '自动备份间隔（天）')
-    ]
-
-    cursor.executemany('''
-    INSERT OR IGNORE INTO system_settings (setting_key, setting_value, description)
-    VALUES (?, ?, ?)
-    ''', default_settings)
-
-    conn.commit()
-
-
-def create_security_logs_table(conn):
-    """创建安全日志表"""
-    cursor = conn.cursor()
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS security_logs (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        action TEXT NOT NULL,
-        description TEXT,
-        ip_address TEXT,
-        user_agent TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users (id)
-    )
-    ''')
-
-    # 插入一些示例日志（如果表为空）
-    cursor.execute("SELECT COUNT(*) FROM security_logs")
-    if cursor.fetchone()[0] == 0:
-        sample_logs = [
-            (1, '用户登录', '管理员登录系统', '192.168.1.100', 'Mozilla/5.0...'),
-            (None, '系统启动', '应用程序启动', '127.0.0.1', 'System'),
-            (2, '用户注册', '新用户注册', '192.168.1.101', 'Mozilla/5.0...'),
-            (1, '文章创建', '创建新文章', '192.168.1.100', 'Mozilla/5.0...')
-        ]
-        cursor.executemany('''
-        INSERT INTO security_logs (user_id, action, description, ip_address, user_agent)
-        VALUES (?, ?, ?, ?, ?)
-        ''', sample_logs)
-
-    conn.commit()
-
-
 if __name__ == "__main__":
-    init_database()
\ No newline at end of file
+    # 直接运行脚本时把项目根目录加入导入路径，以便读取 config
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config import Config
+    from database.connection import resolve_pragmas
+
+    init_database(Config.DATABASE, resolve_pragmas(vars(Config)))
\ No newline at end of file
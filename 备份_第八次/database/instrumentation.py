@@ -0,0 +1,290 @@
+# database/instrumentation.py
+"""SQL 语句计时与请求级统计
+
+每条经过连接层执行的语句都会计时、计数，并归到当前请求的路由下；
+超过阈值的语句连同参数和执行计划记录到慢查询日志。
+"""
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from flask import request
+
+# 请求速率按最近多少秒统计
+RATE_WINDOW = 60
+# 按语句聚合时最多保留多少种不同的 SQL，防止动态 SQL 把内存撑大
+MAX_STATEMENTS = 500
+# 慢查询时可以取执行计划的语句
+EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+def _normalize(sql):
+    return re.sub(r'\s+', ' ', sql).strip()[:300]
+
+
+def _format_params(sql, params):
+    if params is None or params == ():
+        return None
+    if 'password' in sql.lower():
+        # 密码哈希不能出现在日志里
+        return '<redacted>'
+    text = repr(params)
+    return text if len(text) <= 300 else text[:297] + '...'
+
+
+class QueryStats:
+    """进程内的 SQL 与请求统计（线程安全）"""
+
+    def __init__(self, slow_ms=100, slow_log_size=50):
+        self.slow_ms = slow_ms
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._recent_requests = deque()
+        self.slow_queries = deque(maxlen=slow_log_size)
+        self.requests_total = 0
+        self.queries_total = 0
+        self.routes = {}
+        self.statements = {}
+
+    # ---- 请求 ----
+
+    def begin_request(self):
+        self._local.started = time.perf_counter()
+        self._local.queries = 0
+        self._local.query_ms = 0.0
+
+    def end_request(self, route):
+        started = getattr(self._local, 'started', None)
+        if started is None:
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        queries = self._local.queries
+        query_ms = self._local.query_ms
+        self._local.started = None
+
+        now = time.time()
+        with self._lock:
+            self.requests_total += 1
+            self._recent_requests.append(now)
+            while self._recent_requests and self._recent_requests[0] < now - RATE_WINDOW:
+                self._recent_requests.popleft()
+
+            item = self.routes.get(route)
+            if item is None:
+                item = self.routes[route] = {
+                    'requests': 0, 'queries': 0, 'query_ms': 0.0, 'total_ms': 0.0, 'max_queries': 0,
+                }
+            item['requests'] += 1
+            item['queries'] += queries
+            item['query_ms'] += query_ms
+            item['total_ms'] += elapsed_ms
+            item['max_queries'] = max(item['max_queries'], queries)
+
+    # ---- 语句 ----
+
+    def record(self, conn, sql, params, elapsed_ms):
+        """记录一条语句的耗时，慢语句额外取执行计划"""
+        if getattr(self._local, 'started', None) is not None:
+            self._local.queries += 1
+            self._local.query_ms += elapsed_ms
+
+        key = _normalize(sql)
+        with self._lock:
+            self.queries_total += 1
+            item = self.statements.get(key)
+            if item is None and len(self.statements) < MAX_STATEMENTS:
+                item = self.statements[key] = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+            if item is not None:
+                item['count'] += 1
+                item['total_ms'] += elapsed_ms
+                item['max_ms'] = max(item['max_ms'], elapsed_ms)
+
+        if elapsed_ms >= self.slow_ms:
+            self._log_slow(conn, sql, params, elapsed_ms)
+
+    def _log_slow(self, conn, sql, params, elapsed_ms):
+        plan = []
+        words = sql.split(None, 1)
+        if conn is not None and words and words[0].upper() in EXPLAINABLE:
+            try:
+                # 直接调用基类方法，不再被计时
+                rows = sqlite3.Connection.execute(conn, f'EXPLAIN QUERY PLAN {sql}', params or ()).fetchall()
+                plan = [row[3] for row in rows]
+            except sqlite3.Error:
+                pass
+        try:
+            route = request.endpoint or request.path
+        except RuntimeError:
+            route = None
+
+        entry = {
+            'sql': _normalize(sql),
+            'params': _format_params(sql, params),
+            'duration_ms': round(elapsed_ms, 2),
+            'route': route,
+            'plan': plan,
+            'at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        with self._lock:
+            self.slow_queries.append(entry)
+        print(f"慢查询 {entry['duration_ms']}ms [{route}]: {entry['sql'][:200]} params={entry['params']}")
+
+    # ---- 汇总 ----
+
+    def snapshot(self, top=10):
+        """当前统计的快照"""
+        now = time.time()
+        with self._lock:
+            while self._recent_requests and self._recent_requests[0] < now - RATE_WINDOW:
+                self._recent_requests.popleft()
+            window = min(RATE_WINDOW, max(now - self.started_at, 1))
+            routes = {}
+            for route, item in sorted(self.routes.items(), key=lambda pair: -pair[1]['queries']):
+                routes[route] = {
+                    'requests': item['requests'],
+                    'queries': item['queries'],
+                    'avg_queries': round(item['queries'] / item['requests'], 2),
+                    'max_queries': item['max_queries'],
+                    'avg_query_ms': round(item['query_ms'] / item['requests'], 2),
+                    'avg_ms': round(item['total_ms'] / item['requests'], 2),
+                }
+            slowest = sorted(self.statements.items(), key=lambda pair: -pair[1]['max_ms'])[:top]
+            return {
+                'uptime_seconds': int(now - self.started_at),
+                'requests_total': self.requests_total,
+                'requests_per_second': round(len(self._recent_requests) / window, 2),
+                'queries_total': self.queries_total,
+                'routes': routes,
+                'slowest_statements': [
+                    {
+                        'sql': sql,
+                        'count': item['count'],
+                        'max_ms': round(item['max_ms'], 2),
+                        'avg_ms': round(item['total_ms'] / item['count'], 2),
+                    }
+                    for sql, item in slowest
+                ],
+                'slow_queries': list(reversed(self.slow_queries)),
+                'slow_query_ms': self.slow_ms,
+            }
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """对语句计时的游标
+
+    SQLite 的 execute 只执行到第一行结果，扫描大多发生在 fetchone / fetchmany / fetchall 和迭代里，
+    所以查询的耗时是 execute 加上之后每次取结果的时间（不含调用方处理行的时间），
+    在结果取完、游标关闭、执行下一条语句或游标被回收时才记录。
+    """
+
+    # [sql, 参数, 已累计的秒数]，没有未记录的查询时为 None
+    _pending = None
+
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            sql, parameters, elapsed = pending
+            self.connection.query_stats.record(self.connection, sql, parameters, elapsed * 1000)
+
+    def _fetch(self, method, *args):
+        started = time.perf_counter()
+        failed = False
+        try:
+            return method(*args)
+        except BaseException:
+            # 包括迭代结束的 StopIteration
+            failed = True
+            raise
+        finally:
+            if self._pending is not None:
+                self._pending[2] += time.perf_counter() - started
+                if failed:
+                    self._finish()
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            result = super().execute(sql, parameters)
+        except BaseException:
+            self.connection.query_stats.record(
+                self.connection, sql, parameters, (time.perf_counter() - started) * 1000)
+            raise
+        self._pending = [sql, parameters, time.perf_counter() - started]
+        if self.description is None:
+            # 不返回行的语句（写入、DDL）在 execute 里已经执行完
+            self._finish()
+        return result
+
+    def fetchone(self):
+        row = self._fetch(super().fetchone)
+        if row is None:
+            self._finish()
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self._fetch(super().fetchmany, size)
+        if len(rows) < size:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._fetch(super().fetchall)
+        self._finish()
+        return rows
+
+    def __next__(self):
+        return self._fetch(super().__next__)
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # 只取了第一行就丢弃的游标（conn.execute(...).fetchone()）在这里记录
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self.connection.query_stats.record(
+                None, sql, None, (time.perf_counter() - started) * 1000)
+
+    def executescript(self, sql_script):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            self.connection.query_stats.record(
+                None, sql_script, None, (time.perf_counter() - started) * 1000)
+
+
+def init_app(app):
+    """创建统计对象，并在每个请求前后开始/结束计数"""
+    stats = QueryStats(
+        slow_ms=app.config.get('SLOW_QUERY_MS', 100),
+        slow_log_size=app.config.get('SLOW_QUERY_LOG_SIZE', 50),
+    )
+    app.extensions['query_stats'] = stats
+
+    @app.before_request
+    def _begin_request_stats():
+        stats.begin_request()
+
+    @app.teardown_request
+    def _end_request_stats(exception=None):
+        stats.end_request(request.endpoint or 'unknown')
+
+    return stats
@@ -0,0 +1,662 @@
+# database/migrations.py
+"""带版本号的数据库迁移
+
+每个迁移步骤只执行一次，执行后把版本号记录到 schema_version 表。
+应用启动时只需要读取一次版本号，已是最新版本就不再执行任何 DDL。
+新增表、索引或触发器时，在文件末尾追加一个新版本的迁移即可，不要修改已发布的迁移。
+迁移里的 SQL 按发布时的样子直接写在这里，不调用各模块的 ensure_* / rebuild_*：
+那些函数描述的是最新的结构，以后修改它们不能改变旧迁移在新数据库上执行的内容。
+"""
+import re
+import sqlite3
+from collections import Counter
+
+MIGRATIONS = []
+
+
+def migration(version, name):
+    """注册一个迁移步骤"""
+    def decorator(func):
+        MIGRATIONS.append((version, name, func))
+        MIGRATIONS.sort(key=lambda item: item[0])
+        return func
+    return decorator
+
+
+def latest_version():
+    """代码中最新的迁移版本"""
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def current_version(conn):
+    """数据库当前的迁移版本（没有 schema_version 表时为 0）"""
+    try:
+        row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row[0] or 0
+
+
+def pending_migrations(conn):
+    """尚未执行的迁移"""
+    version = current_version(conn)
+    return [item for item in MIGRATIONS if item[0] > version]
+
+
+def apply_migrations(conn, target=None):
+    """按顺序执行所有待执行的迁移，返回本次执行的迁移列表
+
+    每个迁移在单独的 BEGIN IMMEDIATE 事务中执行，拿到写锁后会重新检查版本，
+    多个进程同时启动时也只会有一个进程真正执行。
+    """
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    conn.commit()
+
+    applied = []
+    for version, name, func in MIGRATIONS:
+        if target is not None and version > target:
+            break
+
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if current_version(conn) >= version:
+                conn.rollback()
+                continue
+            func(conn)
+            conn.execute("INSERT INTO schema_version (version, name) VALUES (?, ?)", (version, name))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        applied.append((version, name))
+        print(f"已执行数据库迁移 {version}: {name}")
+
+    if applied:
+        conn.execute('PRAGMA optimize')
+    return applied
+
+
+@migration(1, 'baseline schema')
+def _baseline_schema(conn):
+    cursor = conn.cursor()
+
+    # Create unified users table - 添加 last_login 列
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL UNIQUE,
+        password TEXT NOT NULL,
+        role TEXT NOT NULL,
+        full_name TEXT NOT NULL,
+        avatar TEXT DEFAULT 'https://res.cloudinary.com/dgbl5ql1v/image/upload/v1761285688/u_2689977510_2663943077_fm_253_fmt_auto_app_120_f_JPEG_o2yr5a.webp',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_login TIMESTAMP,  -- 添加 last_login 列
+        -- Teacher specific fields
+        teacher_id TEXT UNIQUE,
+        department TEXT,
+        -- Student specific fields
+        student_id TEXT UNIQUE,
+        grade TEXT,
+        -- Community organization specific fields
+        org_name TEXT,
+        contact_person TEXT,
+        email TEXT,
+        phone TEXT,
+        address TEXT,
+        description TEXT,
+        CHECK (role IN ('teacher', 'student', 'platform_admin', 'community_org'))
+    )
+    ''')
+
+    # 检查并添加 last_login 列（如果表已存在但缺少该列）
+    try:
+        cursor.execute("SELECT last_login FROM users LIMIT 1")
+    except sqlite3.OperationalError:
+        # 如果 last_login 列不存在，则添加它
+        cursor.execute("ALTER TABLE users ADD COLUMN last_login TIMESTAMP")
+        print("已添加 last_login 列到 users 表")
+
+    # Create articles table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS articles (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        author_id INTEGER NOT NULL,
+        content TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (author_id) REFERENCES users (id)
+    )
+    ''')
+
+    # Create courses table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS courses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        teacher_id INTEGER NOT NULL,
+        title TEXT NOT NULL,
+        description TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (teacher_id) REFERENCES users (id)
+    )
+    ''')
+
+    # Create new course-student association table with scores and status
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS course_enrollments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        course_id INTEGER NOT NULL,
+        student_id INTEGER NOT NULL,
+        enrollment_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        score DECIMAL(5,2),  -- Student score in this course
+        status TEXT DEFAULT 'enrolled',  -- enrolled, completed, dropped
+        completed_at TIMESTAMP,
+        FOREIGN KEY (course_id) REFERENCES courses (id),
+        FOREIGN KEY (student_id) REFERENCES users (id),
+        UNIQUE(course_id, student_id)
+    )
+    ''')
+
+    # Create course contents table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS course_contents (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        course_id INTEGER NOT NULL,
+        title TEXT NOT NULL,
+        content TEXT,
+        content_type TEXT DEFAULT 'lesson',  -- lesson, assignment, quiz, etc.
+        order_index INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (course_id) REFERENCES courses (id)
+    )
+    ''')
+
+    # Create assignments/quiz submissions table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS submissions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        course_content_id INTEGER NOT NULL,
+        student_id INTEGER NOT NULL,
+        submission_text TEXT,
+        submission_file TEXT,  -- Store file path
+        score DECIMAL(5,2),
+        submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        graded_at TIMESTAMP,
+        FOREIGN KEY (course_content_id) REFERENCES course_contents (id),
+        FOREIGN KEY (student_id) REFERENCES users (id)
+    )
+    ''')
+
+    # Create events table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        description TEXT NOT NULL,
+        organizer_id INTEGER NOT NULL,
+        event_date DATE NOT NULL,
+        event_time TIME,
+        location TEXT,
+        max_participants INTEGER,
+        current_participants INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        status TEXT DEFAULT 'upcoming',  -- upcoming, ongoing, completed, cancelled
+        FOREIGN KEY (organizer_id) REFERENCES users (id)
+    )
+    ''')
+
+    # Create event participants table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS event_participants (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        participation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        status TEXT DEFAULT 'registered',  -- registered, attended, cancelled
+        FOREIGN KEY (event_id) REFERENCES events (id),
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        UNIQUE(event_id, user_id)
+    )
+    ''')
+
+    # Create members table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS members (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        org_id INTEGER NOT NULL,
+        name VARCHAR(100) NOT NULL,
+        email VARCHAR(100),
+        phone VARCHAR(20),
+        role VARCHAR(50) DEFAULT 'member', -- member, admin, moderator etc.
+        join_date DATE,
+        status VARCHAR(20) DEFAULT 'active', -- active, inactive, pending
+        permissions TEXT, -- JSON formatted permission settings
+        notes TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (org_id) REFERENCES users(id)
+    )
+    ''')
+
+    # Create member groups table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS member_groups (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        org_id INTEGER NOT NULL,
+        name VARCHAR(100) NOT NULL,
+        description TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (org_id) REFERENCES users(id)
+    )
+    ''')
+
+    # Create member-group relations table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS member_group_relations (
+        member_id INTEGER,
+        group_id INTEGER,
+        PRIMARY KEY (member_id, group_id),
+        FOREIGN KEY (member_id) REFERENCES members(id),
+        FOREIGN KEY (group_id) REFERENCES member_groups(id)
+    )
+    ''')
+
+    # 创建系统设置表（含默认设置）
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS system_settings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        setting_key TEXT UNIQUE NOT NULL,
+        setting_value TEXT,
+        description TEXT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+    # 插入默认设置
+    default_settings = [
+        ('system_theme', 'default', '系统主题'),
+        ('background_color', '#ffffff', '背景颜色'),
+        ('layout_style', 'standard', '布局样式'),
+        ('max_articles_per_page', '10', '每页文章数'),
+        ('allow_registration', 'true', '允许用户注册'),
+        ('maintenance_mode', 'false', '维护模式'),
+        ('session_timeout', '60', '会话超时时间（分钟）'),
+        ('backup_interval', '7', '自动备份间隔（天）')
+    ]
+
+    cursor.executemany('''
+    INSERT OR IGNORE INTO system_settings (setting_key, setting_value, description)
+    VALUES (?, ?, ?)
+    ''', default_settings)
+
+    # 创建安全日志表
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS security_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        action TEXT NOT NULL,
+        description TEXT,
+        ip_address TEXT,
+        user_agent TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    ''')
+
+    # 插入一些示例日志（如果表为空）
+    cursor.execute("SELECT COUNT(*) FROM security_logs")
+    if cursor.fetchone()[0] == 0:
+        sample_logs = [
+            (1, '用户登录', '管理员登录系统', '192.168.1.100', 'Mozilla/5.0...'),
+            (None, '系统启动', '应用程序启动', '127.0.0.1', 'System'),
+            (2, '用户注册', '新用户注册', '192.168.1.101', 'Mozilla/5.0...'),
+            (1, '文章创建', '创建新文章', '192.168.1.100', 'Mozilla/5.0...')
+        ]
+        cursor.executemany('''
+        INSERT INTO security_logs (user_id, action, description, ip_address, user_agent)
+        VALUES (?, ?, ?, ?, ?)
+        ''', sample_logs)
+
+
+@migration(2, 'drop legacy course_students / course_statistics tables')
+def _drop_legacy_course_tables(conn):
+    # 旧版本的课程-学生关联表和统计表已被 course_enrollments 取代
+    conn.execute("DROP TABLE IF EXISTS course_students")
+    conn.execute("DROP TABLE IF EXISTS course_statistics")
+
+
+def _execute_all(conn, statements):
+    for sql in statements:
+        conn.execute(sql)
+
+
+def _version_statements(table):
+    # 迁移 7 / 11 发布时的表版本号触发器：增删改每一行都让版本号加 1
+    bump = f"UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';"
+    return [f"INSERT OR IGNORE INTO table_versions (table_name) VALUES ('{table}')"] + [
+        f'CREATE TRIGGER IF NOT EXISTS {table}_version_{action} '
+        f'AFTER {action.upper()} ON {table} BEGIN {bump} END'
+        for action in ('insert', 'update', 'delete')
+    ]
+
+
+@migration(3, 'hot table indexes')
+def _hot_table_indexes(conn):
+    _execute_all(conn, [
+        'CREATE INDEX IF NOT EXISTS idx_course_enrollments_student '
+        'ON course_enrollments (student_id, enrollment_date, course_id, status, score)',
+        'CREATE INDEX IF NOT EXISTS idx_course_enrollments_course_stats '
+        'ON course_enrollments (course_id, status, score, student_id)',
+        'CREATE INDEX IF NOT EXISTS idx_courses_teacher ON courses (teacher_id, created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_courses_created ON courses (created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_course_contents_course ON course_contents (course_id, order_index)',
+        'CREATE INDEX IF NOT EXISTS idx_events_organizer ON events (organizer_id, event_date, event_time)',
+        'CREATE INDEX IF NOT EXISTS idx_events_date ON events (event_date, event_time)',
+        "CREATE INDEX IF NOT EXISTS idx_events_upcoming ON events (event_date, event_time) "
+        "WHERE status = 'upcoming'",
+        'CREATE INDEX IF NOT EXISTS idx_members_org_created ON members (org_id, created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_members_org_status ON members (org_id, status, role)',
+        "CREATE INDEX IF NOT EXISTS idx_members_active ON members (org_id) WHERE status = 'active'",
+        'CREATE INDEX IF NOT EXISTS idx_member_groups_org ON member_groups (org_id, name)',
+        'CREATE INDEX IF NOT EXISTS idx_articles_created ON articles (created_at, id)',
+        'CREATE INDEX IF NOT EXISTS idx_articles_author ON articles (author_id)',
+        'CREATE INDEX IF NOT EXISTS idx_security_logs_created ON security_logs (created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_users_role ON users (role)',
+        'CREATE INDEX IF NOT EXISTS idx_users_created ON users (created_at)',
+    ])
+
+
+@migration(4, 'full-text search index')
+def _full_text_search(conn):
+    sources = [
+        ('articles', 'articles_fts', 'title, content'),
+        ('events', 'events_fts', 'title, description, location'),
+        ('courses', 'courses_fts', 'title, description'),
+    ]
+    for table, fts, names in sources:
+        columns = names.split(', ')
+        new_values = ', '.join(f'new.{column}' for column in columns)
+        old_values = ', '.join(f'old.{column}' for column in columns)
+        insert = f'INSERT INTO {fts} (rowid, {names}) VALUES (new.id, {new_values});'
+        delete = f"INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values});"
+        _execute_all(conn, [
+            f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                {names},
+                content = '{table}', content_rowid = 'id',
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '3'
+            )
+            ''',
+            f'CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table} BEGIN {insert} END',
+            f'CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table} BEGIN {delete} END',
+            f'CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE OF {names} ON {table} '
+            f'BEGIN {delete} {insert} END',
+        ])
+    for _, fts, _ in sources:
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('optimize')")
+
+
+# 迁移 5 发布时的分词规则：只取 3 个字母以上的英文单词，去掉停用词。
+# 以后修改 database.wordcloud 的分词不影响这里的回填
+_V5_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was',
+    'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should',
+    'may', 'might', 'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him',
+    'her', 'us', 'them', 'what', 'which', 'who', 'whom', 'whose', 'where', 'when', 'why', 'how', 'all', 'any',
+    'both', 'each', 'few', 'more', 'most', 'other', 'some', 'such', 'no', 'nor', 'not', 'only', 'own', 'same',
+    'so', 'than', 'too', 'very', 'can', 'just',
+})
+_V5_WORD_RE = re.compile(r'\b[a-zA-Z]{3,}\b')
+
+
+def _v5_count_terms(*texts):
+    counter = Counter()
+    for text in texts:
+        if text:
+            counter.update(word for word in _V5_WORD_RE.findall(text.lower()) if word not in _V5_STOP_WORDS)
+    return counter
+
+
+@migration(5, 'word cloud term frequencies')
+def _term_frequencies(conn):
+
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS term_frequencies (
+        term TEXT PRIMARY KEY,
+        freq INTEGER NOT NULL
+    ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_term_frequencies_freq ON term_frequencies (freq DESC)')
+
+    # 发布时的触发器依赖应用注册的 wc_terms()，迁移 12 已把它们换成纯 SQL 的触发器
+    sources = [('articles', 'title, content'), ('events', 'title, description'),
+               ('courses', 'title, description')]
+    for table, names in sources:
+        new_terms = f"wc_terms({', '.join('new.' + column for column in names.split(', '))})"
+        old_terms = f"wc_terms({', '.join('old.' + column for column in names.split(', '))})"
+        add = f'''
+        INSERT INTO term_frequencies (term, freq)
+        SELECT key, value FROM json_each({new_terms}) WHERE true
+        ON CONFLICT (term) DO UPDATE SET freq = freq + excluded.freq;'''
+        remove = f'''
+        UPDATE term_frequencies SET freq = freq - (
+            SELECT value FROM json_each({old_terms}) AS t WHERE t.key = term_frequencies.term
+        )
+        WHERE term IN (SELECT key FROM json_each({old_terms}));
+        DELETE FROM term_frequencies
+        WHERE freq <= 0 AND term IN (SELECT key FROM json_each({old_terms}));'''
+        _execute_all(conn, [
+            f'CREATE TRIGGER IF NOT EXISTS {table}_terms_insert AFTER INSERT ON {table} BEGIN {add} END',
+            f'CREATE TRIGGER IF NOT EXISTS {table}_terms_delete AFTER DELETE ON {table} BEGIN {remove} END',
+            f'CREATE TRIGGER IF NOT EXISTS {table}_terms_update AFTER UPDATE OF {names} ON {table} '
+            f'BEGIN {remove} {add} END',
+        ])
+
+    counter = Counter()
+    for table, names in sources:
+        for row in conn.execute(f'SELECT {names} FROM {table}'):
+            counter.update(_v5_count_terms(*row))
+    conn.execute('DELETE FROM term_frequencies')
+    conn.executemany('INSERT INTO term_frequencies (term, freq) VALUES (?, ?)', counter.items())
+
+
+@migration(6, 'materialized course statistics')
+def _course_stats(conn):
+    columns = ('total_students, completed_students, score_sum, score_count, '
+               'excellent_students, good_students, failing_students')
+    add = f'''
+        INSERT INTO course_stats (course_id, {columns})
+        VALUES (new.course_id, new.student_id IS NOT NULL, COALESCE(new.status = 'completed', 0),
+                COALESCE(new.score, 0), new.score IS NOT NULL, COALESCE(new.score >= 90, 0),
+                COALESCE(new.score >= 60 AND new.score < 90, 0), COALESCE(new.score < 60, 0))
+        ON CONFLICT (course_id) DO UPDATE SET
+            total_students = total_students + excluded.total_students,
+            completed_students = completed_students + excluded.completed_students,
+            score_sum = score_sum + excluded.score_sum,
+            score_count = score_count + excluded.score_count,
+            excellent_students = excellent_students + excluded.excellent_students,
+            good_students = good_students + excluded.good_students,
+            failing_students = failing_students + excluded.failing_students;'''
+    subtract = '''
+        UPDATE course_stats SET
+            total_students = total_students - (old.student_id IS NOT NULL),
+            completed_students = completed_students - (COALESCE(old.status = 'completed', 0)),
+            score_sum = score_sum - (COALESCE(old.score, 0)),
+            score_count = score_count - (old.score IS NOT NULL),
+            excellent_students = excellent_students - (COALESCE(old.score >= 90, 0)),
+            good_students = good_students - (COALESCE(old.score >= 60 AND old.score < 90, 0)),
+            failing_students = failing_students - (COALESCE(old.score < 60, 0))
+        WHERE course_id = old.course_id;'''
+    _execute_all(conn, [
+        '''
+        CREATE TABLE IF NOT EXISTS course_stats (
+            course_id INTEGER PRIMARY KEY,
+            total_students INTEGER NOT NULL DEFAULT 0,
+            completed_students INTEGER NOT NULL DEFAULT 0,
+            score_sum REAL NOT NULL DEFAULT 0,
+            score_count INTEGER NOT NULL DEFAULT 0,
+            excellent_students INTEGER NOT NULL DEFAULT 0,
+            good_students INTEGER NOT NULL DEFAULT 0,
+            failing_students INTEGER NOT NULL DEFAULT 0
+        )
+        ''',
+        f'CREATE TRIGGER IF NOT EXISTS course_enrollments_stats_insert '
+        f'AFTER INSERT ON course_enrollments BEGIN {add} END',
+        f'CREATE TRIGGER IF NOT EXISTS course_enrollments_stats_delete '
+        f'AFTER DELETE ON course_enrollments BEGIN {subtract} END',
+        f'CREATE TRIGGER IF NOT EXISTS course_enrollments_stats_update '
+        f'AFTER UPDATE OF course_id, student_id, score, status ON course_enrollments '
+        f'BEGIN {subtract} {add} END',
+        'CREATE TRIGGER IF NOT EXISTS courses_stats_delete '
+        'AFTER DELETE ON courses BEGIN DELETE FROM course_stats WHERE course_id = old.id; END',
+        'DELETE FROM course_stats',
+        f'''
+        INSERT INTO course_stats (course_id, {columns})
+        SELECT course_id,
+               COUNT(student_id),
+               COUNT(CASE WHEN status = 'completed' THEN 1 END),
+               COALESCE(SUM(score), 0),
+               COUNT(score),
+               COUNT(CASE WHEN score >= 90 THEN 1 END),
+               COUNT(CASE WHEN score >= 60 AND score < 90 THEN 1 END),
+               COUNT(CASE WHEN score < 60 THEN 1 END)
+        FROM course_enrollments
+        GROUP BY course_id
+        ''',
+    ])
+
+
+@migration(7, 'table versions')
+def _table_versions(conn):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS table_versions (
+        table_name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+    ''')
+    for table in ('users', 'articles', 'events', 'courses', 'course_enrollments'):
+        _execute_all(conn, _version_statements(table))
+
+
+@migration(8, 'hourly and daily activity rollups')
+def _activity_rollups(conn):
+    # (指标, 原表, 时间列, 更新时计数的条件；None 表示只在插入时计数)
+    metrics = [
+        ('registrations', 'users', 'created_at', None),
+        ('logins', 'users', 'last_login', 'new.last_login IS NOT old.last_login'),
+        ('articles', 'articles', 'created_at', None),
+        ('events', 'events', 'created_at', None),
+        ('enrollments', 'course_enrollments', 'enrollment_date', None),
+        ('completions', 'course_enrollments', 'completed_at', 'old.completed_at IS NULL'),
+    ]
+    for table in ('activity_hourly', 'activity_daily'):
+        conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {table} (
+            bucket TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (bucket, metric)
+        ) WITHOUT ROWID
+        ''')
+    for metric, table, column, update_condition in metrics:
+        valid = f"strftime('%Y-%m-%d %H:00', new.{column}) IS NOT NULL"
+        increment = f'''
+        INSERT INTO activity_hourly (bucket, metric, count)
+        VALUES (strftime('%Y-%m-%d %H:00', new.{column}), '{metric}', 1)
+        ON CONFLICT (bucket, metric) DO UPDATE SET count = count + 1;
+        INSERT INTO activity_daily (bucket, metric, count)
+        VALUES (strftime('%Y-%m-%d', new.{column}), '{metric}', 1)
+        ON CONFLICT (bucket, metric) DO UPDATE SET count = count + 1;'''
+        conn.execute(f'CREATE TRIGGER IF NOT EXISTS {table}_rollup_{metric}_insert '
+                     f'AFTER INSERT ON {table} WHEN {valid} BEGIN {increment} END')
+        if update_condition:
+            conn.execute(f'CREATE TRIGGER IF NOT EXISTS {table}_rollup_{metric}_update '
+                         f'AFTER UPDATE OF {column} ON {table} WHEN {valid} AND {update_condition} '
+                         f'BEGIN {increment} END')
+
+    conn.execute('DELETE FROM activity_hourly')
+    conn.execute('DELETE FROM activity_daily')
+    for metric, table, column, _ in metrics:
+        conn.execute(f'''
+            INSERT INTO activity_hourly (bucket, metric, count)
+            SELECT strftime('%Y-%m-%d %H:00', {column}) AS bucket, ?, COUNT(*)
+            FROM {table}
+            WHERE bucket IS NOT NULL
+            GROUP BY bucket
+        ''', (metric,))
+    conn.execute('''
+        INSERT INTO activity_daily (bucket, metric, count)
+        SELECT substr(bucket, 1, 10), metric, SUM(count)
+        FROM activity_hourly
+        GROUP BY substr(bucket, 1, 10), metric
+    ''')
+
+
+@migration(9, 'server-side sessions')
+def _sessions(conn):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS sessions (
+        id TEXT PRIMARY KEY,
+        data TEXT NOT NULL,
+        expires_at REAL NOT NULL
+    ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)')
+
+
+@migration(10, 'author name versions')
+def _author_name_versions(conn):
+    # 列版本号：用户名或姓名被修改、用户被删除时加 1
+    bump = "UPDATE table_versions SET version = version + 1 WHERE table_name = 'users.names';"
+    _execute_all(conn, [
+        "INSERT OR IGNORE INTO table_versions (table_name) VALUES ('users.names')",
+        f'CREATE TRIGGER IF NOT EXISTS users_names_version_update '
+        f'AFTER UPDATE OF username, full_name ON users BEGIN {bump} END',
+        f'CREATE TRIGGER IF NOT EXISTS users_names_version_delete '
+        f'AFTER DELETE ON users BEGIN {bump} END',
+    ])
+
+
+@migration(11, 'participant and settings versions')
+def _participant_settings_versions(conn):
+    for table in ('event_participants', 'system_settings'):
+        _execute_all(conn, _version_statements(table))
+
+
+@migration(12, 'word cloud change queue')
+def _term_change_queue(conn):
+    # 词频触发器不再调用 wc_terms()：只把变化的行记进 term_changes，由应用分词后合并
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS term_changes (
+        id INTEGER PRIMARY KEY,
+        sign INTEGER NOT NULL,
+        title TEXT,
+        body TEXT
+    )
+    ''')
+    for table, title, body in (('articles', 'title', 'content'), ('events', 'title', 'description'),
+                               ('courses', 'title', 'description')):
+        added = f'INSERT INTO term_changes (sign, title, body) VALUES (1, new.{title}, new.{body});'
+        removed = f'INSERT INTO term_changes (sign, title, body) VALUES (-1, old.{title}, old.{body});'
+        _execute_all(conn, [
+            f'DROP TRIGGER IF EXISTS {table}_terms_insert',
+            f'DROP TRIGGER IF EXISTS {table}_terms_delete',
+            f'DROP TRIGGER IF EXISTS {table}_terms_update',
+            f'CREATE TRIGGER {table}_terms_insert AFTER INSERT ON {table} BEGIN {added} END',
+            f'CREATE TRIGGER {table}_terms_delete AFTER DELETE ON {table} BEGIN {removed} END',
+            f'CREATE TRIGGER {table}_terms_update AFTER UPDATE OF {title}, {body} ON {table} '
+            f'BEGIN {removed} {added} END',
+        ])
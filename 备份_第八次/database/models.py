@@ -1,20 +1,114 @@
 # database/models.py
+import base64
+import json
 import sqlite3
 from flask import current_app
 import os
+from database.connection import get_connection
 
 
 def get_db_connection():
-    """获取数据库连接"""
-    conn = sqlite3.connect(current_app.config['DATABASE'])
-    conn.row_factory = sqlite3.Row
-    return conn
+    """获取数据库连接 - 请求内复用连接池中的同一个连接"""
+    return get_connection()
 
 
 def init_db():
-    """初始化数据库"""
+    """初始化数据库 - 启动时只检查迁移版本，已是最新版本就直接返回"""
+    from database.migrations import current_version, latest_version
+
+    conn = get_db_connection()
+    try:
+        version = current_version(conn)
+    finally:
+        conn.close()
+
+    if version >= latest_version():
+        return
+
+    if not current_app.config.get('AUTO_MIGRATE', True):
+        print(f"数据库版本 {version} 落后于 {latest_version()}，请运行: flask --app app db migrate")
+        return
+
     from database.init_database import init_database
-    init_database()
+    from database.connection import resolve_pragmas
+    init_database(current_app.config['DATABASE'], resolve_pragmas(current_app.config))
+
+
+# 文章分页：每页条数的默认值和上限
+DEFAULT_ARTICLES_PER_PAGE = 10
+MAX_ARTICLES_PER_PAGE = 100
+# 卡片只显示前 100 个字符，多取一个用来判断要不要加省略号
+ARTICLE_EXCERPT_LENGTH = 101
+
+
+def encode_article_cursor(created_at, article_id):
+    """把最后一篇文章的 (created_at, id) 编码成不透明的游标"""
+    raw = json.dumps([created_at, article_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_article_cursor(cursor):
+    """解码游标，格式不对时抛出 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, article_id = json.loads(raw)
+    except Exception:
+        raise ValueError('无效的分页游标')
+    if not isinstance(created_at, str) or not isinstance(article_id, int):
+        raise ValueError('无效的分页游标')
+    return created_at, article_id
+
+
+def get_article_page_size():
+    """读取系统设置 max_articles_per_page"""
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT setting_value FROM system_settings WHERE setting_key = 'max_articles_per_page'")
+        row = cursor.fetchone()
+        conn.close()
+        page_size = int(row['setting_value']) if row else DEFAULT_ARTICLES_PER_PAGE
+    except (TypeError, ValueError, sqlite3.Error) as e:
+        print(f"Error reading max_articles_per_page: {e}")
+        page_size = DEFAULT_ARTICLES_PER_PAGE
+    return max(1, min(page_size, MAX_ARTICLES_PER_PAGE))
+
+
+def get_articles_page(cursor=None, limit=None):
+    """按发布时间倒序分页获取文章（keyset 分页）
+
+    返回 (本页文章, 下一页游标)，没有下一页时游标为 None。
+    游标无效时抛出 ValueError。
+    """
+    limit = max(1, min(limit or get_article_page_size(), MAX_ARTICLES_PER_PAGE))
+    params = [ARTICLE_EXCERPT_LENGTH]
+    where = ''
+    if cursor:
+        where = 'WHERE (a.created_at, a.id) < (?, ?)'
+        params.extend(decode_article_cursor(cursor))
+    # 多取一条判断是否还有下一页
+    params.append(limit + 1)
+
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(f"""
+            SELECT a.id, a.title, substr(a.content, 1, ?) AS content, a.author_id, a.created_at,
+                   COALESCE(u.full_name, u.username) AS author
+            FROM articles a
+            LEFT JOIN users u ON a.author_id = u.id
+            {where}
+            ORDER BY a.created_at DESC, a.id DESC
+            LIMIT ?
+        """, params).fetchall()
+    finally:
+        conn.close()
+
+    articles = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = articles[-1]
+        next_cursor = encode_article_cursor(last['created_at'], last['id'])
+    return articles, next_cursor
 
 
 def get_articles():
@@ -120,18 +214,17 @@ def get_teacher_dashboard_data(teacher_id):
         student_count_result = cursor.fetchone()
         student_count = student_count_result['count'] if student_count_result else 0
 
-        # 获取课程统计数据 - 更新为从course_enrollments表查询
+        # 获取课程统计数据 - 读取触发器维护的 course_stats 表
         cursor.execute("""
         SELECT 
             c.id, 
             c.title, 
-            COUNT(ce.student_id) as total_students,
-            COUNT(CASE WHEN ce.status = 'completed' THEN 1 END) as completed_students,
-            AVG(ce.score) as average_score
+            COALESCE(cs.total_students, 0) as total_students,
+            COALESCE(cs.completed_students, 0) as completed_students,
+            cs.score_sum / NULLIF(cs.score_count, 0) as average_score
         FROM courses c
-        LEFT JOIN course_enrollments ce ON c.id = ce.course_id
+        LEFT JOIN course_stats cs ON c.id = cs.course_id
         WHERE c.teacher_id = ?
-        GROUP BY c.id
         ORDER BY c.created_at DESC
         """, (teacher_id,))
         course_stats = cursor.fetchall()
@@ -256,15 +349,23 @@ def get_users():
 def create_user(username, password, role, full_name="", org_name=""):
     """创建新用户"""
     try:
+        from utils.passwords import PasswordBusyError, make_password_hash
+
+        # 只保存 bcrypt 哈希，不保存明文
+        password_hash = make_password_hash(password)
+
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute(
             'INSERT INTO users (username, password, role, full_name, org_name) VALUES (?, ?, ?, ?, ?)',
-            (username, password, role, full_name, org_name)
+            (username, password_hash, role, full_name, org_name)
         )
         conn.commit()
         conn.close()
         return True
+    except PasswordBusyError:
+        # 哈希线程池忙不是创建失败，交给调用方返回 503
+        raise
     except Exception as e:
         print(f"Error creating user: {e}")
         return False
@@ -373,15 +474,23 @@ def get_users():
 def create_user(username, password, role, full_name="", org_name=""):
     """创建新用户"""
     try:
+        from utils.passwords import PasswordBusyError, make_password_hash
+
+        # 只保存 bcrypt 哈希，不保存明文
+        password_hash = make_password_hash(password)
+
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute(
             'INSERT INTO users (username, password, role, full_name, org_name) VALUES (?, ?, ?, ?, ?)',
-            (username, password, role, full_name, org_name)
+            (username, password_hash, role, full_name, org_name)
         )
         conn.commit()
         conn.close()
         return True
+    except PasswordBusyError:
+        # 哈希线程池忙不是创建失败，交给调用方返回 503
+        raise
     except Exception as e:
         print(f"Error creating user: {e}")
         return False
@@ -507,42 +616,11 @@ def get_course_enrollments():
 
 
 def get_system_settings():
-    """获取系统设置"""
+    """获取系统设置（表和默认值由数据库迁移创建）"""
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        # 创建系统设置表（如果不存在）
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS system_settings (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            setting_key TEXT UNIQUE NOT NULL,
-            setting_value TEXT,
-            description TEXT,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-
-        # 插入默认设置（如果不存在）
-        default_settings = [
-            ('system_theme', 'default', '系统主题'),
-            ('background_color', '#ffffff', '背景颜色'),
-            ('layout_style', 'standard', '布局样式'),
-            ('max_articles_per_page', '10', '每页文章数'),
-            ('allow_registration', 'true', '允许用户注册'),
-            ('maintenance_mode', 'false', '维护模式'),
-            ('session_timeout', '60', '会话超时时间（分钟）'),
-            ('backup_interval', '7', '自动备份间隔（天）')
-        ]
-
-        for key, value, description in default_settings:
-            cursor.execute('''
-            INSERT OR IGNORE INTO system_settings (setting_key, setting_value, description)
-            VALUES (?, ?, ?)
-            ''', (key, value, description))
-
-        conn.commit()
-
         # 获取所有设置
         cursor.execute('SELECT setting_key, setting_value, description FROM system_settings')
         settings_data = cursor.fetchall()
@@ -653,35 +731,6 @@ def get_security_logs():
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        # 创建日志表（如果不存在）
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS security_logs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            action TEXT NOT NULL,
-            description TEXT,
-            ip_address TEXT,
-            user_agent TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-        ''')
-
-        # 插入一些示例日志（如果表为空）
-        cursor.execute("SELECT COUNT(*) FROM security_logs")
-        if cursor.fetchone()[0] == 0:
-            sample_logs = [
-                (1, '用户登录', '管理员登录系统', '192.168.1.100', 'Mozilla/5.0...'),
-                (None, '系统启动', '应用程序启动', '127.0.0.1', 'System'),
-                (2, '用户注册', '新用户注册', '192.168.1.101', 'Mozilla/5.0...'),
-                (1, '文章创建', '创建新文章', '192.168.1.100', 'Mozilla/5.0...')
-            ]
-            cursor.executemany('''
-            INSERT INTO security_logs (user_id, action, description, ip_address, user_agent)
-            VALUES (?, ?, ?, ?, ?)
-            ''', sample_logs)
-            conn.commit()
-
         # 获取最近的日志
         cursor.execute('''
         SELECT sl.*, u.username 
@@ -0,0 +1,171 @@
+# database/rollups.py
+"""按小时 / 按天汇总的活动计数
+
+activity_hourly 和 activity_daily 记录每个时间桶里发生了多少次注册、登录、
+发文章、建活动、选课和完成课程。写入原表时由触发器给对应的桶加 1，
+也可以从原表的时间列整体回填。统计接口按时间范围只读汇总表，不扫原始数据。
+
+汇总记录的是"发生过的事"：删除文章不会减少当天的发文数。
+登录只有 users.last_login 一列，回填时每个用户只能算最近一次登录。
+"""
+import math
+from datetime import datetime, timedelta, timezone
+
+# 指标 -> (原表, 时间列, 更新时何时计数)
+# 更新规则：None 只在插入时计数；'changed' 每次该列变化都计数；'first_set' 只在该列第一次有值时计数
+METRICS = {
+    'registrations': ('users', 'created_at', None),
+    'logins': ('users', 'last_login', 'changed'),
+    'articles': ('articles', 'created_at', None),
+    'events': ('events', 'created_at', None),
+    'enrollments': ('course_enrollments', 'enrollment_date', None),
+    'completions': ('course_enrollments', 'completed_at', 'first_set'),
+}
+
+HOUR_FORMAT = '%Y-%m-%d %H:00'
+DAY_FORMAT = '%Y-%m-%d'
+
+# 不超过这么多天的范围按小时出图，更长的按天
+HOURLY_MAX_DAYS = 2
+# 每条曲线最多返回的点数，超过时把相邻的桶合并
+MAX_POINTS = 60
+MAX_RANGE_DAYS = 3650
+
+
+def _increment(metric, value):
+    return f'''
+        INSERT INTO activity_hourly (bucket, metric, count)
+        VALUES (strftime('{HOUR_FORMAT}', {value}), '{metric}', 1)
+        ON CONFLICT (bucket, metric) DO UPDATE SET count = count + 1;
+        INSERT INTO activity_daily (bucket, metric, count)
+        VALUES (strftime('{DAY_FORMAT}', {value}), '{metric}', 1)
+        ON CONFLICT (bucket, metric) DO UPDATE SET count = count + 1;'''
+
+
+def _triggers(metric, table, column, on_update):
+    # 时间值解析不出来时（strftime 返回 NULL）不计数，避免汇总表约束失败拖垮原表的写入
+    valid = f"strftime('{HOUR_FORMAT}', new.{column}) IS NOT NULL"
+    triggers = {
+        f'{table}_rollup_{metric}_insert':
+            f'AFTER INSERT ON {table} WHEN {valid} BEGIN {_increment(metric, "new." + column)} END',
+    }
+    if on_update:
+        condition = (f'new.{column} IS NOT old.{column}' if on_update == 'changed'
+                     else f'old.{column} IS NULL')
+        triggers[f'{table}_rollup_{metric}_update'] = (
+            f'AFTER UPDATE OF {column} ON {table} WHEN {valid} AND {condition} '
+            f'BEGIN {_increment(metric, "new." + column)} END'
+        )
+    return triggers
+
+
+TRIGGERS = {
+    name: body
+    for metric, spec in METRICS.items()
+    for name, body in _triggers(metric, *spec).items()
+}
+
+
+def ensure_rollups(conn):
+    """创建汇总表和触发器（幂等），由调用方提交事务"""
+    for table in ('activity_hourly', 'activity_daily'):
+        conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {table} (
+            bucket TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (bucket, metric)
+        ) WITHOUT ROWID
+        ''')
+    for name, body in TRIGGERS.items():
+        conn.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {body}')
+
+
+def drop_rollup_triggers(conn):
+    """删除汇总触发器（批量导入前使用，导入后再 rebuild）"""
+    for name in TRIGGERS:
+        conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+
+def rebuild_rollups(conn):
+    """从原表的时间列回填全部汇总，返回每个指标的事件数；由调用方提交事务"""
+    ensure_rollups(conn)
+    conn.execute('DELETE FROM activity_hourly')
+    conn.execute('DELETE FROM activity_daily')
+    for metric, (table, column, _) in METRICS.items():
+        conn.execute(f'''
+            INSERT INTO activity_hourly (bucket, metric, count)
+            SELECT strftime('{HOUR_FORMAT}', {column}) AS bucket, ?, COUNT(*)
+            FROM {table}
+            WHERE bucket IS NOT NULL
+            GROUP BY bucket
+        ''', (metric,))
+    # 天汇总直接由小时汇总合并（小时桶的前 10 个字符就是日期）
+    conn.execute('''
+        INSERT INTO activity_daily (bucket, metric, count)
+        SELECT substr(bucket, 1, 10), metric, SUM(count)
+        FROM activity_hourly
+        GROUP BY substr(bucket, 1, 10), metric
+    ''')
+    return dict(conn.execute(
+        'SELECT metric, SUM(count) FROM activity_daily GROUP BY metric'
+    ).fetchall())
+
+
+def parse_range(value, default=30):
+    """解析 ?range= 参数：天数或 'all'，返回天数（'all' 返回 None）；不合法时抛出 ValueError"""
+    if value is None or value == '':
+        return default
+    if value == 'all':
+        return None
+    days = int(value)
+    if not 1 <= days <= MAX_RANGE_DAYS:
+        raise ValueError(f'range must be between 1 and {MAX_RANGE_DAYS} days')
+    return days
+
+
+def get_activity(conn, days=30, now=None):
+    """读取最近 days 天（None 表示全部）的活动曲线
+
+    不超过 HOURLY_MAX_DAYS 天按小时，否则按天；点数超过 MAX_POINTS 时把相邻的桶合并。
+    返回 labels、每个指标的 series 和范围内的 totals。
+    """
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    if days is None:
+        first = conn.execute('SELECT MIN(bucket) FROM activity_daily').fetchone()[0]
+        first_day = datetime.strptime(first, DAY_FORMAT) if first else today
+        days = max(1, (today - first_day).days + 1)
+
+    if days <= HOURLY_MAX_DAYS:
+        table, fmt, granularity, step = 'activity_hourly', HOUR_FORMAT, 'hour', timedelta(hours=1)
+        points = days * 24
+        start = now.replace(minute=0, second=0, microsecond=0) - step * (points - 1)
+    else:
+        table, fmt, granularity, step = 'activity_daily', DAY_FORMAT, 'day', timedelta(days=1)
+        points = days
+        start = today - step * (points - 1)
+
+    bucket_size = math.ceil(points / MAX_POINTS)
+    slots = math.ceil(points / bucket_size)
+    end = start + step * points
+
+    # 桶名 -> 合并后的点序号
+    slot_of = {(start + step * offset).strftime(fmt): offset // bucket_size for offset in range(points)}
+    series = {metric: [0] * slots for metric in METRICS}
+    rows = conn.execute(
+        f'SELECT bucket, metric, count FROM {table} WHERE bucket >= ? AND bucket < ?',
+        (start.strftime(fmt), end.strftime(fmt))
+    )
+    for bucket, metric, count in rows:
+        if metric in series and bucket in slot_of:
+            series[metric][slot_of[bucket]] += count
+
+    return {
+        'granularity': granularity,
+        'bucket_size': bucket_size,
+        'labels': [(start + step * bucket_size * slot).strftime(fmt) for slot in range(slots)],
+        'series': series,
+        'totals': {metric: sum(values) for metric, values in series.items()},
+    }
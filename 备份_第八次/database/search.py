@@ -0,0 +1,147 @@
+# database/search.py
+"""文章、活动、课程的 FTS5 全文搜索
+
+每张表一个外部内容（external content）FTS5 索引，只存倒排索引不重复存正文，
+snippet / highlight 需要的原文直接从原表读取。触发器保持索引与原表同步，
+查询按 BM25 排序，标题权重最高。
+
+常见词几乎命中所有文档，全部打分要几百毫秒，所以每类只对最新的 rank_window 条命中文档
+计算 BM25（配置项 SEARCH_RANK_WINDOW，0 表示全部打分）；命中数超过窗口的类型会在结果里
+标出，调用方据此提示用户结果不完整。
+"""
+import re
+
+from markupsafe import escape
+
+# 类型 -> (原表, FTS 表, 索引的列, bm25 列权重)
+SOURCES = {
+    'article': ('articles', 'articles_fts', ('title', 'content'), (10.0, 1.0)),
+    'event': ('events', 'events_fts', ('title', 'description', 'location'), (10.0, 1.0, 2.0)),
+    'course': ('courses', 'courses_fts', ('title', 'description'), (10.0, 1.0)),
+}
+
+MAX_RESULTS = 50
+# 每类默认最多对最新的多少条命中文档计算 BM25，查询时间与表大小基本无关
+RANK_WINDOW = 5000
+# 高亮标记先用控制字符占位，转义 HTML 之后再换成 <mark>
+MARK_OPEN, MARK_CLOSE = '\x02', '\x03'
+
+
+def _triggers(table, fts, columns):
+    names = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    insert = f'INSERT INTO {fts} (rowid, {names}) VALUES (new.id, {new_values});'
+    delete = f"INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values});"
+    return [
+        f'CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table} BEGIN {insert} END',
+        f'CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table} BEGIN {delete} END',
+        f'CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE OF {names} ON {table} '
+        f'BEGIN {delete} {insert} END',
+    ]
+
+
+def ensure_search_index(conn):
+    """创建 FTS5 表和同步触发器（幂等），由调用方提交事务"""
+    for table, fts, columns, _ in SOURCES.values():
+        conn.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {', '.join(columns)},
+            content = '{table}', content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '3'
+        )
+        ''')
+        for ddl in _triggers(table, fts, columns):
+            conn.execute(ddl)
+
+
+def drop_search_triggers(conn):
+    """删除同步触发器（批量导入前使用，导入后再 rebuild）"""
+    for table, _, _, _ in SOURCES.values():
+        for action in ('insert', 'delete', 'update'):
+            conn.execute(f'DROP TRIGGER IF EXISTS {table}_fts_{action}')
+
+
+def rebuild_search_index(conn):
+    """从原表重建全部搜索索引，返回每类的文档数；由调用方提交事务"""
+    ensure_search_index(conn)
+    counts = {}
+    for kind, (table, fts, _, _) in SOURCES.items():
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+        # 合并 b-tree 段，查询更快
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('optimize')")
+        counts[kind] = conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+    return counts
+
+
+def build_match_query(text):
+    """把用户输入转成安全的 FTS5 查询：每个词加引号，最后一个词按前缀匹配
+
+    太短的前缀会展开成大量词项，至少 3 个字符才做前缀匹配。
+    """
+    terms = re.findall(r'\w+', text or '', re.UNICODE)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms[:10]]
+    if len(terms[-1]) >= 3:
+        quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def _highlighted(text):
+    """转义 HTML，只保留搜索命中的 <mark> 标记"""
+    return str(escape(text or '')).replace(MARK_OPEN, '<mark>').replace(MARK_CLOSE, '</mark>')
+
+
+def search(conn, text, kind=None, limit=20, rank_window=RANK_WINDOW):
+    """全文搜索，按 BM25 相关度排序
+
+    返回 (带高亮摘要的结果列表, 命中数超过 rank_window、只对最新一批打分的类型列表)。
+    """
+    match = build_match_query(text)
+    if match is None:
+        return [], []
+
+    limit = max(1, min(int(limit or 20), MAX_RESULTS))
+    kinds = [kind] if kind in SOURCES else list(SOURCES)
+
+    results = []
+    truncated = []
+    for name in kinds:
+        _, fts, columns, weights = SOURCES[name]
+        location = 'location' if 'location' in columns else 'NULL'
+        # 第 rank_window + 1 新的命中文档存在，说明命中数超过窗口，只对比它新的那些打分
+        cutoff = None
+        if rank_window:
+            cutoff = conn.execute(
+                f'SELECT rowid FROM {fts} WHERE {fts} MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?',
+                (match, rank_window)).fetchone()
+        if cutoff is not None:
+            truncated.append(name)
+        rows = conn.execute(f'''
+            SELECT rowid,
+                   highlight({fts}, 0, :open, :close) AS title,
+                   snippet({fts}, 1, :open, :close, '…', 16) AS snippet,
+                   {location} AS location,
+                   bm25({fts}, {', '.join(str(weight) for weight in weights)}) AS score
+            FROM {fts}
+            WHERE {fts} MATCH :match AND rowid > :cutoff
+            ORDER BY score
+            LIMIT :limit
+        ''', {'open': MARK_OPEN, 'close': MARK_CLOSE, 'match': match,
+              'cutoff': cutoff[0] if cutoff is not None else 0, 'limit': limit}).fetchall()
+
+        for row in rows:
+            results.append({
+                'kind': name,
+                'id': row['rowid'],
+                'title': _highlighted(row['title']),
+                'snippet': _highlighted(row['snippet']),
+                'location': row['location'] or None,
+                'score': round(-row['score'], 3),
+            })
+
+    # bm25 越小越相关，这里已取反，按分数从高到低合并
+    results.sort(key=lambda item: -item['score'])
+    return results[:limit], truncated
@@ -0,0 +1,79 @@
+# database/table_versions.py
+"""表版本号
+
+table_versions 为每张被跟踪的表保存一个版本号，增删改触发器每写一行就加 1。
+缓存把相关表的版本号作为键的一部分：版本号不变，缓存内容就一定没有过期；
+版本号存在数据库里，多个进程之间也能看到彼此的写入。
+
+有些缓存只依赖表里的少数几列，例如文章列表只用到作者名；
+users 的整表版本号会随每次 last_login 写入变化，这时改用只跟踪这几列的列版本号。
+"""
+
+# 被跟踪版本号的表
+TRACKED_TABLES = (
+    'users', 'articles', 'events', 'courses', 'course_enrollments',
+    'event_participants', 'system_settings',
+)
+
+# 列版本号：名称 -> (表, 列)；这些列被修改或整行被删除时加 1
+COLUMN_VERSIONS = {
+    'users.names': ('users', ('username', 'full_name')),
+}
+
+
+def _bump(table):
+    return f"UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';"
+
+
+def _column_triggers(name):
+    table, columns = COLUMN_VERSIONS[name]
+    prefix = name.replace('.', '_')
+    return {
+        f'{prefix}_version_update': f'AFTER UPDATE OF {", ".join(columns)} ON {table}',
+        f'{prefix}_version_delete': f'AFTER DELETE ON {table}',
+    }
+
+
+def ensure_table_versions(conn, tables=TRACKED_TABLES, columns=tuple(COLUMN_VERSIONS)):
+    """创建版本表和触发器（幂等），由调用方提交事务"""
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS table_versions (
+        table_name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+    ''')
+    for table in tables:
+        conn.execute('INSERT OR IGNORE INTO table_versions (table_name) VALUES (?)', (table,))
+        for action in ('insert', 'update', 'delete'):
+            conn.execute(f'CREATE TRIGGER IF NOT EXISTS {table}_version_{action} '
+                         f'AFTER {action.upper()} ON {table} BEGIN {_bump(table)} END')
+    for name in columns:
+        conn.execute('INSERT OR IGNORE INTO table_versions (table_name) VALUES (?)', (name,))
+        for trigger, event in _column_triggers(name).items():
+            conn.execute(f'CREATE TRIGGER IF NOT EXISTS {trigger} {event} BEGIN {_bump(name)} END')
+
+
+def drop_version_triggers(conn, tables=TRACKED_TABLES, columns=tuple(COLUMN_VERSIONS)):
+    """删除版本触发器（批量导入前使用，导入后再 ensure 并 bump）"""
+    for table in tables:
+        for action in ('insert', 'update', 'delete'):
+            conn.execute(f'DROP TRIGGER IF EXISTS {table}_version_{action}')
+    for name in columns:
+        for trigger in _column_triggers(name):
+            conn.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+
+
+def bump_versions(conn, tables=TRACKED_TABLES + tuple(COLUMN_VERSIONS)):
+    """手动让这些表（或列版本）的版本号加 1（绕过触发器批量写入之后调用），由调用方提交事务"""
+    conn.executemany('UPDATE table_versions SET version = version + 1 WHERE table_name = ?',
+                     [(table,) for table in tables])
+
+
+def get_versions(conn, tables):
+    """读取若干表的版本号，按 tables 的顺序返回元组；未跟踪的表为 None"""
+    placeholders = ', '.join('?' for _ in tables)
+    versions = dict(conn.execute(
+        f'SELECT table_name, version FROM table_versions WHERE table_name IN ({placeholders})',
+        tuple(tables)
+    ).fetchall())
+    return tuple(versions.get(table) for table in tables)
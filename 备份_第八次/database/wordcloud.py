@@ -0,0 +1,141 @@
+# database/wordcloud.py
+"""词云的词频表
+
+term_frequencies 保存文章、活动、课程中每个词出现的总次数。
+分词规则在 Python 里，而触发器要在任何连接上都能执行（sqlite3 命令行、脚本、恢复出来的备份），
+所以触发器只用纯 SQL 把变化的行的标题和正文记进 term_changes（插入记 +1，删除记 -1，更新两条都记），
+应用在读取词云前把积压的变化分词、合并进词频表。词云接口只需按词频取前 N 个。
+"""
+import re
+from collections import Counter
+
+# 英文停用词列表
+STOP_WORDS = {
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was',
+    'were',
+    'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may',
+    'might',
+    'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him', 'her', 'us',
+    'them',
+    'what', 'which', 'who', 'whom', 'whose', 'where', 'when', 'why', 'how', 'all', 'any', 'both', 'each', 'few',
+    'more',
+    'most', 'other', 'some', 'such', 'no', 'nor', 'not', 'only', 'own', 'same', 'so', 'than', 'too', 'very',
+    'can', 'just'
+}
+
+WORD_RE = re.compile(r'\b[a-zA-Z]{3,}\b')
+
+# 参与词频统计的表和列
+SOURCES = {
+    'articles': ('title', 'content'),
+    'events': ('title', 'description'),
+    'courses': ('title', 'description'),
+}
+
+
+def count_terms(*texts):
+    """分词并统计词频（只取 3 个字母以上的英文单词，去掉停用词）"""
+    counter = Counter()
+    for text in texts:
+        if text:
+            counter.update(word for word in WORD_RE.findall(text.lower()) if word not in STOP_WORDS)
+    return counter
+
+
+def _triggers(table, columns):
+    title, body = columns
+
+    def log(sign, row):
+        return (f'INSERT INTO term_changes (sign, title, body) '
+                f'VALUES ({sign}, {row}.{title}, {row}.{body});')
+
+    return [
+        f'CREATE TRIGGER IF NOT EXISTS {table}_terms_insert AFTER INSERT ON {table} '
+        f'BEGIN {log(1, "new")} END',
+        f'CREATE TRIGGER IF NOT EXISTS {table}_terms_delete AFTER DELETE ON {table} '
+        f'BEGIN {log(-1, "old")} END',
+        f"CREATE TRIGGER IF NOT EXISTS {table}_terms_update AFTER UPDATE OF {', '.join(columns)} ON {table} "
+        f'BEGIN {log(-1, "old")} {log(1, "new")} END',
+    ]
+
+
+def ensure_term_frequencies(conn):
+    """创建词频表、变化队列、索引和触发器（幂等），由调用方提交事务"""
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS term_frequencies (
+        term TEXT PRIMARY KEY,
+        freq INTEGER NOT NULL
+    ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_term_frequencies_freq ON term_frequencies (freq DESC)')
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS term_changes (
+        id INTEGER PRIMARY KEY,
+        sign INTEGER NOT NULL,
+        title TEXT,
+        body TEXT
+    )
+    ''')
+    for table, columns in SOURCES.items():
+        for ddl in _triggers(table, columns):
+            conn.execute(ddl)
+
+
+def drop_term_triggers(conn):
+    """删除词频触发器（批量导入前使用，导入后再 rebuild）"""
+    for table in SOURCES:
+        for action in ('insert', 'delete', 'update'):
+            conn.execute(f'DROP TRIGGER IF EXISTS {table}_terms_{action}')
+
+
+def rebuild_term_frequencies(conn):
+    """从原表重新统计全部词频，返回不同词的数量；由调用方提交事务"""
+    ensure_term_frequencies(conn)
+    counter = Counter()
+    for table, columns in SOURCES.items():
+        for row in conn.execute(f"SELECT {', '.join(columns)} FROM {table}"):
+            counter.update(count_terms(*row))
+    conn.execute('DELETE FROM term_frequencies')
+    conn.execute('DELETE FROM term_changes')
+    conn.executemany('INSERT INTO term_frequencies (term, freq) VALUES (?, ?)', counter.items())
+    return len(counter)
+
+
+def apply_term_changes(conn):
+    """把 term_changes 里积压的变化合并进词频表，返回处理的条数
+
+    在 BEGIN IMMEDIATE 事务里读取并删除队列，多个进程同时调用时每条变化只会被合并一次。
+    没有积压时不开写事务。
+    """
+    if conn.execute('SELECT 1 FROM term_changes LIMIT 1').fetchone() is None:
+        return 0
+
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        rows = conn.execute('SELECT id, sign, title, body FROM term_changes ORDER BY id').fetchall()
+        delta = Counter()
+        for _, sign, title, body in rows:
+            for term, count in count_terms(title, body).items():
+                delta[term] += sign * count
+        changed = [(term, count) for term, count in delta.items() if count]
+        conn.executemany('''
+            INSERT INTO term_frequencies (term, freq) VALUES (?, ?)
+            ON CONFLICT (term) DO UPDATE SET freq = freq + excluded.freq
+        ''', changed)
+        conn.executemany('DELETE FROM term_frequencies WHERE term = ? AND freq <= 0',
+                         [(term,) for term, count in changed if count < 0])
+        if rows:
+            conn.execute('DELETE FROM term_changes WHERE id <= ?', (rows[-1][0],))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(rows)
+
+
+def top_terms(conn, limit=30):
+    """先合并积压的变化，再取词频最高的 limit 个词，走 freq 索引"""
+    apply_term_changes(conn)
+    return conn.execute(
+        'SELECT term, freq FROM term_frequencies ORDER BY freq DESC LIMIT ?', (limit,)
+    ).fetchall()
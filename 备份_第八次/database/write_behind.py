@@ -0,0 +1,174 @@
+# database/write_behind.py
+"""高频"触碰"类更新的延迟批量写入
+
+登录时写 last_login 这类更新不需要立刻落盘：每次单独提交都要抢写锁、刷一次 WAL，
+登录高峰时会和改成绩、选课等写操作互相等待。这里先把更新记在内存里，
+由后台线程每隔 interval 秒（或积压超过 max_pending 条时提前）在一个事务里批量写入，
+进程退出时再写一次。线程的启动、fork 后的重建和写入流程在 database.background。
+
+两种更新：
+- touch：同一行同一列只保留最后一次的值（如 last_login、last_seen）
+- increment：同一行同一列的增量累加（如浏览次数）
+"""
+import atexit
+import re
+
+from flask import current_app
+
+from database.background import BackgroundFlusher
+
+IDENTIFIER_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def _check_identifier(name):
+    # 表名、列名会拼进 SQL，只允许普通标识符
+    if not IDENTIFIER_RE.match(name):
+        raise ValueError(f"非法的表名或列名: {name}")
+    return name
+
+
+class WriteBehindBuffer(BackgroundFlusher):
+    """内存中的待写更新 + 定时批量写入的后台线程（线程安全）"""
+
+    thread_name = 'write-behind'
+    failure_message = '延迟写入失败'
+
+    def __init__(self, database, pragmas=None, interval=5.0, max_pending=500):
+        self.max_pending = max_pending
+        super().__init__(database, pragmas, interval)
+
+    def _clear(self):
+        # (表, 列, 主键列) -> {主键值: 新值 / 增量}
+        self._touches = {}
+        self._increments = {}
+
+    # ---- 记录 ----
+
+    def touch(self, table, column, key, value, key_column='id'):
+        """记下 UPDATE table SET column = value WHERE key_column = key，同一行只保留最后一次"""
+        target = (_check_identifier(table), _check_identifier(column), _check_identifier(key_column))
+        self._start()
+        with self._lock:
+            self._touches.setdefault(target, {})[key] = value
+            pending = self._pending_locked()
+        self._maybe_wake(pending)
+
+    def increment(self, table, column, key, amount=1, key_column='id'):
+        """记下 column = column + amount，同一行的增量先在内存里累加"""
+        target = (_check_identifier(table), _check_identifier(column), _check_identifier(key_column))
+        self._start()
+        with self._lock:
+            rows = self._increments.setdefault(target, {})
+            rows[key] = rows.get(key, 0) + amount
+            pending = self._pending_locked()
+        self._maybe_wake(pending)
+
+    def _pending_locked(self):
+        return (sum(len(rows) for rows in self._touches.values())
+                + sum(len(rows) for rows in self._increments.values()))
+
+    def _maybe_wake(self, pending):
+        if pending >= self.max_pending:
+            self._wake()
+
+    # ---- 写入 ----
+
+    def _take(self):
+        touches, increments = self._touches, self._increments
+        if not touches and not increments:
+            return None
+        self._clear()
+        return touches, increments
+
+    def _write(self, conn, batch):
+        touches, increments = batch
+        rows = 0
+        for (table, column, key_column), values in touches.items():
+            conn.executemany(f'UPDATE {table} SET {column} = ? WHERE {key_column} = ?',
+                             [(value, key) for key, value in values.items()])
+            rows += len(values)
+        for (table, column, key_column), deltas in increments.items():
+            conn.executemany(
+                f'UPDATE {table} SET {column} = COALESCE({column}, 0) + ? WHERE {key_column} = ?',
+                [(delta, key) for key, delta in deltas.items()])
+            rows += len(deltas)
+        return rows
+
+    def _requeue(self, batch):
+        # 写入失败的更新放回去；期间又有新值的以新值为准，增量则相加
+        touches, increments = batch
+        for target, values in touches.items():
+            current = self._touches.setdefault(target, {})
+            for key, value in values.items():
+                current.setdefault(key, value)
+        for target, deltas in increments.items():
+            current = self._increments.setdefault(target, {})
+            for key, delta in deltas.items():
+                current[key] = current.get(key, 0) + delta
+
+    def _stats(self):
+        return {
+            'pending': self._pending_locked(),
+            'max_pending': self.max_pending,
+            'rows_flushed': self.written,
+        }
+
+def _buffer():
+    return current_app.extensions.get('write_behind')
+
+
+def touch(table, column, key, value, key_column='id'):
+    """延迟写入一次"触碰"更新；没有启用缓冲时立即写入当前请求的连接"""
+    buffer = _buffer()
+    if buffer is not None:
+        buffer.touch(table, column, key, value, key_column)
+        return
+
+    from database.connection import get_connection
+    conn = get_connection()
+    conn.execute(f'UPDATE {_check_identifier(table)} SET {_check_identifier(column)} = ? '
+                 f'WHERE {_check_identifier(key_column)} = ?', (value, key))
+    conn.commit()
+
+
+def increment(table, column, key, amount=1, key_column='id'):
+    """延迟写入一次计数累加；没有启用缓冲时立即写入当前请求的连接"""
+    buffer = _buffer()
+    if buffer is not None:
+        buffer.increment(table, column, key, amount, key_column)
+        return
+
+    from database.connection import get_connection
+    conn = get_connection()
+    column = _check_identifier(column)
+    conn.execute(f'UPDATE {_check_identifier(table)} SET {column} = COALESCE({column}, 0) + ? '
+                 f'WHERE {_check_identifier(key_column)} = ?', (amount, key))
+    conn.commit()
+
+
+def flush_pending():
+    """立即写入积压的更新（读取依赖这些列的统计前调用）"""
+    buffer = _buffer()
+    return buffer.flush() if buffer is not None else 0
+
+
+def get_write_behind_stats():
+    buffer = _buffer()
+    return buffer.stats() if buffer is not None else {}
+
+
+def init_app(app):
+    """启用延迟写入时创建缓冲（后台线程在第一次记录时启动），进程退出时写入剩余的更新"""
+    if not app.config.get('WRITE_BEHIND_ENABLED', True):
+        return None
+
+    from database.connection import resolve_pragmas
+    buffer = WriteBehindBuffer(
+        app.config['DATABASE'],
+        pragmas=resolve_pragmas(app.config),
+        interval=app.config.get('WRITE_BEHIND_INTERVAL', 5.0),
+        max_pending=app.config.get('WRITE_BEHIND_MAX_PENDING', 500),
+    )
+    app.extensions['write_behind'] = buffer
+    atexit.register(buffer.close)
+    return buffer
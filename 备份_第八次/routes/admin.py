@@ -1,14 +1,28 @@
 # routes/admin.py
 import os
-import re
 import json
 import sqlite3
-from collections import Counter
 from datetime import datetime, timedelta
-from flask import Blueprint, render_template, session, redirect, url_for, request, jsonify, current_app
+from flask import Blueprint, render_template, session, redirect, url_for, request, jsonify, current_app, send_file
 
 # 导入现有的函数
+from database.analytics import get_snapshot
+from database.audit import flush_audit_events, get_audit_stats, log_event
+from database.backup import BackupBusyError, get_backup_manager, get_backup_summary
+from database.connection import get_pool_stats, resolve_pragmas
+from database.export import FORMATS, parse_export_args, stream_export
 from database.models import get_db_connection
+from database.rollups import get_activity, parse_range
+from database.wordcloud import top_terms
+from database.write_behind import get_write_behind_stats
+from routes.articles import render_article_list
+from utils.assets import get_asset_stats
+from utils.compression import get_compression_stats
+from utils.fragment_cache import get_fragment_cache_stats
+from utils.http_cache import parse_timestamp, versioned_json
+from utils.passwords import BUSY_MESSAGE, PasswordBusyError, get_password_stats, make_password_hash
+from utils.sessions import get_session_stats
+from utils.template_cache import get_template_cache_stats
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -18,14 +32,13 @@ admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 def dashboard():
     """管理员仪表板"""
     if 'role' in session and session['role'] == 'platform_admin':
-        # 使用现有的get_articles函数
-        from database.models import get_articles
-        articles = get_articles()
+        # 只渲染第一页文章（有缓存），后面的页由“加载更多”按游标获取
+        article_list = render_article_list(show_admin_actions=True)
 
         return render_template(
             'pages/admin_dashboard/admin_dashboard.html',
             username=session['username'],
-            articles=articles
+            article_list=article_list
         )
     return redirect(url_for('auth.login'))
 
@@ -69,8 +82,7 @@ def security_center():
 def api_get_users():
     """获取用户列表API"""
     if 'role' in session and session['role'] == 'platform_admin':
-        users = get_users()
-        return jsonify([dict(user) for user in users])
+        return versioned_json(('users',), lambda: [dict(user) for user in get_users()])
     return jsonify({'error': 'Unauthorized'}), 401
 
 
@@ -79,14 +91,19 @@ def api_create_user():
     """创建用户API"""
     if 'role' in session and session['role'] == 'platform_admin':
         data = request.json
-        success = create_user(
-            username=data['username'],
-            password=data['password'],
-            role=data['role'],
-            full_name=data.get('full_name', ''),
-            org_name=data.get('org_name', '')
-        )
+        try:
+            success = create_user(
+                username=data['username'],
+                password=data['password'],
+                role=data['role'],
+                full_name=data.get('full_name', ''),
+                org_name=data.get('org_name', '')
+            )
+        except PasswordBusyError as e:
+            print(f"创建用户排队: {e}")
+            return jsonify({'error': BUSY_MESSAGE}), 503
         if success:
+            log_event('User Created', f"创建用户 {data['username']}（{data['role']}）")
             return jsonify({'message': '用户创建成功'})
         return jsonify({'error': '用户创建失败'}), 400
     return jsonify({'error': 'Unauthorized'}), 401
@@ -105,6 +122,7 @@ def api_update_user(user_id):
             org_name=data.get('org_name', '')
         )
         if success:
+            log_event('User Updated', f"更新用户 {user_id}: {data['username']}（{data['role']}）")
             return jsonify({'message': '用户更新成功'})
         return jsonify({'error': '用户更新失败'}), 400
     return jsonify({'error': 'Unauthorized'}), 401
@@ -116,6 +134,7 @@ def api_delete_user(user_id):
     if 'role' in session and session['role'] == 'platform_admin':
         success = delete_user(user_id)
         if success:
+            log_event('User Deleted', f'删除用户 {user_id}')
             return jsonify({'message': '用户删除成功'})
         return jsonify({'error': '用户删除失败'}), 400
     return jsonify({'error': 'Unauthorized'}), 401
@@ -143,6 +162,7 @@ def api_update_article(article_id):
             content=data['content']
         )
         if success:
+            log_event('Article Updated', f"编辑文章 {article_id}: {data['title']}")
             return jsonify({'message': '文章更新成功'})
         return jsonify({'error': '文章更新失败'}), 400
     return jsonify({'error': 'Unauthorized'}), 401
@@ -154,6 +174,7 @@ def api_delete_article(article_id):
     if 'role' in session and session['role'] == 'platform_admin':
         success = delete_article(article_id)
         if success:
+            log_event('Article Deleted', f'删除文章 {article_id}')
             return jsonify({'message': '文章删除成功'})
         return jsonify({'error': '文章删除失败'}), 400
     return jsonify({'error': 'Unauthorized'}), 401
@@ -164,12 +185,13 @@ def api_system_settings():
     """系统设置API"""
     if 'role' in session and session['role'] == 'platform_admin':
         if request.method == 'GET':
-            settings = get_system_settings()
-            return jsonify(settings)
+            return versioned_json(('system_settings',), get_system_settings,
+                                  last_modified=get_system_settings_modified)
         elif request.method == 'PUT':
             data = request.json
             success = update_system_settings(data)
             if success:
+                log_event('Settings Updated', '修改系统设置: ' + ', '.join(sorted(data)))
                 return jsonify({'message': '系统设置更新成功'})
             return jsonify({'error': '系统设置更新失败'}), 400
     return jsonify({'error': 'Unauthorized'}), 401
@@ -177,9 +199,14 @@ def api_system_settings():
 
 @admin_bp.route('/api/analytics/data')
 def api_analytics_data():
-    """获取统计数据API"""
+    """获取统计数据API - ?range= 为天数或 all，决定 activity 曲线的时间范围"""
     if 'role' in session and session['role'] == 'platform_admin':
-        data = get_analytics_data()
+        try:
+            days = parse_range(request.args.get('range'))
+        except ValueError:
+            return jsonify({'error': 'Invalid range'}), 400
+
+        data = get_analytics_data(days)
         return jsonify(data)
     return jsonify({'error': 'Unauthorized'}), 401
 
@@ -197,8 +224,7 @@ def api_analytics_wordcloud():
 def api_analytics_users_table():
     """获取用户表格数据API"""
     if 'role' in session and session['role'] == 'platform_admin':
-        users_data = get_users_table_data()
-        return jsonify(users_data)
+        return versioned_json(('users',), get_users_table_data)
     return jsonify({'error': 'Unauthorized'}), 401
 
 
@@ -206,8 +232,7 @@ def api_analytics_users_table():
 def api_analytics_articles_table():
     """获取文章表格数据API"""
     if 'role' in session and session['role'] == 'platform_admin':
-        articles_data = get_articles_table_data()
-        return jsonify(articles_data)
+        return versioned_json(('articles', 'users.names'), get_articles_table_data)
     return jsonify({'error': 'Unauthorized'}), 401
 
 
@@ -215,8 +240,7 @@ def api_analytics_articles_table():
 def api_analytics_events_table():
     """获取事件表格数据API"""
     if 'role' in session and session['role'] == 'platform_admin':
-        events_data = get_events_table_data()
-        return jsonify(events_data)
+        return versioned_json(('events', 'event_participants', 'users.names'), get_events_table_data)
     return jsonify({'error': 'Unauthorized'}), 401
 
 
@@ -224,8 +248,7 @@ def api_analytics_events_table():
 def api_analytics_courses_table():
     """获取课程表格数据API"""
     if 'role' in session and session['role'] == 'platform_admin':
-        courses_data = get_courses_table_data()
-        return jsonify(courses_data)
+        return versioned_json(('courses', 'course_enrollments', 'users.names'), get_courses_table_data)
     return jsonify({'error': 'Unauthorized'}), 401
 
 
@@ -233,11 +256,72 @@ def api_analytics_courses_table():
 def api_security_logs():
     """获取安全日志API"""
     if 'role' in session and session['role'] == 'platform_admin':
+        # 先写入队列里还没落库的审计事件，刚发生的操作也能看到
+        flush_audit_events()
         logs = get_security_logs()
         return jsonify(logs)
     return jsonify({'error': 'Unauthorized'}), 401
 
 
+@admin_bp.route('/api/security/logs/export')
+def api_export_security_logs():
+    """流式导出安全日志API - ?format=csv|ndjson&columns=&since=&until=&limit="""
+    if 'role' in session and session['role'] == 'platform_admin':
+        return export_response('security_logs')
+    return jsonify({'error': 'Unauthorized'}), 401
+
+
+@admin_bp.route('/api/analytics/<dataset>/export')
+def api_export_analytics_table(dataset):
+    """流式导出统计表格API - dataset 为 users / articles / events / courses，参数同安全日志导出"""
+    if 'role' in session and session['role'] == 'platform_admin':
+        if dataset not in ('users', 'articles', 'events', 'courses'):
+            return jsonify({'error': 'Unknown dataset'}), 404
+        return export_response(dataset)
+    return jsonify({'error': 'Unauthorized'}), 401
+
+
+@admin_bp.route('/api/system/status')
+def api_system_status():
+    """获取系统运行状态API"""
+    if 'role' in session and session['role'] == 'platform_admin':
+        status = get_system_status()
+        return jsonify(status)
+    return jsonify({'error': 'Unauthorized'}), 401
+
+
+@admin_bp.route('/api/system/backup', methods=['GET', 'POST'])
+def api_system_backup():
+    """数据库备份API - POST 开始一次在线备份，GET 查看进度和备份文件列表"""
+    if 'role' in session and session['role'] == 'platform_admin':
+        manager = get_backup_manager()
+        if request.method == 'POST':
+            try:
+                job = manager.start('manual')
+            except BackupBusyError as e:
+                return jsonify({'error': str(e)}), 409
+            log_event('Backup Started', f"开始数据库备份 {job['id']}")
+            return jsonify({'message': '备份已开始', 'job': job}), 202
+
+        return jsonify({
+            'current': manager.status(),
+            'backups': [{k: v for k, v in item.items() if k != 'mtime'} for item in manager.list_backups()],
+            'interval_days': manager.interval_days(),
+        })
+    return jsonify({'error': 'Unauthorized'}), 401
+
+
+@admin_bp.route('/api/system/backup/<name>')
+def api_download_backup(name):
+    """下载备份文件API（文件直接交给服务器发送，不读进内存）"""
+    if 'role' in session and session['role'] == 'platform_admin':
+        path = get_backup_manager().path_of(name)
+        if path is None:
+            return jsonify({'error': 'Backup not found'}), 404
+        return send_file(path, as_attachment=True, download_name=name, conditional=True)
+    return jsonify({'error': 'Unauthorized'}), 401
+
+
 @admin_bp.route('/api/database/tables')
 def api_database_tables():
     """获取数据库表信息API"""
@@ -261,7 +345,12 @@ def api_database_execute():
     """执行SQL语句API"""
     if 'role' in session and session['role'] == 'platform_admin':
         data = request.json
-        result = execute_sql(data.get('sql', ''))
+        sql = data.get('sql', '')
+        result = execute_sql(sql)
+        if 'error' in result:
+            log_event('SQL Execution Failed', f"{result['error']}: {sql}")
+        else:
+            log_event('SQL Executed', sql)
         return jsonify(result)
     return jsonify({'error': 'Unauthorized'}), 401
 
@@ -269,34 +358,36 @@ def api_database_execute():
 # 数据库操作函数
 def get_users():
     """获取所有用户"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT id, username, role, full_name, org_name, created_at
-            FROM users 
-            ORDER BY created_at DESC
-        ''')
-        users = cursor.fetchall()
-        conn.close()
-        return users
-    except Exception as e:
-        print(f"Error fetching users: {e}")
-        return []
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT id, username, role, full_name, org_name, created_at
+        FROM users 
+        ORDER BY created_at DESC
+    ''')
+    users = cursor.fetchall()
+    conn.close()
+    return users
 
 
 def create_user(username, password, role, full_name="", org_name=""):
     """创建新用户"""
     try:
+        # 只保存 bcrypt 哈希，不保存明文
+        password_hash = make_password_hash(password)
+
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute(
             'INSERT INTO users (username, password, role, full_name, org_name) VALUES (?, ?, ?, ?, ?)',
-            (username, password, role, full_name, org_name)
+            (username, password_hash, role, full_name, org_name)
         )
         conn.commit()
         conn.close()
         return True
+    except PasswordBusyError:
+        # 哈希线程池忙不是创建失败，交给调用方返回 503
+        raise
     except Exception as e:
         print(f"Error creating user: {e}")
         return False
@@ -383,50 +474,29 @@ def delete_article(article_id):
 
 
 def get_system_settings():
-    """获取系统设置"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+    """获取系统设置（表和默认值由数据库迁移创建）"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
 
-        # 创建系统设置表（如果不存在）
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS system_settings (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            setting_key TEXT UNIQUE NOT NULL,
-            setting_value TEXT,
-            description TEXT,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
+    # 获取所有设置
+    cursor.execute('SELECT setting_key, setting_value, description FROM system_settings')
+    settings_data = cursor.fetchall()
+    conn.close()
 
-        # 插入默认设置（如果不存在）
-        default_settings = [
-            ('system_theme', 'default', '系统主题'),
-            ('background_color', '#ffffff', '背景颜色'),
-            ('layout_style', 'standard', '布局样式'),
-            ('max_articles_per_page', '10', '每页文章数'),
-            ('allow_registration', 'true', '允许用户注册'),
-            ('maintenance_mode', 'false', '维护模式')
-        ]
-
-        for key, value, description in default_settings:
-            cursor.execute('''
-            INSERT OR IGNORE INTO system_settings (setting_key, setting_value, description)
-            VALUES (?, ?, ?)
-            ''', (key, value, description))
+    settings = {row['setting_key']: row['setting_value'] for row in settings_data}
+    return settings
 
-        conn.commit()
 
-        # 获取所有设置
-        cursor.execute('SELECT setting_key, setting_value, description FROM system_settings')
-        settings_data = cursor.fetchall()
+def get_system_settings_modified():
+    """系统设置最后一次修改的时间（UTC），供 Last-Modified 使用"""
+    try:
+        conn = get_db_connection()
+        row = conn.execute('SELECT MAX(updated_at) FROM system_settings').fetchone()
         conn.close()
-
-        settings = {row['setting_key']: row['setting_value'] for row in settings_data}
-        return settings
+        return parse_timestamp(row[0])
     except Exception as e:
-        print(f"Error getting system settings: {e}")
-        return {}
+        print(f"Error getting system settings modified time: {e}")
+        return None
 
 
 def update_system_settings(settings):
@@ -449,138 +519,34 @@ def update_system_settings(settings):
         return False
 
 
-def get_analytics_data():
-    """获取统计数据"""
+def get_analytics_data(days=30):
+    """获取统计数据 - 全站计数取缓存的快照，时间范围内的活动曲线取按小时/按天的汇总表
+
+    活跃用户数依赖 last_login，而登录时间由各 worker 的延迟写入缓冲批量写入，
+    所以最多比实际晚 WRITE_BEHIND_INTERVAL 秒（加上快照缓存的 TTL）。这里不主动写入缓冲：
+    请求线程里的写入要抢写锁，还会改变 users 的版本号让快照缓存失效，也只能写当前 worker 的缓冲。
+    """
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # 基础统计
-        cursor.execute("SELECT COUNT(*) FROM users WHERE role = 'student'")
-        student_count = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM users WHERE role = 'teacher'")
-        teacher_count = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM users WHERE role = 'community_org'")
-        organizer_count = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM articles")
-        article_count = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM events")
-        event_count = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM courses")
-        course_count = cursor.fetchone()[0]
-
-        # 用户活跃度统计（简化版）
-        cursor.execute("SELECT COUNT(*) FROM users WHERE last_login IS NOT NULL")
-        active_users = cursor.fetchone()[0]
-
-        # 文章分类统计
-        cursor.execute('''
-        SELECT 
-            CASE 
-                WHEN LENGTH(content) < 100 THEN 'Short story'
-                WHEN LENGTH(content) < 500 THEN 'Medium-length story' 
-                ELSE 'Long story'
-            END as category,
-            COUNT(*) as count
-        FROM articles 
-        GROUP BY category
-        ''')
-        article_categories = cursor.fetchall()
-
+        snapshot = get_snapshot(conn, ttl=current_app.config.get('ANALYTICS_CACHE_TTL', 60))
+        activity = get_activity(conn, days)
         conn.close()
 
-        return {
-            'user_stats': {
-                'students': student_count,
-                'teachers': teacher_count,
-                'organizers': organizer_count,
-                'total': student_count + teacher_count + organizer_count,
-                'active': active_users
-            },
-            'content_stats': {
-                'articles': article_count,
-                'events': event_count,
-                'courses': course_count,
-                'recent_articles': 0,
-                'recent_events': 0
-            },
-            'active_users': [
-                {'role': 'student', 'count': student_count},
-                {'role': 'teacher', 'count': teacher_count},
-                {'role': 'community_org', 'count': organizer_count}
-            ],
-            'article_categories': [dict(row) for row in article_categories]
-        }
+        # 快照是缓存里的共享对象，不能直接修改
+        data = dict(snapshot)
+        data['activity'] = dict(activity, range=days or 'all')
+        return data
     except Exception as e:
         print(f"Error getting analytics data: {e}")
         return {}
 
 
 def get_wordcloud_data():
-    """获取词云数据 - 简化版本，不使用jieba"""
+    """获取词云数据 - 合并触发器记下的变化后读取词频表"""
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # 英文停用词列表
-        stop_words = {
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was',
-            'were',
-            'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may',
-            'might',
-            'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him', 'her', 'us',
-            'them',
-            'what', 'which', 'who', 'whom', 'whose', 'where', 'when', 'why', 'how', 'all', 'any', 'both', 'each', 'few',
-            'more',
-            'most', 'other', 'some', 'such', 'no', 'nor', 'not', 'only', 'own', 'same', 'so', 'than', 'too', 'very',
-            'can', 'just'
-        }
-
-        all_text = ""
-
-        # 从文章表中获取标题和内容
-        cursor.execute("SELECT title, content FROM articles")
-        articles = cursor.fetchall()
-        for article in articles:
-            if article['title']:
-                all_text += f" {article['title']}"
-            if article['content']:
-                all_text += f" {article['content']}"
-
-        # 从事件表中获取标题和描述
-        cursor.execute("SELECT title, description FROM events")
-        events = cursor.fetchall()
-        for event in events:
-            if event['title']:
-                all_text += f" {event['title']}"
-            if event['description']:
-                all_text += f" {event['description']}"
-
-        # 从课程表中获取标题和描述
-        cursor.execute("SELECT title, description FROM courses")
-        courses = cursor.fetchall()
-        for course in courses:
-            if course['title']:
-                all_text += f" {course['title']}"
-            if course['description']:
-                all_text += f" {course['description']}"
-
-        # 简单的英文文本处理
-        words = re.findall(r'\b[a-zA-Z]{3,}\b', all_text.lower())
-
-        # 统计词频
-        word_freq = Counter()
-        for word in words:
-            if word not in stop_words:
-                word_freq[word] += 1
-
-        # 获取前30个最常见的词
-        top_words = word_freq.most_common(30)
+        top_words = top_terms(conn, 30)
+        conn.close()
 
         # 转换为词云需要的格式
         wordcloud_data = []
@@ -593,8 +559,6 @@ def get_wordcloud_data():
                 'freq': freq
             })
 
-        conn.close()
-
         # 如果数据为空，返回默认数据
         if not wordcloud_data:
             wordcloud_data = get_default_wordcloud_data()
@@ -631,35 +595,6 @@ def get_security_logs():
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        # 创建日志表（如果不存在）
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS security_logs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            action TEXT NOT NULL,
-            description TEXT,
-            ip_address TEXT,
-            user_agent TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-        ''')
-
-        # 插入一些示例日志（如果表为空）
-        cursor.execute("SELECT COUNT(*) FROM security_logs")
-        if cursor.fetchone()[0] == 0:
-            sample_logs = [
-                (1, '用户登录', '管理员登录系统', '192.168.1.100', 'Mozilla/5.0...'),
-                (None, '系统启动', '应用程序启动', '127.0.0.1', 'System'),
-                (2, '用户注册', '新用户注册', '192.168.1.101', 'Mozilla/5.0...'),
-                (1, '文章创建', '创建新文章', '192.168.1.100', 'Mozilla/5.0...')
-            ]
-            cursor.executemany('''
-            INSERT INTO security_logs (user_id, action, description, ip_address, user_agent)
-            VALUES (?, ?, ?, ?, ?)
-            ''', sample_logs)
-            conn.commit()
-
         # 获取最近的日志
         cursor.execute('''
         SELECT sl.*, u.username 
@@ -677,6 +612,29 @@ def get_security_logs():
         return []
 
 
+def export_response(dataset):
+    """按查询参数生成流式导出响应，参数不合法时返回 400"""
+
+    try:
+        options = parse_export_args(dataset, request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    mimetype, extension = FORMATS[options['format']]
+    log_event('Data Exported', f"导出 {dataset}（{options['format']}）")
+    if dataset == 'security_logs':
+        flush_audit_events()
+    filename = f"{dataset}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    # 生成器在请求结束后才被消费，数据库路径和 PRAGMA 先在这里取好
+    rows = stream_export(current_app.config['DATABASE'], resolve_pragmas(current_app.config),
+                         dataset, options)
+    return current_app.response_class(
+        rows,
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
+
+
 def get_database_tables():
     """获取数据库表信息"""
     try:
@@ -756,175 +714,226 @@ def execute_sql(sql):
 
 def get_users_table_data():
     """获取用户表格数据"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT 
-                id, 
-                username, 
-                role, 
-                full_name, 
-                org_name, 
-                created_at,
-                last_login
-            FROM users 
-            ORDER BY created_at DESC
-            LIMIT 100
-        ''')
-        users = cursor.fetchall()
-        conn.close()
-
-        # 转换为字典列表
-        users_data = []
-        for user in users:
-            users_data.append({
-                'id': user['id'],
-                'username': user['username'],
-                'role': user['role'],
-                'full_name': user['full_name'] or 'N/A',
-                'org_name': user['org_name'] or 'N/A',
-                'registration_date': user['created_at'],
-                'last_login': user['last_login'] or 'Never'
-            })
-
-        return users_data
-    except Exception as e:
-        print(f"Error fetching users table data: {e}")
-        return []
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT 
+            id, 
+            username, 
+            role, 
+            full_name, 
+            org_name, 
+            created_at,
+            last_login
+        FROM users 
+        ORDER BY created_at DESC
+        LIMIT 100
+    ''')
+    users = cursor.fetchall()
+    conn.close()
+
+    # 转换为字典列表
+    users_data = []
+    for user in users:
+        users_data.append({
+            'id': user['id'],
+            'username': user['username'],
+            'role': user['role'],
+            'full_name': user['full_name'] or 'N/A',
+            'org_name': user['org_name'] or 'N/A',
+            'registration_date': user['created_at'],
+            'last_login': user['last_login'] or 'Never'
+        })
+
+    return users_data
 
 
 def get_articles_table_data():
     """获取文章表格数据"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT 
-                a.id,
-                a.title,
-                u.full_name as author_name,
-                LENGTH(a.content) as content_length,
-                a.created_at,
-                a.updated_at,
-                0 as views  -- 暂时设为0，实际应用中可以从统计表获取
-            FROM articles a
-            LEFT JOIN users u ON a.author_id = u.id
-            ORDER BY a.created_at DESC
-            LIMIT 100
-        ''')
-        articles = cursor.fetchall()
-        conn.close()
-
-        # 转换为字典列表
-        articles_data = []
-        for article in articles:
-            articles_data.append({
-                'id': article['id'],
-                'title': article['title'],
-                'author': article['author_name'] or 'Unknown',
-                'content_length': f"{article['content_length']} chars",
-                'created_at': article['created_at'],
-                'updated_at': article['updated_at'],
-                'views': article['views']
-            })
-
-        return articles_data
-    except Exception as e:
-        print(f"Error fetching articles table data: {e}")
-        return []
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT 
+            a.id,
+            a.title,
+            u.full_name as author_name,
+            LENGTH(a.content) as content_length,
+            a.created_at,
+            a.updated_at,
+            0 as views  -- 暂时设为0，实际应用中可以从统计表获取
+        FROM articles a
+        LEFT JOIN users u ON a.author_id = u.id
+        ORDER BY a.created_at DESC
+        LIMIT 100
+    ''')
+    articles = cursor.fetchall()
+    conn.close()
+
+    # 转换为字典列表
+    articles_data = []
+    for article in articles:
+        articles_data.append({
+            'id': article['id'],
+            'title': article['title'],
+            'author': article['author_name'] or 'Unknown',
+            'content_length': f"{article['content_length']} chars",
+            'created_at': article['created_at'],
+            'updated_at': article['updated_at'],
+            'views': article['views']
+        })
+
+    return articles_data
 
 
 def get_events_table_data():
     """获取事件表格数据"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT 
-                e.id,
-                e.title as event_name,
-                u.full_name as organizer_name,
-                e.event_date,
-                e.location,
-                e.max_participants,
-                COALESCE(ep.participant_count, 0) as registered_count
-            FROM events e
-            LEFT JOIN users u ON e.organizer_id = u.id
-            LEFT JOIN (
-                SELECT event_id, COUNT(*) as participant_count 
-                FROM event_participants 
-                GROUP BY event_id
-            ) ep ON e.id = ep.event_id
-            ORDER BY e.event_date DESC
-            LIMIT 100
-        ''')
-        events = cursor.fetchall()
-        conn.close()
-
-        # 转换为字典列表
-        events_data = []
-        for event in events:
-            events_data.append({
-                'id': event['id'],
-                'event_name': event['event_name'],
-                'organizer': event['organizer_name'] or 'Unknown',
-                'date': event['event_date'],
-                'location': event['location'] or 'N/A',
-                'max_participants': event['max_participants'],
-                'registered': event['registered_count']
-            })
-
-        return events_data
-    except Exception as e:
-        print(f"Error fetching events table data: {e}")
-        return []
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT 
+            e.id,
+            e.title as event_name,
+            u.full_name as organizer_name,
+            e.event_date,
+            e.location,
+            e.max_participants,
+            COALESCE(ep.participant_count, 0) as registered_count
+        FROM events e
+        LEFT JOIN users u ON e.organizer_id = u.id
+        LEFT JOIN (
+            SELECT event_id, COUNT(*) as participant_count 
+            FROM event_participants 
+            GROUP BY event_id
+        ) ep ON e.id = ep.event_id
+        ORDER BY e.event_date DESC
+        LIMIT 100
+    ''')
+    events = cursor.fetchall()
+    conn.close()
+
+    # 转换为字典列表
+    events_data = []
+    for event in events:
+        events_data.append({
+            'id': event['id'],
+            'event_name': event['event_name'],
+            'organizer': event['organizer_name'] or 'Unknown',
+            'date': event['event_date'],
+            'location': event['location'] or 'N/A',
+            'max_participants': event['max_participants'],
+            'registered': event['registered_count']
+        })
+
+    return events_data
 
 
 def get_courses_table_data():
     """获取课程表格数据"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT 
+            c.id,
+            c.title as course_name,
+            u.full_name as teacher_name,
+            COALESCE(cs.total_students, 0) as student_count,
+            c.created_at,
+            'Active' as status,  -- 简化状态
+            COALESCE(cs.score_sum / NULLIF(cs.score_count, 0), 0) as rating
+        FROM courses c
+        LEFT JOIN users u ON c.teacher_id = u.id
+        LEFT JOIN course_stats cs ON c.id = cs.course_id
+        ORDER BY c.created_at DESC
+        LIMIT 100
+    ''')
+    courses = cursor.fetchall()
+    conn.close()
+
+    # 转换为字典列表
+    courses_data = []
+    for course in courses:
+        courses_data.append({
+            'id': course['id'],
+            'course_name': course['course_name'],
+            'teacher': course['teacher_name'] or 'Unknown',
+            'student_count': course['student_count'],
+            'created_at': course['created_at'],
+            'status': course['status'],
+            'rating': f"{course['rating']:.1f}" if course['rating'] else 'N/A'
+        })
+
+    return courses_data
+
+def _format_size(size):
+    """把字节数格式化成 KB / MB / GB"""
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def _format_uptime(seconds):
+    days, seconds = divmod(int(seconds), 86400)
+    hours, seconds = divmod(seconds, 3600)
+    minutes = seconds // 60
+    return f"{days} days {hours} hours {minutes} minutes"
+
+
+def get_system_status():
+    """获取系统运行状态：请求速率、各路由的查询数、慢查询、数据库文件和连接池状态"""
+
+    stats = current_app.extensions.get('query_stats')
+    status = stats.snapshot() if stats else {}
+    if stats:
+        status['uptime'] = _format_uptime(status['uptime_seconds'])
+
+    # 数据库文件和 WAL 文件大小
+    db_path = current_app.config['DATABASE']
+    db_size = os.path.getsize(db_path) if os.path.exists(db_path) else 0
+    wal_size = os.path.getsize(db_path + '-wal') if os.path.exists(db_path + '-wal') else 0
+    last_backup, current_backup = get_backup_summary()
+    status.update({
+        'db_size': _format_size(db_size),
+        'db_size_bytes': db_size,
+        'wal_size': _format_size(wal_size),
+        'wal_size_bytes': wal_size,
+        'pool': get_pool_stats(),
+        'password_hashing': get_password_stats(),
+        'write_behind': get_write_behind_stats(),
+        'audit': get_audit_stats(),
+        'sessions': get_session_stats(),
+        'fragment_cache': get_fragment_cache_stats(),
+        'templates': get_template_cache_stats(),
+        'compression': get_compression_stats(),
+        'static_assets': get_asset_stats(),
+        'last_backup': last_backup,
+        'backup': current_backup,
+    })
+
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
-        cursor.execute('''
-            SELECT 
-                c.id,
-                c.title as course_name,
-                u.full_name as teacher_name,
-                COALESCE(ce.student_count, 0) as student_count,
-                c.created_at,
-                'Active' as status,  -- 简化状态
-                COALESCE(ce.avg_score, 0) as rating
-            FROM courses c
-            LEFT JOIN users u ON c.teacher_id = u.id
-            LEFT JOIN (
-                SELECT 
-                    course_id, 
-                    COUNT(*) as student_count,
-                    AVG(score) as avg_score
-                FROM course_enrollments 
-                GROUP BY course_id
-            ) ce ON c.id = ce.course_id
-            ORDER BY c.created_at DESC
-            LIMIT 100
-        ''')
-        courses = cursor.fetchall()
+        # 只统计表的数量，不逐表 COUNT(*)（大库上每次轮询都要全表扫描），不含 FTS 全文索引的虚拟表和影子表
+        cursor.execute(r"""
+            SELECT COUNT(*) FROM sqlite_master
+            WHERE type='table' AND name NOT LIKE 'sqlite_%' AND name NOT LIKE '%\_fts%' ESCAPE '\'
+        """)
+        table_count = cursor.fetchone()[0]
         conn.close()
+        status['table_count'] = str(table_count)
+    except Exception as e:
+        print(f"Error getting system status: {e}")
 
-        # 转换为字典列表
-        courses_data = []
-        for course in courses:
-            courses_data.append({
-                'id': course['id'],
-                'course_name': course['course_name'],
-                'teacher': course['teacher_name'] or 'Unknown',
-                'student_count': course['student_count'],
-                'created_at': course['created_at'],
-                'status': course['status'],
-                'rating': f"{course['rating']:.1f}" if course['rating'] else 'N/A'
-            })
+    # 服务器负载（只在支持的平台上提供）
+    if hasattr(os, 'getloadavg'):
+        load = os.getloadavg()[0] / (os.cpu_count() or 1) * 100
+        status['server_load'] = f"{load:.0f}%"
+    try:
+        import resource
+        rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        status['memory_usage'] = f"{rss_mb:.0f} MB (peak RSS)"
+    except ImportError:
+        pass
 
-        return courses_data
-    except Exception as e:
-        print(f"Error fetching courses table data: {e}")
-        return []
\ No newline at end of file
+    return status
@@ -0,0 +1,67 @@
+# routes/articles.py
+from flask import Blueprint, render_template, request, session, jsonify
+from markupsafe import Markup
+from database.models import get_articles_page, get_article_page_size, get_db_connection, MAX_ARTICLES_PER_PAGE
+from utils.fragment_cache import cached_fragment
+
+articles_bp = Blueprint('articles', __name__, url_prefix='/articles')
+
+# 文章列表片段依赖的数据：文章本身和作者名
+ARTICLE_LIST_VERSIONS = ('articles', 'users.names')
+
+
+def render_article_list(cursor=None, limit=None, show_admin_actions=False):
+    """渲染一页文章列表的 HTML 片段（按文章和作者名的版本号缓存）；游标无效时抛出 ValueError"""
+    from database.table_versions import get_versions
+
+    limit = max(1, min(limit or get_article_page_size(), MAX_ARTICLES_PER_PAGE))
+    versions = get_versions(get_db_connection(), ARTICLE_LIST_VERSIONS)
+
+    def render():
+        articles, next_cursor = get_articles_page(cursor, limit)
+        return render_template(
+            'pages/article_list.html',
+            articles=articles,
+            next_cursor=next_cursor,
+            show_admin_actions=show_admin_actions,
+        )
+
+    return Markup(cached_fragment('article_list', versions, (cursor, limit, bool(show_admin_actions)), render))
+
+
+def _page_args():
+    """从查询参数读取游标和每页条数"""
+    cursor = request.args.get('cursor') or None
+    limit = request.args.get('limit', type=int)
+    return cursor, limit
+
+
+@articles_bp.route('/api')
+def api_articles():
+    """文章分页API - 返回一页文章和下一页的游标"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    cursor, limit = _page_args()
+    try:
+        articles, next_cursor = get_articles_page(cursor, limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'articles': [dict(article) for article in articles],
+        'next_cursor': next_cursor,
+    })
+
+
+@articles_bp.route('/more')
+def more_articles():
+    """下一页文章的 HTML 片段，供仪表板的“加载更多”使用"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    cursor, limit = _page_args()
+    try:
+        return render_article_list(cursor, limit, show_admin_actions=session.get('role') == 'platform_admin')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
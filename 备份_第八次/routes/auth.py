@@ -1,7 +1,13 @@
 # routes/auth.py
+from datetime import datetime, timezone
+
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash
 from database.models import get_db_connection
-import bcrypt
+from database.audit import log_event
+from database.connection import close_db_connection
+from database.write_behind import touch
+from utils.passwords import BUSY_MESSAGE, PasswordBusyError, check_password
+from utils.sessions import regenerate_session
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -16,36 +22,6 @@ AVATAR_URLS = [
 ]
 
 
-def verify_password(stored_password, provided_password):
-    """验证密码函数 - 使用bcrypt验证"""
-    try:
-        # 使用bcrypt验证密码
-        return bcrypt.checkpw(
-            provided_password.encode('utf-8'),
-            stored_password.encode('utf-8')
-        )
-    except Exception as e:
-        print(f"密码验证错误: {e}")
-        # 如果bcrypt验证失败，尝试其他方法
-        try:
-            # 检查是否是旧格式的哈希 (哈希值:盐值)
-            if ':' in stored_password and len(stored_password.split(':')) == 2:
-                import hashlib
-                stored_hash, salt = stored_password.split(':')
-                new_hash = hashlib.pbkdf2_hmac(
-                    'sha256',
-                    provided_password.encode('utf-8'),
-                    salt.encode('utf-8'),
-                    100000
-                ).hex()
-                return stored_hash == new_hash
-            else:
-                # 可能是旧数据库的明文密码，直接比较
-                return stored_password == provided_password
-        except:
-            return False
-
-
 @auth_bp.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
@@ -59,23 +35,40 @@ def login():
         cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
         user = cursor.fetchone()
 
+        # 哈希计算较慢，先把连接还给连接池，不在计算期间占着连接
+        close_db_connection()
+
         if user:
-            # 验证密码
-            if verify_password(user['password'], password):
-                # 更新最后登录时间
-                from datetime import datetime
-                cursor.execute(
-                    "UPDATE users SET last_login = ? WHERE id = ?",
-                    (datetime.now(), user['id'])
-                )
-                conn.commit()
-
-                # 设置会话
+            # 验证密码 - 在专用的哈希线程池里计算，不占用请求线程的 CPU；
+            # 旧格式或 cost 不是目标值的哈希，校验通过时顺便算好新哈希
+            try:
+                password_ok, new_hash = check_password(user['password'], password)
+            except PasswordBusyError as e:
+                print(f"登录排队: {e}")
+                log_event('Login Warning', f'{username} 登录排队已满，请求被拒绝', user_id=user['id'])
+                flash(BUSY_MESSAGE, 'error')
+                return render_template('pages/login/login.html'), 503
+
+            if password_ok:
+                # 更新最后登录时间 - 先记在内存里，由后台线程批量写入；
+                # 和 CURRENT_TIMESTAMP 一样用 UTC，按天汇总时才不会错位
+                touch('users', 'last_login', user['id'],
+                      datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'))
+
+                # 升级后的密码哈希要立即保存
+                if new_hash:
+                    conn = get_db_connection()
+                    conn.execute("UPDATE users SET password = ? WHERE id = ?", (new_hash, user['id']))
+                    conn.commit()
+
+                # 设置会话 - 登录后换一个新的会话 ID
+                regenerate_session(session)
                 session['username'] = username
                 session['role'] = user['role']
                 session['user_id'] = user['id']
                 session['full_name'] = user['full_name'] if user['full_name'] is not None else username
                 session['avatar'] = user['avatar'] if user['avatar'] is not None else AVATAR_URLS[0]
+                log_event('Login', f'{username} 登录成功', user_id=user['id'])
 
                 # 根据角色重定向
                 if user['role'] == 'teacher':
@@ -87,17 +80,19 @@ def login():
                 elif user['role'] == 'platform_admin':
                     return redirect(url_for('admin.dashboard'))
             else:
+                log_event('Login Failed', f'{username} 密码错误', user_id=user['id'])
                 flash('用户名或密码错误，请重试。', 'error')
         else:
+            log_event('Login Failed', f'用户名不存在: {username}')
             flash('用户名或密码错误，请重试。', 'error')
 
-        conn.close()
-
     return render_template('pages/login/login.html')
 
 
 @auth_bp.route('/logout')
 def logout():
+    if 'user_id' in session:
+        log_event('Logout', f"{session.get('username')} 退出登录")
     session.pop('username', None)
     session.pop('role', None)
     session.pop('user_id', None)
@@ -1,6 +1,7 @@
 # routes/community.py
 from flask import Blueprint, render_template, session, redirect, url_for, request, flash
-from database.models import get_db_connection, get_articles, get_community_events, create_event, delete_event
+from database.audit import log_event
+from database.models import get_db_connection, get_community_events, create_event, delete_event
 
 community_bp = Blueprint('community', __name__, url_prefix='/community')
 
@@ -8,7 +9,8 @@ community_bp = Blueprint('community', __name__, url_prefix='/community')
 @community_bp.route('/dashboard')
 def dashboard():
     if 'role' in session and session['role'] == 'community_org':
-        articles = get_articles()
+        from routes.articles import render_article_list
+        article_list = render_article_list()
         events = get_community_events(session['user_id'])
 
         # 获取社区组织的基本信息
@@ -36,7 +38,7 @@ def dashboard():
         return render_template(
             'pages/community/community.html',
             username=session['username'],
-            articles=articles,
+            article_list=article_list,
             events=events,
             article_count=article_count,
             event_count=event_count,
@@ -89,6 +91,7 @@ def create_article():
                         (title, session['user_id'], content)
                     )
                     conn.commit()
+                    log_event('Article Created', f'发布文章 {cursor.lastrowid}: {title}')
                     flash('文章发布成功！', 'success')
                     return redirect(url_for('community.manage_articles'))
                 except Exception as e:
@@ -122,6 +125,7 @@ def edit_article(article_id):
 
         if not article:
             flash('文章不存在', 'error')
+            conn.close()
             return redirect(url_for('community.manage_articles'))
 
         if request.method == 'POST':
@@ -135,6 +139,7 @@ def edit_article(article_id):
                         (title, content, article_id)
                     )
                     conn.commit()
+                    log_event('Article Updated', f'编辑文章 {article_id}: {title}')
                     flash('文章更新成功！', 'success')
                     return redirect(url_for('community.manage_articles'))
                 except Exception as e:
@@ -161,6 +166,7 @@ def delete_article(article_id):
             # 确保可以删除所有文章
             cursor.execute('DELETE FROM articles WHERE id = ?', (article_id,))
             conn.commit()
+            log_event('Article Deleted', f'删除文章 {article_id}')
             flash('文章删除成功！', 'success')
         except Exception as e:
             flash(f'删除文章失败: {str(e)}', 'error')
@@ -231,13 +237,13 @@ def manage_members():
         groups = cursor.fetchall()
 
         # 获取成员统计
-        cursor.execute('SELECT COUNT(*) FROM members WHERE org_id = ? AND status = "active"', (session['user_id'],))
+        cursor.execute("SELECT COUNT(*) FROM members WHERE org_id = ? AND status = 'active'", (session['user_id'],))
         active_members = cursor.fetchone()[0]
 
-        cursor.execute('SELECT COUNT(*) FROM members WHERE org_id = ? AND status = "inactive"', (session['user_id'],))
+        cursor.execute("SELECT COUNT(*) FROM members WHERE org_id = ? AND status = 'inactive'", (session['user_id'],))
         inactive_members = cursor.fetchone()[0]
 
-        cursor.execute('SELECT COUNT(*) FROM members WHERE org_id = ? AND role = "admin"', (session['user_id'],))
+        cursor.execute("SELECT COUNT(*) FROM members WHERE org_id = ? AND role = 'admin'", (session['user_id'],))
         admin_members = cursor.fetchone()[0]
 
         # 按分组组织成员
@@ -329,6 +335,7 @@ def edit_member(member_id):
 
         if not member:
             flash('成员不存在或无权编辑', 'error')
+            conn.close()
             return redirect(url_for('community.manage_members'))
 
         if request.method == 'POST':
@@ -491,6 +498,7 @@ def edit_event_route(event_id):
 
         if not event:
             flash('活动不存在或无权编辑', 'error')
+            conn.close()
             return redirect(url_for('community.manage_events'))
 
         if request.method == 'POST':
@@ -0,0 +1,56 @@
+# routes/search.py
+from flask import Blueprint, render_template, request, redirect, url_for, session, jsonify, current_app
+from database.models import get_db_connection
+from database.search import RANK_WINDOW, SOURCES, search
+
+search_bp = Blueprint('search', __name__, url_prefix='/search')
+
+
+def run_search(text, kind=None, limit=20):
+    """执行全文搜索，返回 (结果, 只对最新一批命中打分的类型)；出错时返回空列表"""
+    try:
+        conn = get_db_connection()
+        results, truncated = search(conn, text, kind, limit,
+                                    rank_window=current_app.config.get('SEARCH_RANK_WINDOW', RANK_WINDOW))
+        conn.close()
+        return results, truncated
+    except Exception as e:
+        print(f"Error searching: {e}")
+        return [], []
+
+
+@search_bp.route('/')
+def search_page():
+    """搜索页面"""
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+
+    query = request.args.get('q', '').strip()
+    kind = request.args.get('kind') or None
+    results, truncated = run_search(query, kind) if query else ([], [])
+    return render_template('pages/search/search.html',
+                           query=query,
+                           kind=kind,
+                           kinds=list(SOURCES),
+                           results=results,
+                           truncated=truncated,
+                           rank_window=current_app.config.get('SEARCH_RANK_WINDOW', RANK_WINDOW))
+
+
+@search_bp.route('/api')
+def api_search():
+    """全文搜索API - 结果按 BM25 相关度排序，title / snippet 已转义并带 <mark> 高亮"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    query = request.args.get('q', '').strip()
+    kind = request.args.get('kind') or None
+    limit = request.args.get('limit', 20, type=int)
+    results, truncated = run_search(query, kind, limit) if query else ([], [])
+    return jsonify({
+        'query': query,
+        'results': results,
+        # 命中数超过 SEARCH_RANK_WINDOW 的类型，只在最新的一批里排序
+        'truncated': truncated,
+        'rank_window': current_app.config.get('SEARCH_RANK_WINDOW', RANK_WINDOW),
+    })
@@ -1,6 +1,7 @@
 # routes/student.py
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash
 from database.models import get_db_connection
+from utils.passwords import BUSY_MESSAGE, PasswordBusyError, make_password_hash, verify_current_password
 import random
 
 student_bp = Blueprint('student', __name__, url_prefix='/student')
@@ -244,6 +245,7 @@ def profile():
 
     student_info = cursor.fetchone()
 
+    status = 200
     # 处理表单提交
     if request.method == 'POST':
         # 修改密码
@@ -256,17 +258,23 @@ def profile():
             cursor.execute("SELECT password FROM users WHERE id = ?", (student_id,))
             user = cursor.fetchone()
 
-            if bcrypt.checkpw(current_password.encode('utf-8'), user['password'].encode('utf-8')):
-                if new_password == confirm_password:
-                    # 更新密码
-                    new_password_hash = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-                    cursor.execute("UPDATE users SET password = ? WHERE id = ?", (new_password_hash, student_id))
-                    conn.commit()
-                    flash('密码修改成功！', 'success')
+            try:
+                # 旧哈希马上要被替换，只校验不升级
+                if verify_current_password(user['password'], current_password):
+                    if new_password == confirm_password:
+                        # 更新密码
+                        new_password_hash = make_password_hash(new_password)
+                        cursor.execute("UPDATE users SET password = ? WHERE id = ?", (new_password_hash, student_id))
+                        conn.commit()
+                        flash('密码修改成功！', 'success')
+                    else:
+                        flash('新密码和确认密码不匹配。', 'error')
                 else:
-                    flash('新密码和确认密码不匹配。', 'error')
-            else:
-                flash('当前密码错误。', 'error')
+                    flash('当前密码错误。', 'error')
+            except PasswordBusyError as e:
+                print(f"修改密码排队: {e}")
+                flash(BUSY_MESSAGE, 'error')
+                status = 503
 
         # 更新个人信息
         elif 'update_profile' in request.form:
@@ -318,7 +326,7 @@ def profile():
 
     return render_template('pages/student/profile.html',
                            student_info=student_info,
-                           avatars=AVATAR_URLS)
+                           avatars=AVATAR_URLS), status
 
 
 
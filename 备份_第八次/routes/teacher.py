@@ -1,8 +1,8 @@
 # routes/teacher.py
-import bcrypt
 from flask import Blueprint, render_template, request, session, redirect, url_for, flash
-from database.models import get_teacher_dashboard_data, get_articles, get_db_connection
+from database.models import get_teacher_dashboard_data, get_db_connection
 from utils.helpers import add_student, delete_student
+from utils.passwords import BUSY_MESSAGE, PasswordBusyError, make_password_hash, verify_current_password
 
 teacher_bp = Blueprint('teacher', __name__, url_prefix='/teacher')
 
@@ -24,15 +24,17 @@ def dashboard():
         flash('请先登录教师账户。', 'error')
         return redirect(url_for('auth.login'))
 
-    from database.models import get_teacher_dashboard_data, get_articles
+    from database.models import get_teacher_dashboard_data
+    from routes.articles import render_article_list
     teacher_id = session.get('user_id')
 
     teacher_data = get_teacher_dashboard_data(teacher_id)
-    articles = get_articles()
+    # 只渲染第一页文章（有缓存），后面的页由“加载更多”按游标获取
+    article_list = render_article_list()
 
     return render_template('pages/teacher/teacher.html',
                            teacher_data=teacher_data,
-                           articles=articles)
+                           article_list=article_list)
 
 
 # routes/teacher.py - 部分更新
@@ -79,20 +81,19 @@ def courses():
             conn.commit()
             flash('课程删除成功！', 'success')
 
-    # 查询当前教师的课程及其统计信息
+    # 查询当前教师的课程及其统计信息（course_stats 由触发器维护）
     cursor.execute("""
     SELECT 
         c.id, 
         c.title, 
         c.description, 
         c.created_at,
-        COUNT(ce.student_id) as total_students,
-        COUNT(CASE WHEN ce.status = 'completed' THEN 1 END) as completed_students,
-        AVG(ce.score) as average_score
+        COALESCE(cs.total_students, 0) as total_students,
+        COALESCE(cs.completed_students, 0) as completed_students,
+        cs.score_sum / NULLIF(cs.score_count, 0) as average_score
     FROM courses c
-    LEFT JOIN course_enrollments ce ON c.id = ce.course_id
+    LEFT JOIN course_stats cs ON c.id = cs.course_id
     WHERE c.teacher_id = ?
-    GROUP BY c.id
     ORDER BY c.created_at DESC
     """, (teacher_id,))
 
@@ -183,39 +184,47 @@ def analytics():
     cursor = conn.cursor()
 
     try:
-        # 获取课程统计数据 - 使用 course_enrollments 表
+        # 获取课程统计数据 - 读取触发器维护的 course_stats 表
         cursor.execute("""
         SELECT 
             c.id,
             c.title,
-            COUNT(ce.student_id) as total_students,
-            COUNT(CASE WHEN ce.status = 'completed' THEN 1 END) as completed_students,
-            AVG(ce.score) as average_score,
-            COUNT(CASE WHEN ce.score >= 90 THEN 1 END) as excellent_students,
-            COUNT(CASE WHEN ce.score >= 60 AND ce.score < 90 THEN 1 END) as good_students,
-            COUNT(CASE WHEN ce.score < 60 THEN 1 END) as failing_students
+            COALESCE(cs.total_students, 0) as total_students,
+            COALESCE(cs.completed_students, 0) as completed_students,
+            cs.score_sum / NULLIF(cs.score_count, 0) as average_score,
+            COALESCE(cs.excellent_students, 0) as excellent_students,
+            COALESCE(cs.good_students, 0) as good_students,
+            COALESCE(cs.failing_students, 0) as failing_students
         FROM courses c
-        LEFT JOIN course_enrollments ce ON c.id = ce.course_id
+        LEFT JOIN course_stats cs ON c.id = cs.course_id
         WHERE c.teacher_id = ?
-        GROUP BY c.id
         ORDER BY c.created_at DESC
         """, (teacher_id,))
 
         course_stats = cursor.fetchall()
 
-        # 获取总体统计
+        # 获取总体统计 - 课程数、完成数、平均分都由 course_stats 汇总
         cursor.execute("""
         SELECT 
-            COUNT(DISTINCT c.id) as total_courses,
-            COUNT(DISTINCT ce.student_id) as total_students,
-            AVG(ce.score) as overall_average_score,
-            COUNT(CASE WHEN ce.status = 'completed' THEN 1 END) as total_completions
+            COUNT(c.id) as total_courses,
+            SUM(cs.score_sum) / NULLIF(SUM(cs.score_count), 0) as overall_average_score,
+            COALESCE(SUM(cs.completed_students), 0) as total_completions
         FROM courses c
-        LEFT JOIN course_enrollments ce ON c.id = ce.course_id
+        LEFT JOIN course_stats cs ON c.id = cs.course_id
         WHERE c.teacher_id = ?
         """, (teacher_id,))
+        totals = cursor.fetchone()
 
-        overall_stats = cursor.fetchone()
+        # 不同学生数无法按课程累加，单独走选课索引统计
+        cursor.execute("""
+        SELECT COUNT(DISTINCT ce.student_id)
+        FROM courses c
+        JOIN course_enrollments ce ON c.id = ce.course_id
+        WHERE c.teacher_id = ?
+        """, (teacher_id,))
+
+        overall_stats = dict(totals)
+        overall_stats['total_students'] = cursor.fetchone()[0]
 
     except Exception as e:
         print(f"获取统计数据错误: {e}")
@@ -245,6 +254,7 @@ def students_management():
     conn = get_db_connection()
     cursor = conn.cursor()
 
+    status = 200
     # 处理表单提交
     if request.method == 'POST':
         # 添加学生
@@ -258,27 +268,32 @@ def students_management():
                 flash('该邮箱已存在，请使用其他邮箱。', 'error')
             else:
                 # 创建密码哈希
-                password_hash = bcrypt.hashpw("123123".encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-
-                # 插入新学生
-                cursor.execute("""
-                INSERT INTO users (username, password, role, full_name)
-                VALUES (?, ?, 'student', ?)
-                """, (email, password_hash, full_name))
+                try:
+                    password_hash = make_password_hash("123123")
+                except PasswordBusyError as e:
+                    print(f"添加学生排队: {e}")
+                    flash(BUSY_MESSAGE, 'error')
+                    status = 503
+                else:
+                    # 插入新学生
+                    cursor.execute("""
+                    INSERT INTO users (username, password, role, full_name)
+                    VALUES (?, ?, 'student', ?)
+                    """, (email, password_hash, full_name))
 
-                new_student_id = cursor.lastrowid
+                    new_student_id = cursor.lastrowid
 
-                # 将学生添加到教师的所有课程中 - 使用course_enrollments表
-                cursor.execute("SELECT id FROM courses WHERE teacher_id = ?", (teacher_id,))
-                courses = cursor.fetchall()
-                for course in courses:
-                    cursor.execute("""
-                    INSERT OR IGNORE INTO course_enrollments (course_id, student_id)
-                    VALUES (?, ?)
-                    """, (course['id'], new_student_id))
+                    # 将学生添加到教师的所有课程中 - 使用course_enrollments表
+                    cursor.execute("SELECT id FROM courses WHERE teacher_id = ?", (teacher_id,))
+                    courses = cursor.fetchall()
+                    for course in courses:
+                        cursor.execute("""
+                        INSERT OR IGNORE INTO course_enrollments (course_id, student_id)
+                        VALUES (?, ?)
+                        """, (course['id'], new_student_id))
 
-                conn.commit()
-                flash(f'学生 {full_name} 添加成功！默认密码为 123123', 'success')
+                    conn.commit()
+                    flash(f'学生 {full_name} 添加成功！默认密码为 123123', 'success')
 
         # 删除学生
         elif 'delete_student' in request.form:
@@ -307,7 +322,7 @@ def students_management():
     students = cursor.fetchall()
     conn.close()
 
-    return render_template('pages/teacher/students_management.html', students=students)
+    return render_template('pages/teacher/students_management.html', students=students), status
 
 
 @teacher_bp.route('/profile', methods=['GET', 'POST'])
@@ -330,6 +345,7 @@ def profile():
 
     teacher_info = cursor.fetchone()
 
+    status = 200
     # 处理表单提交
     if request.method == 'POST':
         # 修改密码
@@ -342,17 +358,23 @@ def profile():
             cursor.execute("SELECT password FROM users WHERE id = ?", (teacher_id,))
             user = cursor.fetchone()
 
-            if bcrypt.checkpw(current_password.encode('utf-8'), user['password'].encode('utf-8')):
-                if new_password == confirm_password:
-                    # 更新密码
-                    new_password_hash = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-                    cursor.execute("UPDATE users SET password = ? WHERE id = ?", (new_password_hash, teacher_id))
-                    conn.commit()
-                    flash('密码修改成功！', 'success')
+            try:
+                # 旧哈希马上要被替换，只校验不升级
+                if verify_current_password(user['password'], current_password):
+                    if new_password == confirm_password:
+                        # 更新密码
+                        new_password_hash = make_password_hash(new_password)
+                        cursor.execute("UPDATE users SET password = ? WHERE id = ?", (new_password_hash, teacher_id))
+                        conn.commit()
+                        flash('密码修改成功！', 'success')
+                    else:
+                        flash('新密码和确认密码不匹配。', 'error')
                 else:
-                    flash('新密码和确认密码不匹配。', 'error')
-            else:
-                flash('当前密码错误。', 'error')
+                    flash('当前密码错误。', 'error')
+            except PasswordBusyError as e:
+                print(f"修改密码排队: {e}")
+                flash(BUSY_MESSAGE, 'error')
+                status = 503
 
         # 更新个人信息
         elif 'update_profile' in request.form:
@@ -404,6 +426,6 @@ def profile():
 
     return render_template('pages/teacher/profile.html',
                            teacher_info=teacher_info,
-                           avatars=AVATAR_URLS)
+                           avatars=AVATAR_URLS), status
 
 
@@ -572,6 +572,18 @@ function updateStatsOverview(data) {
             value: data.user_stats.active,
             label: 'Active Users',
             color: '#ff6b6b'
+        },
+        {
+            icon: 'fas fa-user-plus',
+            value: data.activity ? data.activity.totals.registrations : 0,
+            label: 'New Users in Range',
+            color: '#667eea'
+        },
+        {
+            icon: 'fas fa-pen',
+            value: data.activity ? data.activity.totals.articles : 0,
+            label: 'New Articles in Range',
+            color: '#f093fb'
         }
     ];
 
@@ -668,50 +680,24 @@ function createCharts(data) {
         });
     }
 
-    // 活跃用户趋势图
+    // 活跃用户趋势图 - 所选时间范围内每个时间桶的登录和注册数
     const activeUsersCtx = document.getElementById('activeUsersChart');
-    if (activeUsersCtx) {
-        const activeUsersData = {};
-        data.active_users.forEach(item => {
-            activeUsersData[item.role] = item.count;
-        });
+    if (activeUsersCtx && data.activity) {
+        charts.activeUsers = createActivityChart(activeUsersCtx, data.activity, [
+            { metric: 'logins', label: 'Logins', color: '#667eea' },
+            { metric: 'registrations', label: 'Registrations', color: '#4facfe' }
+        ]);
+    }
 
-        charts.activeUsers = new Chart(activeUsersCtx, {
-            type: 'line',
-            data: {
-                labels: ['Students', 'Teachers', 'Organizers'],
-                datasets: [{
-                    label: 'Active Users',
-                    data: [
-                        activeUsersData.student || 0,
-                        activeUsersData.teacher || 0,
-                        activeUsersData.community_org || 0
-                    ],
-                    borderColor: '#667eea',
-                    backgroundColor: 'rgba(102, 126, 234, 0.1)',
-                    borderWidth: 3,
-                    fill: true,
-                    tension: 0.4
-                }]
-            },
-            options: {
-                responsive: true,
-                maintainAspectRatio: false,
-                scales: {
-                    y: {
-                        beginAtZero: true,
-                        grid: {
-                            drawBorder: false
-                        }
-                    },
-                    x: {
-                        grid: {
-                            display: false
-                        }
-                    }
-                }
-            }
-        });
+    // 内容活动趋势图
+    const contentActivityCtx = document.getElementById('contentActivityChart');
+    if (contentActivityCtx && data.activity) {
+        charts.contentActivity = createActivityChart(contentActivityCtx, data.activity, [
+            { metric: 'articles', label: 'Articles', color: '#f093fb' },
+            { metric: 'events', label: 'Events', color: '#f5576c' },
+            { metric: 'enrollments', label: 'Enrollments', color: '#4ecdc4' },
+            { metric: 'completions', label: 'Completions', color: '#764ba2' }
+        ]);
     }
 
     // 文章分类饼图
@@ -739,6 +725,54 @@ function createCharts(data) {
     }
 }
 
+// 时间序列折线图 - 数据来自服务端已按时间桶汇总（并在长范围时合并）的 activity
+function createActivityChart(ctx, activity, lines) {
+    return new Chart(ctx, {
+        type: 'line',
+        data: {
+            labels: activity.labels,
+            datasets: lines.map(line => ({
+                label: line.label,
+                data: activity.series[line.metric] || [],
+                borderColor: line.color,
+                backgroundColor: 'transparent',
+                borderWidth: 2,
+                pointRadius: 0,
+                tension: 0.3
+            }))
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            interaction: {
+                mode: 'index',
+                intersect: false
+            },
+            scales: {
+                y: {
+                    beginAtZero: true,
+                    grid: {
+                        drawBorder: false
+                    }
+                },
+                x: {
+                    grid: {
+                        display: false
+                    },
+                    ticks: {
+                        maxTicksLimit: 8
+                    }
+                }
+            },
+            plugins: {
+                legend: {
+                    position: 'bottom'
+                }
+            }
+        }
+    });
+}
+
 function generateWordCloud(wordData) {
     const wordcloudElement = document.getElementById('wordcloud');
     const wordcloudStats = document.getElementById('wordcloudStats');
@@ -841,8 +875,10 @@ function generateWordCloud(wordData) {
 
 async function exportData() {
     try {
-        alert('Export feature would be implemented here');
-        // 实际的导出实现
+        // 导出当前标签页对应的完整表格；直接跳转到下载地址，文件由浏览器边收边写，不经过内存
+        const activeTab = document.querySelector('.tab.active');
+        const dataset = activeTab ? activeTab.dataset.tab : 'users';
+        window.location.href = `/admin/api/analytics/${dataset}/export?format=csv`;
     } catch (error) {
         console.error('Error exporting data:', error);
         alert('Failed to export data');
@@ -407,7 +407,6 @@ function updateSystemStatus(status) {
     // 数据库状态
     document.getElementById('dbSize').textContent = status.db_size || '45.2 MB';
     document.getElementById('tableCount').textContent = status.table_count || '12';
-    document.getElementById('totalRecords').textContent = status.total_records || '1,245';
     document.getElementById('lastBackup').textContent = status.last_backup || '2024-01-15 02:00';
 
     // 安全状态
@@ -451,7 +450,6 @@ function getMockSystemStatus() {
         cpu_percent: '35%',
         db_size: '45.2 MB',
         table_count: '12',
-        total_records: '1,245',
         last_backup: new Date().toISOString().split('T')[0] + ' 02:00',
         security: {
             authentication: 'Good',
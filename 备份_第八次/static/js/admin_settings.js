@@ -22,6 +22,10 @@ function setupEventListeners() {
                 section.classList.remove('active');
             });
             document.getElementById(sectionId).classList.add('active');
+
+            if (sectionId === 'backup') {
+                loadBackupFiles();
+            }
         });
     });
 
@@ -315,21 +319,40 @@ function resetSystemSettings() {
 }
 
 async function createBackup() {
+    const backupBtn = document.getElementById('backupBtn');
     try {
         const response = await fetch('/admin/api/system/backup', {
             method: 'POST'
         });
 
-        if (response.ok) {
-            alert('Database backup created successfully');
-            loadBackupFiles();
-        } else {
+        if (!response.ok) {
             const error = await response.json();
             alert('Backup failed: ' + error.error);
+            return;
+        }
+
+        // 备份在后台进行，轮询进度直到完成
+        backupBtn.disabled = true;
+        let job = (await response.json()).job;
+        while (job && (job.status === 'running' || job.status === 'compressing')) {
+            backupBtn.textContent = `Backing up... ${job.percent}%`;
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            const progress = await fetch('/admin/api/system/backup');
+            job = (await progress.json()).current;
+        }
+
+        if (job && job.status === 'completed') {
+            alert('Database backup created successfully');
+        } else {
+            alert('Backup failed: ' + (job && job.error ? job.error : 'unknown error'));
         }
+        loadBackupFiles();
     } catch (error) {
         console.error('Error creating backup:', error);
         alert('Backup failed');
+    } finally {
+        backupBtn.disabled = false;
+        backupBtn.textContent = 'Backup Now';
     }
 }
 
@@ -360,13 +383,41 @@ async function downloadLogs() {
 }
 
 async function loadBackupFiles() {
-    // 这里应该从后端获取备份文件列表
     const backupFiles = document.getElementById('backupFiles');
     backupFiles.innerHTML = `
         <div style="color: #6c757d; text-align: center; padding: 20px;">
             <i class="fas fa-info-circle"></i> Loading backup file list...
         </div>
     `;
+
+    try {
+        const response = await fetch('/admin/api/system/backup');
+        const data = await response.json();
+        if (!data.backups || data.backups.length === 0) {
+            backupFiles.innerHTML = `
+                <div style="color: #6c757d; text-align: center; padding: 20px;">
+                    <i class="fas fa-info-circle"></i> No backups yet
+                </div>
+            `;
+            return;
+        }
+        backupFiles.innerHTML = data.backups.map(backup => `
+            <div class="backup-item" style="display: flex; justify-content: space-between; padding: 8px 0;">
+                <span>${backup.name}</span>
+                <span>${backup.created_at} · ${(backup.size / 1024 / 1024).toFixed(1)} MB</span>
+                <a href="/admin/api/system/backup/${encodeURIComponent(backup.name)}" class="btn btn-secondary btn-sm">
+                    <i class="fas fa-download"></i> Download
+                </a>
+            </div>
+        `).join('');
+    } catch (error) {
+        console.error('Error loading backup files:', error);
+        backupFiles.innerHTML = `
+            <div style="color: #dc3545; text-align: center; padding: 20px;">
+                Failed to load backup files
+            </div>
+        `;
+    }
 }
 
 // 用户表单提交
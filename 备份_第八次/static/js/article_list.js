@@ -0,0 +1,32 @@
+// 文章列表“加载更多” - 取下一页的 HTML 片段追加到当前列表
+document.addEventListener('click', async function(e) {
+    const button = e.target.closest('.load-more-articles');
+    if (!button) {
+        return;
+    }
+
+    const pager = button.closest('.articles-pager');
+    const grid = pager.previousElementSibling;
+    button.disabled = true;
+
+    try {
+        const response = await fetch(button.dataset.url);
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`);
+        }
+
+        const page = document.createElement('div');
+        page.innerHTML = await response.text();
+
+        page.querySelectorAll('.articles-grid > .article-card').forEach(card => grid.appendChild(card));
+        const nextPager = page.querySelector('.articles-pager');
+        if (nextPager) {
+            pager.replaceWith(nextPager);
+        } else {
+            pager.remove();
+        }
+    } catch (error) {
+        console.error('Error loading articles:', error);
+        button.disabled = false;
+    }
+});
@@ -0,0 +1,193 @@
+# utils/assets.py
+"""静态资源指纹、预压缩和长期缓存
+
+Flask 默认的静态文件缓存时间很短，浏览器每次切换页面都要对每个 CSS / JS 发请求重新验证。
+flask assets build 把 static 下的文件按内容哈希复制成 static/dist/css/main.<哈希>.css，
+可压缩的文件同时写好 .gz（装了 brotli 时还有 .br），并生成 manifest.json。
+
+应用启动时读取清单：url_for('static', filename='css/main.css') 自动输出带哈希的地址，
+这些地址的内容永远不变，响应带 Cache-Control: immutable 和一年的有效期，
+浏览器之后的页面直接用本地缓存，不再发请求。客户端支持时直接发送预先压缩好的文件。
+构建之后又修改过的源文件不使用清单里的旧版本，回退到原地址，重新构建后才生效。
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+
+import click
+from flask import abort, current_app, request, send_file
+from flask.cli import AppGroup
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # 可选依赖
+    brotli = None
+
+# 构建输出目录（static 下的子目录）和清单文件名
+ASSET_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+# 指纹长度（十六进制字符）
+HASH_LENGTH = 12
+# 带指纹的文件缓存一年
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# 值得预压缩的文件类型
+COMPRESSIBLE = {'.css', '.js', '.svg', '.html', '.json', '.txt', '.map'}
+
+assets_cli = AppGroup('assets', help='静态资源构建命令')
+
+
+def fingerprint_name(name, digest):
+    """css/main.css -> css/main.<digest>.css"""
+    root, ext = os.path.splitext(name)
+    return f'{root}.{digest}{ext}'
+
+
+def _source_files(static_folder):
+    # static 下除构建输出目录以外的所有文件，返回以 / 分隔的相对路径
+    for root, dirs, files in os.walk(static_folder):
+        if os.path.abspath(root) == os.path.abspath(static_folder):
+            dirs[:] = [d for d in dirs if d != ASSET_DIR]
+        dirs.sort()
+        for filename in sorted(files):
+            path = os.path.join(root, filename)
+            yield os.path.relpath(path, static_folder).replace(os.sep, '/'), path
+
+
+def _write_compressed(path, data):
+    # 只保留比原文件小的压缩版本，返回写出的后缀
+    written = []
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data, quality=11)))
+    for suffix, compressed in variants:
+        if len(compressed) < len(data):
+            with open(path + suffix, 'wb') as f:
+                f.write(compressed)
+            written.append(suffix)
+    return written
+
+
+def build_assets(static_folder, echo=print):
+    """重新生成 static/dist：带指纹的副本、预压缩文件和 manifest.json，返回清单"""
+    output = os.path.join(static_folder, ASSET_DIR)
+    if os.path.isdir(output):
+        shutil.rmtree(output)
+
+    manifest = {}
+    original_bytes = compressed_bytes = 0
+    for name, path in _source_files(static_folder):
+        with open(path, 'rb') as f:
+            data = f.read()
+        hashed = fingerprint_name(name, hashlib.sha256(data).hexdigest()[:HASH_LENGTH])
+        target = os.path.join(output, hashed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(data)
+
+        suffixes = []
+        if os.path.splitext(name)[1].lower() in COMPRESSIBLE:
+            suffixes = _write_compressed(target, data)
+            if '.gz' in suffixes:
+                original_bytes += len(data)
+                compressed_bytes += os.path.getsize(target + '.gz')
+        manifest[name] = hashed
+        echo(f"  {name} -> {hashed} {' '.join(suffixes)}".rstrip())
+
+    # 清单最后写：它的修改时间用来判断源文件在构建之后有没有改过
+    with open(os.path.join(output, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    if original_bytes:
+        echo(f"gzip: {original_bytes} -> {compressed_bytes} bytes")
+    return manifest
+
+
+def load_manifest(static_folder):
+    """读取清单，去掉构建之后又修改过的源文件；没有构建过时返回空清单"""
+    path = os.path.join(static_folder, ASSET_DIR, MANIFEST_NAME)
+    try:
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        built_at = os.path.getmtime(path)
+    except (OSError, ValueError):
+        return {}
+
+    stale = []
+    for name in list(manifest):
+        source = os.path.join(static_folder, name)
+        if not os.path.isfile(source) or os.path.getmtime(source) > built_at:
+            stale.append(name)
+            del manifest[name]
+    if stale:
+        print(f"Static manifest is out of date for {len(stale)} file(s), run flask assets build: "
+              + ', '.join(stale[:5]))
+    return manifest
+
+
+def _hashed_static_url(endpoint, values):
+    # url_for('static', filename=...) 时把文件名换成带指纹的地址
+    if endpoint != 'static' or 'filename' not in values:
+        return
+    hashed = current_app.extensions['assets'].get(values['filename'])
+    if hashed:
+        values['filename'] = f'{ASSET_DIR}/{hashed}'
+
+
+def _accepted_variant(path):
+    # 客户端接受且已经预压缩的版本，返回 (文件路径, Content-Encoding)
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if request.accept_encodings[encoding] and os.path.isfile(path + suffix):
+            return path + suffix, encoding
+    return path, None
+
+
+def serve_static(filename):
+    """静态文件：带指纹的文件长期缓存并优先发送预压缩版本，其余交给 Flask 默认处理"""
+    if not filename.startswith(ASSET_DIR + '/'):
+        return current_app.send_static_file(filename)
+
+    path = safe_join(current_app.static_folder, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    send_path, encoding = _accepted_variant(path)
+    response = send_file(
+        send_path,
+        mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+        max_age=IMMUTABLE_MAX_AGE,
+        conditional=True,
+    )
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if os.path.isfile(path + '.gz') or os.path.isfile(path + '.br'):
+        response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def get_asset_stats():
+    """清单里生效的文件数"""
+    manifest = current_app.extensions.get('assets')
+    return {'fingerprinted': len(manifest)} if manifest is not None else {}
+
+
+@assets_cli.command('build')
+def build_command():
+    """生成带指纹和预压缩的静态资源（static/dist）"""
+    manifest = build_assets(current_app.static_folder, echo=click.echo)
+    click.echo(f"已构建 {len(manifest)} 个静态文件，重启应用后生效")
+
+
+def init_app(app):
+    """STATIC_FINGERPRINT 为真时读取清单，url_for 输出带指纹的地址"""
+    if not app.config.get('STATIC_FINGERPRINT', True) or not app.has_static_folder:
+        return None
+    manifest = load_manifest(app.static_folder)
+    app.extensions['assets'] = manifest
+    app.url_defaults(_hashed_static_url)
+    app.view_functions['static'] = serve_static
+    return manifest
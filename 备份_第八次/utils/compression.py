@@ -0,0 +1,232 @@
+# utils/compression.py
+"""HTML / JSON 响应压缩
+
+统计表格、数据库浏览、安全日志这些接口返回的 JSON，以及文章很多的仪表板 HTML，
+压缩后只有原来的 1/5 到 1/10，但之前都是原样发送，网速慢的学校打开很吃力。
+这里在 after_request 里按 Accept-Encoding 协商压缩算法：
+gzip 总是可用，装了 brotli / zstandard 时优先使用 br / zstd。
+
+- 小于 COMPRESSION_MIN_SIZE 字节的响应不压缩（省下的字节抵不过 CPU 开销）
+- 只压缩 COMPRESSION_MIMETYPES 里的内容类型（图片等本身已压缩）
+- 生成器返回的流式响应边生成边压缩，每攒够一段就 flush，客户端仍然能边收边处理
+- 文件响应（静态文件、下载）原样发送
+"""
+import threading
+import zlib
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # 可选依赖
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖
+    zstandard = None
+
+# 流式响应至少攒这么多原始字节才 flush 一次
+STREAM_FLUSH_SIZE = 16 * 1024
+
+
+class GzipEncoder:
+    name = 'gzip'
+
+    def __init__(self, level):
+        # wbits=31 输出带 gzip 头的格式
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliEncoder:
+    name = 'br'
+
+    def __init__(self, level):
+        # brotli 的质量是 0-11，gzip 级别 1-9 大致对应到 1-11
+        self._compressor = brotli.Compressor(quality=min(11, max(0, round(level * 11 / 9))))
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class ZstdEncoder:
+    name = 'zstd'
+
+    def __init__(self, level):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def available_encoders():
+    """当前环境可用的压缩算法：编码名 -> 编码器类"""
+    encoders = {'gzip': GzipEncoder}
+    if brotli is not None:
+        encoders['br'] = BrotliEncoder
+    if zstandard is not None:
+        encoders['zstd'] = ZstdEncoder
+    return encoders
+
+
+class CompressionStats:
+    """压缩计数（线程安全）：按算法统计响应数、压缩前后的字节数"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.skipped = 0
+        self._encodings = {}
+
+    def record(self, encoding, raw_bytes, sent_bytes):
+        with self._lock:
+            item = self._encodings.setdefault(encoding, {'responses': 0, 'bytes_in': 0, 'bytes_out': 0})
+            item['responses'] += 1
+            item['bytes_in'] += raw_bytes
+            item['bytes_out'] += sent_bytes
+
+    def record_skipped(self):
+        with self._lock:
+            self.skipped += 1
+
+    def snapshot(self):
+        with self._lock:
+            encodings = {name: dict(item, bytes_saved=item['bytes_in'] - item['bytes_out'])
+                         for name, item in self._encodings.items()}
+            skipped = self.skipped
+        bytes_in = sum(item['bytes_in'] for item in encodings.values())
+        bytes_out = sum(item['bytes_out'] for item in encodings.values())
+        return {
+            'encodings': encodings,
+            'skipped_small': skipped,
+            'bytes_saved': bytes_in - bytes_out,
+            'ratio': round(bytes_out / bytes_in, 3) if bytes_in else None,
+        }
+
+
+class Compressor:
+    """after_request 钩子：协商算法并压缩响应体"""
+
+    def __init__(self, level=6, min_size=500, mimetypes=(), preference=('br', 'zstd', 'gzip')):
+        self.level = level
+        self.min_size = min_size
+        self.mimetypes = frozenset(mimetypes)
+        encoders = available_encoders()
+        self.encoders = {name: encoders[name] for name in preference if name in encoders}
+        self.stats = CompressionStats()
+
+    def choose(self):
+        """按客户端的 Accept-Encoding 和服务端的偏好顺序选算法，没有可用的返回 None"""
+        accepted = request.accept_encodings
+        best, best_quality = None, 0
+        for name in self.encoders:
+            quality = accepted[name]
+            if quality > best_quality:
+                best, best_quality = name, quality
+        return best
+
+    def eligible(self, response):
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
+            return False
+        if response.direct_passthrough or 'Content-Encoding' in response.headers:
+            return False
+        return response.mimetype in self.mimetypes
+
+    def __call__(self, response):
+        if request.method == 'HEAD' or not self.eligible(response):
+            return response
+        response.vary.add('Accept-Encoding')
+
+        if not response.is_streamed and len(response.get_data()) < self.min_size:
+            self.stats.record_skipped()
+            return response
+        encoding = self.choose()
+        if encoding is None:
+            return response
+
+        encoder = self.encoders[encoding](self.level)
+        if response.is_streamed:
+            response.response = self._stream(response.response, encoder)
+            response.headers.pop('Content-Length', None)
+        else:
+            raw = response.get_data()
+            body = encoder.compress(raw) + encoder.finish()
+            response.set_data(body)
+            self.stats.record(encoding, len(raw), len(body))
+
+        response.headers['Content-Encoding'] = encoding
+        # 压缩后字节不同，强 ETag 不再成立
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def _stream(self, chunks, encoder):
+        # 攒够 STREAM_FLUSH_SIZE 字节就 flush 一次：导出等长响应能边生成边发送，
+        # 又不会因为每一小块都 flush 而压不下来
+        raw_bytes = sent_bytes = unflushed = 0
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                if not chunk:
+                    continue
+                raw_bytes += len(chunk)
+                unflushed += len(chunk)
+                data = encoder.compress(chunk)
+                if unflushed >= STREAM_FLUSH_SIZE:
+                    data += encoder.flush()
+                    unflushed = 0
+                if data:
+                    sent_bytes += len(data)
+                    yield data
+            data = encoder.finish()
+            sent_bytes += len(data)
+            yield data
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+            self.stats.record(encoder.name, raw_bytes, sent_bytes)
+
+
+def get_compression_stats():
+    """当前进程的压缩统计"""
+    compressor = current_app.extensions.get('compression')
+    if compressor is None:
+        return {}
+    return dict(compressor.stats.snapshot(), available=list(compressor.encoders))
+
+
+def init_app(app):
+    """COMPRESSION_ENABLED 为真时注册压缩钩子"""
+    if not app.config.get('COMPRESSION_ENABLED', True):
+        return None
+    compressor = Compressor(
+        level=app.config.get('COMPRESSION_LEVEL', 6),
+        min_size=app.config.get('COMPRESSION_MIN_SIZE', 500),
+        mimetypes=app.config.get('COMPRESSION_MIMETYPES', ()),
+        preference=app.config.get('COMPRESSION_ALGORITHMS', ('br', 'zstd', 'gzip')),
+    )
+    app.after_request(compressor)
+    app.extensions['compression'] = compressor
+    return compressor
@@ -0,0 +1,104 @@
+# utils/fragment_cache.py
+"""渲染好的页面片段缓存
+
+教师、社区和管理员仪表板都嵌入同一个文章列表，每次打开都要查一页文章再渲染几十张卡片。
+这里把渲染出来的 HTML 按 (片段名, 依赖数据的版本号, 参数) 缓存在进程内的 LRU 里：
+版本号来自 table_versions，文章的增删改（不管是哪个进程写的）都会让版本号变化，
+旧版本的条目不会再被命中，并在第一次看到新版本时整体清掉。
+"""
+import threading
+from collections import OrderedDict
+
+from flask import current_app
+
+
+class FragmentCache:
+    """进程内的 LRU 片段缓存（线程安全），记录命中、未命中和失效次数"""
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+        # 片段名 -> 最近一次看到的版本号
+        self._versions = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _check_version(self, name, versions):
+        # 调用时已持有锁；版本号变了就丢掉这个片段的所有旧条目
+        if self._versions.get(name) == versions:
+            return
+        if name in self._versions:
+            for key in [key for key in self._items if key[0] == name]:
+                del self._items[key]
+            self.invalidations += 1
+        self._versions[name] = versions
+
+    def get(self, name, versions, params):
+        key = (name, versions, params)
+        with self._lock:
+            self._check_version(name, versions)
+            html = self._items.get(key)
+            if html is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return html
+
+    def put(self, name, versions, params, html):
+        key = (name, versions, params)
+        with self._lock:
+            # 渲染期间数据又被改过时，新版本的条目已经把这一版清掉了，不再放回去
+            if self._versions.get(name) != versions:
+                return
+            self._items[key] = html
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._versions.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._items),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'invalidations': self.invalidations,
+            }
+
+
+def cached_fragment(name, versions, params, render):
+    """取缓存的片段 HTML，没有时调用 render() 渲染并放入缓存；未启用缓存时直接渲染"""
+    cache = current_app.extensions.get('fragment_cache')
+    if cache is None:
+        return render()
+    html = cache.get(name, versions, params)
+    if html is None:
+        html = render()
+        cache.put(name, versions, params, html)
+    return html
+
+
+def get_fragment_cache_stats():
+    """当前进程片段缓存的统计信息"""
+    cache = current_app.extensions.get('fragment_cache')
+    return cache.stats() if cache is not None else {}
+
+
+def init_app(app):
+    """FRAGMENT_CACHE_SIZE 大于 0 时创建片段缓存"""
+    size = app.config.get('FRAGMENT_CACHE_SIZE', 256)
+    if size <= 0:
+        return None
+    cache = FragmentCache(size)
+    app.extensions['fragment_cache'] = cache
+    return cache
@@ -0,0 +1,80 @@
+# utils/http_cache.py
+"""管理后台 JSON 接口的条件请求（ETag / Last-Modified）
+
+管理后台的脚本每次都重新请求用户列表、统计表格和系统设置，
+服务端每次都重新查询、重新序列化，哪怕数据根本没变。
+这里用相关表在 table_versions 里的版本号生成 ETag：客户端带着 If-None-Match 来时，
+只查一次版本号（主键查找），没变就直接返回 304，既不查数据也不序列化。
+响应带 Cache-Control: no-cache，浏览器会自动带上 ETag 重新验证，前端脚本不用改。
+"""
+import hashlib
+from datetime import datetime, timezone
+
+from flask import current_app, jsonify, request
+
+
+def _etag(versions):
+    # ETag 区分接口，避免不同接口恰好版本号相同时互相命中
+    raw = repr((request.endpoint, versions)).encode('utf-8')
+    return hashlib.sha1(raw).hexdigest()[:20]
+
+
+def parse_timestamp(value):
+    """把 SQLite 的 CURRENT_TIMESTAMP（UTC）字符串转成带时区的 datetime，无法解析时返回 None"""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+    except (TypeError, ValueError):
+        return None
+
+
+def _not_modified(etag, last_modified):
+    # 有 If-None-Match 时只比较 ETag，否则才看 If-Modified-Since
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def _build_json(build):
+    try:
+        return jsonify(build())
+    except Exception as e:
+        print(f"Error building {request.endpoint} response: {e}")
+        response = jsonify({'error': 'Failed to load data'})
+        response.status_code = 500
+        return response
+
+
+def versioned_json(tables, build, last_modified=None):
+    """按 tables 的版本号返回 build() 的 JSON，数据没变时返回 304
+
+    build 只在需要返回内容时才调用；last_modified 可以是 datetime 或返回 datetime 的函数。
+    版本表里没有这些表（还没迁移）时不做条件请求，直接返回内容。
+    build 出错时应该抛出异常而不是返回空数据：空数据一旦带上当前版本的 ETag，
+    客户端会一直收到 304，直到这些表再次变化。出错时返回 500，不带 ETag / Last-Modified。
+    """
+    from database.connection import get_connection
+    from database.table_versions import get_versions
+
+    versions = get_versions(get_connection(), tables)
+    if None in versions:
+        return _build_json(build)
+
+    etag = _etag(versions)
+    if callable(last_modified):
+        last_modified = last_modified()
+
+    if _not_modified(etag, last_modified):
+        response = current_app.response_class(status=304)
+    else:
+        response = _build_json(build)
+        if response.status_code != 200:
+            return response
+
+    # 压缩等中间处理会改变字节内容，这里只承诺语义相同，用弱 ETag
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response
@@ -0,0 +1,271 @@
+# utils/passwords.py
+"""密码哈希：格式识别、校验与升级，以及专用线程池
+
+库里的密码有三种格式：bcrypt（$2b$12$...）、旧版 PBKDF2（哈希:盐值）和更早的明文。
+校验前先按格式分派，不再靠 bcrypt 抛异常再逐个尝试；登录成功时如果不是
+目标格式和目标 cost（BCRYPT_ROUNDS），顺便用明文密码重新哈希并保存。
+
+bcrypt 每次校验要占满一个 CPU 核几十到几百毫秒。登录高峰时如果直接在请求线程里算，
+所有工作线程都被登录占住，其他页面跟着变慢。这里把哈希计算放进固定大小的线程池：
+同时计算的数量不超过 workers，排队的不超过 max_queue，超出时立即拒绝，
+等待超过 timeout 秒也放弃，页面渲染始终留有 CPU。
+"""
+import hashlib
+import hmac
+import re
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import bcrypt
+from flask import current_app, has_app_context
+
+# 耗时统计保留最近多少次
+SAMPLE_SIZE = 500
+
+DEFAULT_ROUNDS = 12
+PBKDF2_ITERATIONS = 100000
+
+BCRYPT_RE = re.compile(r'^\$2[aby]\$(\d{2})\$[./A-Za-z0-9]{53}$')
+PBKDF2_RE = re.compile(r'^[0-9a-f]{64}:[^:]+$')
+
+# 哈希线程池拒绝或超时时给用户的提示（配合 503 返回）
+BUSY_MESSAGE = '当前登录人数较多，请稍后重试。'
+
+
+# ---- 格式识别与校验 ----
+
+def detect_hash_format(stored):
+    """识别密码字段的格式，返回 (格式, bcrypt cost)；格式为 bcrypt / pbkdf2 / plaintext / empty"""
+    if not stored:
+        return 'empty', None
+    match = BCRYPT_RE.match(stored)
+    if match:
+        return 'bcrypt', int(match.group(1))
+    if PBKDF2_RE.match(stored):
+        return 'pbkdf2', None
+    return 'plaintext', None
+
+
+def verify_password(stored, provided):
+    """按存储格式校验密码，每种格式只计算一次"""
+    if provided is None:
+        return False
+    fmt, _ = detect_hash_format(stored)
+    if fmt == 'bcrypt':
+        return bcrypt.checkpw(provided.encode('utf-8'), stored.encode('utf-8'))
+    if fmt == 'pbkdf2':
+        stored_hash, salt = stored.split(':')
+        new_hash = hashlib.pbkdf2_hmac(
+            'sha256', provided.encode('utf-8'), salt.encode('utf-8'), PBKDF2_ITERATIONS
+        ).hex()
+        return hmac.compare_digest(stored_hash, new_hash)
+    if fmt == 'plaintext':
+        return hmac.compare_digest(stored.encode('utf-8'), provided.encode('utf-8'))
+    return False
+
+
+def hash_password(password, rounds=DEFAULT_ROUNDS):
+    """用目标 cost 生成 bcrypt 哈希"""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def needs_rehash(stored, rounds=DEFAULT_ROUNDS):
+    """不是 bcrypt，或 cost 与目标不同（过低不安全，过高拖慢登录）时需要重新哈希"""
+    fmt, cost = detect_hash_format(stored)
+    return fmt != 'bcrypt' or cost != rounds
+
+
+def verify_and_upgrade(stored, provided, rounds=DEFAULT_ROUNDS):
+    """校验密码；通过且需要升级时一并算好新哈希。返回 (是否通过, 新哈希或 None)"""
+    if not verify_password(stored, provided):
+        return False, None
+    if needs_rehash(stored, rounds):
+        return True, hash_password(provided, rounds)
+    return True, None
+
+
+def target_rounds():
+    """当前应用配置的 bcrypt cost"""
+    if has_app_context():
+        return current_app.config.get('BCRYPT_ROUNDS', DEFAULT_ROUNDS)
+    return DEFAULT_ROUNDS
+
+
+def calibrate_rounds(budget_ms, low=10, high=16, samples=3):
+    """测量本机各 cost 下一次 bcrypt 的耗时，返回 ([(cost, 毫秒)], 不超过预算的最大 cost)
+
+    cost 每加 1 耗时翻倍，超过预算两倍后不再继续测更高的 cost。
+    """
+    timings = []
+    recommended = low
+    for rounds in range(low, high + 1):
+        salt = bcrypt.gensalt(rounds)
+        best = None
+        for _ in range(samples):
+            started = time.perf_counter()
+            bcrypt.hashpw(b'calibration password', salt)
+            elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        timings.append((rounds, round(best, 1)))
+        if best <= budget_ms:
+            recommended = rounds
+        if best > budget_ms * 2:
+            break
+    return timings, recommended
+
+
+def password_format_report(conn, rounds=DEFAULT_ROUNDS):
+    """统计各格式的账号数，返回 ({格式标签: 数量}, 需要升级的账号数)"""
+    formats = Counter()
+    outdated = 0
+    for (stored,) in conn.execute('SELECT password FROM users'):
+        fmt, cost = detect_hash_format(stored)
+        formats[f'bcrypt (cost {cost})' if fmt == 'bcrypt' else fmt] += 1
+        outdated += needs_rehash(stored, rounds)
+    return dict(formats), outdated
+
+
+# ---- 哈希线程池 ----
+
+class PasswordBusyError(RuntimeError):
+    """哈希线程池排队已满或等待超时"""
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))], 2)
+
+
+class PasswordExecutor:
+    """有界的哈希线程池（线程安全），记录排队深度、排队时间和哈希耗时"""
+
+    def __init__(self, workers=2, max_queue=32, timeout=5.0):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password')
+        # 正在计算 + 排队中的任务总数上限
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._lock = threading.Lock()
+        self._wait_ms = deque(maxlen=SAMPLE_SIZE)
+        self._hash_ms = deque(maxlen=SAMPLE_SIZE)
+        self.queued = 0
+        self.running = 0
+        self.peak_queued = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def run(self, fn, *args):
+        """在线程池里执行 fn(*args) 并等待结果；排队已满或超时抛出 PasswordBusyError"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordBusyError('密码校验排队已满')
+
+        enqueued = time.perf_counter()
+        with self._lock:
+            self.submitted += 1
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+
+        def task():
+            started = time.perf_counter()
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+            try:
+                return fn(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+                    self._wait_ms.append((started - enqueued) * 1000)
+                    self._hash_ms.append((finished - started) * 1000)
+                self._slots.release()
+
+        future = self._executor.submit(task)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            with self._lock:
+                self.timeouts += 1
+            # 还没开始的任务直接取消；已经在算的让它算完，名额在 task 结束时归还
+            if future.cancel():
+                with self._lock:
+                    self.queued -= 1
+                self._slots.release()
+            raise PasswordBusyError('密码校验等待超时')
+
+    def stats(self):
+        with self._lock:
+            wait_ms = list(self._wait_ms)
+            hash_ms = list(self._hash_ms)
+            return {
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                'queue_depth': self.queued,
+                'running': self.running,
+                'peak_queue_depth': self.peak_queued,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+                'wait_ms': {'p50': _percentile(wait_ms, 0.5), 'p95': _percentile(wait_ms, 0.95)},
+                'hash_ms': {
+                    'p50': _percentile(hash_ms, 0.5),
+                    'p95': _percentile(hash_ms, 0.95),
+                    'max': round(max(hash_ms), 2) if hash_ms else 0.0,
+                },
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def check_password(stored, provided):
+    """请求内校验密码（在哈希线程池里执行），返回 (是否通过, 需要保存的新哈希或 None)"""
+    return run_password_task(verify_and_upgrade, stored, provided, target_rounds())
+
+
+def verify_current_password(stored, provided):
+    """请求内只校验密码、不计算新哈希（修改密码前确认当前密码，旧哈希马上会被替换）"""
+    return run_password_task(verify_password, stored, provided)
+
+
+def make_password_hash(password):
+    """请求内生成要保存的密码哈希（在哈希线程池里执行）"""
+    return run_password_task(hash_password, password, target_rounds())
+
+
+def run_password_task(fn, *args):
+    """在应用的哈希线程池里执行；没有初始化线程池时（脚本等）直接在当前线程执行"""
+    executor = current_app.extensions.get('password_executor')
+    if executor is None:
+        return fn(*args)
+    return executor.run(fn, *args)
+
+
+def get_password_stats():
+    """获取当前进程哈希线程池的统计信息"""
+    executor = current_app.extensions.get('password_executor')
+    if executor is None:
+        return {}
+    return executor.stats()
+
+
+def init_app(app):
+    """为应用创建哈希线程池"""
+    executor = PasswordExecutor(
+        workers=app.config.get('PASSWORD_WORKERS', 2),
+        max_queue=app.config.get('PASSWORD_QUEUE_SIZE', 32),
+        timeout=app.config.get('PASSWORD_TIMEOUT', 5.0),
+    )
+    app.extensions['password_executor'] = executor
+    return executor
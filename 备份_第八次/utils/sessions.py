@@ -0,0 +1,246 @@
+# utils/sessions.py
+"""服务端会话
+
+Flask 默认把整个会话（用户名、角色、头像 URL……）签名后放进 cookie，
+每个请求（包括静态文件）都要带上这一大串并重新校验签名。
+这里 cookie 里只放一个随机的会话 ID，会话内容存在 SQLite 的 sessions 表里，
+多个 worker 进程共享；每个进程前面再加一层 LRU 缓存，绝大多数请求不用查库。
+
+过期时间取系统设置 session_timeout（分钟），按最后一次访问顺延。
+其他进程里的修改（比如在别的 worker 上退出登录）最多 SESSION_CACHE_TTL 秒后生效。
+"""
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+SESSION_ID_RE = re.compile(r'^[A-Za-z0-9_-]{43}$')
+DEFAULT_TIMEOUT_MINUTES = 60
+# session_timeout 设置的缓存秒数
+SETTING_TTL = 60
+# 清理过期会话的最小间隔（秒）
+CLEANUP_INTERVAL = 300
+
+
+def ensure_session_table(conn):
+    """创建会话表（幂等），由调用方提交事务"""
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS sessions (
+        id TEXT PRIMARY KEY,
+        data TEXT NOT NULL,
+        expires_at REAL NOT NULL
+    ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)')
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    """存在服务端的会话，修改时自动标记 modified"""
+
+    def __init__(self, initial=None, sid=None, expires_at=None):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.expires_at = expires_at
+        self.previous_sid = None
+        self.modified = False
+
+    def regenerate(self):
+        """换一个新的会话 ID（登录时调用，防止会话固定攻击），旧记录在保存时删除"""
+        if self.sid is not None:
+            self.previous_sid = self.sid
+            self.sid = None
+        self.modified = True
+
+
+class SessionCache:
+    """进程内的 LRU 会话缓存（线程安全）
+
+    缓存的是序列化后的 JSON 字符串，每次取出都得到一份新的 dict，
+    请求里对会话的修改不会影响缓存中的内容。
+    """
+
+    def __init__(self, max_size=1024, ttl=30):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, sid):
+        with self._lock:
+            item = self._items.get(sid)
+            if item is None or item[2] < time.monotonic():
+                self.misses += 1
+                return None
+            self._items.move_to_end(sid)
+            self.hits += 1
+            return item[0], item[1]
+
+    def put(self, sid, raw, expires_at):
+        with self._lock:
+            self._items[sid] = (raw, expires_at, time.monotonic() + self.ttl)
+            self._items.move_to_end(sid)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def discard(self, sid):
+        with self._lock:
+            self._items.pop(sid, None)
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._items), 'max_size': self.max_size, 'hits': self.hits, 'misses': self.misses}
+
+
+class SqliteSessionInterface(SessionInterface):
+    """会话内容存 SQLite，cookie 只有会话 ID"""
+
+    session_class = ServerSession
+    # 和默认的 cookie 会话用同一种序列化：元组（flash 消息）、Markup、bytes、datetime 读回来类型不变
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, cache_size=1024, cache_ttl=30):
+        self.cache = SessionCache(cache_size, cache_ttl)
+        self._timeout = None
+        self._timeout_checked = 0.0
+        self._last_cleanup = 0.0
+
+    # ---- 存储 ----
+
+    def _conn(self):
+        from database.connection import get_connection
+        return get_connection()
+
+    def timeout_seconds(self):
+        """系统设置 session_timeout（分钟），缓存 SETTING_TTL 秒"""
+        now = time.monotonic()
+        if self._timeout is None or now - self._timeout_checked > SETTING_TTL:
+            minutes = DEFAULT_TIMEOUT_MINUTES
+            try:
+                row = self._conn().execute(
+                    "SELECT setting_value FROM system_settings WHERE setting_key = 'session_timeout'"
+                ).fetchone()
+                if row:
+                    minutes = max(1, int(row['setting_value']))
+            except Exception as e:
+                print(f"Error reading session_timeout: {e}")
+            self._timeout = minutes * 60
+            self._timeout_checked = now
+        return self._timeout
+
+    def _load(self, sid):
+        cached = self.cache.get(sid)
+        if cached is not None and cached[1] > time.time():
+            raw, expires_at = cached
+        else:
+            row = self._conn().execute('SELECT data, expires_at FROM sessions WHERE id = ?', (sid,)).fetchone()
+            if row is None or row['expires_at'] <= time.time():
+                self.cache.discard(sid)
+                return None
+            raw, expires_at = row['data'], row['expires_at']
+            self.cache.put(sid, raw, expires_at)
+        return self.serializer.loads(raw), expires_at
+
+    def _cleanup(self, conn):
+        now = time.time()
+        if now - self._last_cleanup > CLEANUP_INTERVAL:
+            self._last_cleanup = now
+            conn.execute('DELETE FROM sessions WHERE expires_at <= ?', (now,))
+
+    # ---- SessionInterface ----
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid and SESSION_ID_RE.match(sid):
+            loaded = self._load(sid)
+            if loaded is not None:
+                data, expires_at = loaded
+                return self.session_class(data, sid=sid, expires_at=expires_at)
+        return self.session_class()
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        stale = [sid for sid in (session.previous_sid, None if session else session.sid) if sid]
+        if stale and session.modified:
+            # 退出登录或登录时换了 ID：删除旧的服务端记录
+            conn = self._conn()
+            conn.executemany('DELETE FROM sessions WHERE id = ?', [(sid,) for sid in stale])
+            conn.commit()
+            for sid in stale:
+                self.cache.discard(sid)
+
+        if not session:
+            if session.sid and session.modified:
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        timeout = self.timeout_seconds()
+        now = time.time()
+        new_session = session.sid is None
+        if session.modified or new_session:
+            sid = session.sid or secrets.token_urlsafe(32)
+            expires_at = now + timeout
+            raw = self.serializer.dumps(dict(session))
+            conn = self._conn()
+            conn.execute('INSERT OR REPLACE INTO sessions (id, data, expires_at) VALUES (?, ?, ?)',
+                         (sid, raw, expires_at))
+            if new_session:
+                self._cleanup(conn)
+            conn.commit()
+            self.cache.put(sid, raw, expires_at)
+        elif session.expires_at - now < timeout / 2:
+            # 过了一半有效期才顺延，顺延走延迟批量写入，不在每个请求里提交
+            from database.write_behind import touch
+            sid = session.sid
+            expires_at = now + timeout
+            touch('sessions', 'expires_at', sid, expires_at)
+            self.cache.put(sid, self.serializer.dumps(dict(session)), expires_at)
+        else:
+            return
+
+        if new_session:
+            response.set_cookie(
+                name, sid,
+                domain=domain, path=path,
+                httponly=self.get_cookie_httponly(app),
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+            )
+
+
+def regenerate_session(session):
+    """登录成功后更换会话 ID；使用 Flask 默认的 cookie 会话时什么也不做"""
+    if isinstance(session, ServerSession):
+        session.regenerate()
+
+
+def get_session_stats():
+    """当前进程会话缓存的统计信息"""
+    from flask import current_app
+    interface = current_app.session_interface
+    if not isinstance(interface, SqliteSessionInterface):
+        return {}
+    return dict(interface.cache.stats(), timeout_minutes=interface.timeout_seconds() // 60)
+
+
+def init_app(app):
+    """SESSION_BACKEND 为 sqlite 时改用服务端会话"""
+    if app.config.get('SESSION_BACKEND', 'sqlite') != 'sqlite':
+        return None
+    app.session_interface = SqliteSessionInterface(
+        cache_size=app.config.get('SESSION_CACHE_SIZE', 1024),
+        cache_ttl=app.config.get('SESSION_CACHE_TTL', 30),
+    )
+    return app.session_interface